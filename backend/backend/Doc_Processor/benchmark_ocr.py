@@ -0,0 +1,168 @@
+"""
+Compare per-page OCR with batched recognition and with OCR worker pools on a PDF
+
+Every page is OCRed (native text is ignored) with the page cache off, first
+one page per engine call and then in batches of each requested size. With
+--workers, every page is also OCRed by a warmed pool of each size to show
+how pages/sec scales with the worker count.
+
+Usage:
+    python -m Doc_Processor.benchmark_ocr <file.pdf> [--batch-pages 2 4 8] [--rec-batch-size 16]
+        [--workers 1 2 4]
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import fitz
+
+from .processors.ocr_pool import OCRWorkerPool
+from .processors.pdf_processor import PDFProcessor
+
+
+def _run(processor: PDFProcessor, doc, batch_pages: int) -> Dict[str, Any]:
+    pages = [(doc[page_num], page_num) for page_num in range(len(doc))]
+    start = time.perf_counter()
+    if batch_pages == 1:
+        results = [processor._perform_ocr(page, page_num) for page, page_num in pages]
+    else:
+        results = []
+        for i in range(0, len(pages), batch_pages):
+            results.extend(processor._perform_ocr_batch(pages[i:i + batch_pages]))
+    elapsed = time.perf_counter() - start
+    return {
+        "batch_pages": batch_pages,
+        "seconds": elapsed,
+        "pages_per_second": len(pages) / elapsed if elapsed else 0.0,
+        "texts": [result.get("text", "") for result in results],
+        "errors": sum(1 for result in results if "error" in result),
+    }
+
+
+def benchmark(file_path: Path, batch_sizes: List[int], rec_batch_size: int, dpi: int = 300) -> List[Dict[str, Any]]:
+    """
+    Time per-page and batched OCR of every page of a PDF
+
+    Returns:
+        One row per mode with pages/sec, speed-up over the per-page loop and
+        the share of pages whose text matches the per-page result
+    """
+    processor = PDFProcessor({
+        "ocr_enabled": True,
+        "language": "en",
+        "dpi": dpi,
+        "ocr_cache_enabled": False,
+        "ocr_rec_batch_size": rec_batch_size,
+    })
+    processor.ocr  # load the models outside the timed runs
+
+    doc = fitz.open(str(file_path))
+    try:
+        # Warm-up so the first timed run does not pay for predictor initialisation
+        processor._perform_ocr(doc[0], 0)
+        baseline = _run(processor, doc, 1)
+        runs = [baseline] + [_run(processor, doc, size) for size in batch_sizes if size > 1]
+    finally:
+        doc.close()
+
+    rows = []
+    for run in runs:
+        same = sum(a == b for a, b in zip(run["texts"], baseline["texts"]))
+        rows.append({
+            "batch_pages": run["batch_pages"],
+            "seconds": round(run["seconds"], 2),
+            "pages_per_second": round(run["pages_per_second"], 3),
+            "speedup": round(run["pages_per_second"] / baseline["pages_per_second"], 2)
+            if baseline["pages_per_second"] else 0.0,
+            "text_match": round(same / len(baseline["texts"]), 3) if baseline["texts"] else 1.0,
+            "errors": run["errors"],
+        })
+    return rows
+
+
+def benchmark_workers(
+    file_path: Path, worker_counts: List[int], rec_batch_size: int, dpi: int = 300
+) -> List[Dict[str, Any]]:
+    """
+    Time OCR of every page of a PDF with worker pools of each size
+
+    Pools are warmed before timing, so the rows measure steady-state
+    throughput rather than model loading.
+
+    Returns:
+        One row per worker count with pages/sec, speed-up over one worker and
+        scaling efficiency (speed-up divided by the worker count)
+    """
+    config = {
+        "ocr_enabled": True,
+        "language": "en",
+        "dpi": dpi,
+        "ocr_rec_batch_size": rec_batch_size,
+    }
+    doc = fitz.open(str(file_path))
+    page_count = len(doc)
+    doc.close()
+
+    rows = []
+    baseline = 0.0
+    # One worker is always run: it is the in-process baseline for the speed-up
+    for workers in sorted(set(worker_counts) | {1}):
+        if workers == 1:
+            processor = PDFProcessor({**config, "ocr_cache_enabled": False})
+            doc = fitz.open(str(file_path))
+            try:
+                processor._perform_ocr(doc[0], 0)
+                start = time.perf_counter()
+                results = [processor._perform_ocr(doc[page_num], page_num) for page_num in range(page_count)]
+            finally:
+                doc.close()
+        else:
+            pool = OCRWorkerPool.get(config, workers)
+            start = time.perf_counter()
+            futures = [pool.submit_page(str(file_path), page_num) for page_num in range(page_count)]
+            results = [pool.collect(future) for future in futures]
+            results = [result if error is None else {"error": str(error)} for result, error in results]
+        elapsed = time.perf_counter() - start
+
+        pages_per_second = page_count / elapsed if elapsed else 0.0
+        if workers == 1:
+            baseline = pages_per_second
+        speedup = pages_per_second / baseline if baseline else 0.0
+        rows.append({
+            "workers": workers,
+            "seconds": round(elapsed, 2),
+            "pages_per_second": round(pages_per_second, 3),
+            "speedup": round(speedup, 2),
+            "efficiency": round(speedup / workers, 2),
+            "errors": sum(1 for result in results if "error" in result),
+        })
+    OCRWorkerPool.shutdown_all()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched OCR against the per-page loop")
+    parser.add_argument("file_path", type=Path)
+    parser.add_argument("--batch-pages", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--rec-batch-size", type=int, default=16)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[],
+                        help="also time OCR worker pools of these sizes")
+    args = parser.parse_args()
+
+    print(f"{'batch_pages':>11} {'seconds':>8} {'pages/s':>8} {'speedup':>8} {'text_match':>10} {'errors':>6}")
+    for row in benchmark(args.file_path, args.batch_pages, args.rec_batch_size, args.dpi):
+        print(
+            f"{row['batch_pages']:>11} {row['seconds']:>8} {row['pages_per_second']:>8} "
+            f"{row['speedup']:>8} {row['text_match']:>10} {row['errors']:>6}"
+        )
+
+    if args.workers:
+        print()
+        print(f"{'workers':>7} {'seconds':>8} {'pages/s':>8} {'speedup':>8} {'efficiency':>10} {'errors':>6}")
+        for row in benchmark_workers(args.file_path, args.workers, args.rec_batch_size, args.dpi):
+            print(
+                f"{row['workers']:>7} {row['seconds']:>8} {row['pages_per_second']:>8} "
+                f"{row['speedup']:>8} {row['efficiency']:>10} {row['errors']:>6}"
+            )
@@ -5,10 +5,22 @@ class PDFConfig(BaseModel):
     ocr_enabled: bool = Field(default=True)
     language: str = Field(...)
     dpi: int = Field(default=300, ge=72, le=1200)
+    ocr_workers: int = Field(default=1, ge=1)
+    ocr_cache_enabled: bool = Field(default=True)
+    ocr_cache_path: str = Field(default="./cache/ocr_pages.sqlite3")
+    ocr_cache_max_bytes: int = Field(default=256 * 1024 * 1024, ge=0)
+    ocr_triage_enabled: bool = Field(default=True)
+    ocr_triage_dpi: int = Field(default=72, ge=18, le=150)
+    ocr_clean_scan_dpi: int = Field(default=200, ge=72, le=1200)
+    ocr_batch_pages: int = Field(default=1, ge=1)
+    ocr_rec_batch_size: int = Field(default=6, ge=1)
+    page_checkpoints_enabled: bool = Field(default=True)
+    page_checkpoints_path: str = Field(default="./cache/page_checkpoints.sqlite3")
 
 class ImageConfig(BaseModel):
     ocr_language: str = Field(...)
     preprocessing_steps: list[str] = Field(default_factory=list)
+    ocr_rec_batch_size: int = Field(default=6, ge=1)
 
 class StructuredConfig(BaseModel):
     schema_validation: bool = Field(default=True)
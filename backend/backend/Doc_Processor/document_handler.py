@@ -1,13 +1,13 @@
 from pathlib import Path
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, Iterator, List, Optional, Union, Tuple
+import importlib
+import threading
 import magic
 import logging
 from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 
-from .processors.pdf_processor import PDFProcessor
-from .processors.image_processor import ImageProcessor
-from .processors.structured_processor import StructuredProcessor
+from .processors.base_processor import BaseProcessor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,18 +15,20 @@ logger = logging.getLogger(__name__)
 
 
 class DocumentHandler:
+    # Processors are imported on first use so e.g. a text upload never
+    # loads the OCR stack (paddle, cv2, fitz)
     MIME_TYPE_MAPPING = {
-        'application/pdf': PDFProcessor,
-        'image/jpeg': ImageProcessor,
-        'image/png': ImageProcessor,
-        'application/json': StructuredProcessor,
-        'text/xml': StructuredProcessor,
-        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': StructuredProcessor,
-        'text/markdown': StructuredProcessor,
-        'text/x-markdown': StructuredProcessor,
-        'text/plain': StructuredProcessor,
-        'application/vnd.openxmlformats-officedocument.wordprocessingml.document': StructuredProcessor,  # .docx
-        'application/msword': StructuredProcessor,  # .doc
+        'application/pdf': 'pdf_processor.PDFProcessor',
+        'image/jpeg': 'image_processor.ImageProcessor',
+        'image/png': 'image_processor.ImageProcessor',
+        'application/json': 'structured_processor.StructuredProcessor',
+        'text/xml': 'structured_processor.StructuredProcessor',
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'structured_processor.StructuredProcessor',
+        'text/markdown': 'structured_processor.StructuredProcessor',
+        'text/x-markdown': 'structured_processor.StructuredProcessor',
+        'text/plain': 'structured_processor.StructuredProcessor',
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'structured_processor.StructuredProcessor',  # .docx
+        'application/msword': 'structured_processor.StructuredProcessor',  # .doc
     }
 
 
@@ -38,6 +40,8 @@ class DocumentHandler:
     ):
         self.config = self._prepare_config(config)
         self.max_workers = max_workers
+        self._processors: Dict[Tuple[type, str], BaseProcessor] = {}
+        self._processors_lock = threading.Lock()
         
     def _prepare_config(self, config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
         if not all(key in config for key in ['pdf', 'image', 'structured']):
@@ -54,20 +58,7 @@ class DocumentHandler:
             if not path.exists():
                 raise FileNotFoundError(f"Document not found: {path}")
             
-            mime_type = self._get_mime_type(path)
-            mime_type = mime_type.strip()
-
-            print("Mime Type ", mime_type)
-
-            processor_class = self.MIME_TYPE_MAPPING.get(mime_type)
-
-            print("processor_class ", processor_class)
-            
-            if not processor_class:
-                raise ValueError(f"Unsupported document type: {mime_type}")
-            
-            config_key = self._get_config_key(mime_type)
-            processor = processor_class(self.config[config_key])
+            processor, mime_type = self._resolve_processor(path)
             result = processor.process(path)
             
             return {
@@ -87,6 +78,80 @@ class DocumentHandler:
                 'status': 'failed'
             }
     
+    def iter_pages(self, file_path: Union[str, Path], file_hash: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield extracted content page by page
+
+        Processors that can stream (PDF) produce pages as they are extracted;
+        for the others the whole document is processed and yielded as a single
+        page without a page number. file_hash, the caller's hash_file digest
+        of the document, spares processors that key on it a second read.
+
+        Yields:
+            Dicts with at least 'text' and 'page'
+        """
+        path = Path(file_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Document not found: {path}")
+
+        processor, _ = self._resolve_processor(path)
+        if hasattr(processor, 'iter_pages'):
+            yield from processor.iter_pages(path, file_hash=file_hash)
+            return
+
+        content = processor.process(path).get('content', '')
+        if isinstance(content, list):
+            if content and isinstance(content[0], dict) and 'text' in content[0]:
+                yield from content
+                return
+            content = '\n'.join(str(item) for item in content if item)
+        yield {'text': str(content), 'page': None}
+
+    def warm_ocr_workers(self) -> None:
+        """Start the PDF OCR worker pool now when one is configured, instead of on the first upload"""
+        pdf_config = self.config['pdf']
+        # Checked first so text-only deployments never import the PDF stack
+        if not pdf_config.get('ocr_enabled') or pdf_config.get('ocr_workers', 1) <= 1:
+            return
+        processor_class = self._load_processor_class(self.MIME_TYPE_MAPPING['application/pdf'])
+        self._get_processor(processor_class, 'pdf').warm_ocr_pool()
+
+    def _resolve_processor(self, path: Path) -> Tuple[BaseProcessor, str]:
+        """Pick and load the processor for a file's MIME type"""
+        mime_type = self._get_mime_type(path)
+        mime_type = mime_type.strip()
+
+        print("Mime Type ", mime_type)
+
+        processor_path = self.MIME_TYPE_MAPPING.get(mime_type)
+
+        print("processor_class ", processor_path)
+        
+        if not processor_path:
+            raise ValueError(f"Unsupported document type: {mime_type}")
+        
+        processor_class = self._load_processor_class(processor_path)
+
+        config_key = self._get_config_key(mime_type)
+        return self._get_processor(processor_class, config_key), mime_type
+
+    @staticmethod
+    def _load_processor_class(processor_path: str) -> type:
+        """Import a processor class from its 'module.ClassName' path"""
+        module_name, class_name = processor_path.rsplit('.', 1)
+        module = importlib.import_module(f".processors.{module_name}", __package__)
+        return getattr(module, class_name)
+
+    def _get_processor(self, processor_class: type, config_key: str) -> BaseProcessor:
+        """Reuse one processor per type and configuration across documents"""
+        key = (processor_class, config_key)
+        with self._processors_lock:
+            processor = self._processors.get(key)
+            if processor is None:
+                processor = processor_class(self.config[config_key])
+                self._processors[key] = processor
+            return processor
+
     def _get_mime_type(self, path: Path) -> str:
         if path.suffix.lower() == '.md':
             return 'text/markdown'
@@ -2,15 +2,16 @@ from pathlib import Path
 from typing import Dict, Any
 import cv2
 import numpy as np
-from paddleocr import PaddleOCR
 from .base_processor import BaseProcessor
+from .ocr_engine_cache import ocr_engine_cache
 
 class ImageProcessor(BaseProcessor):
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
-        self.ocr = PaddleOCR(
+        self.ocr = ocr_engine_cache.get(
             use_angle_cls=True,
             lang=self.config.get('ocr_language', 'en'),
+            rec_batch_num=self.config.get('ocr_rec_batch_size', 6),
             show_log=False
         )
     
@@ -32,7 +33,8 @@ class ImageProcessor(BaseProcessor):
             results = self.ocr.ocr(image)
             
             text_results = []
-            for line in results[0]:
+            # PaddleOCR returns [None] for an image without text
+            for line in (results[0] if results else None) or []:
                 text_results.append({
                     'text': line[1][0],
                     'confidence': float(line[1][1]),
@@ -0,0 +1,177 @@
+import time
+import logging
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .ocr_image_buffers import ocr_image_buffers
+
+logger = logging.getLogger(__name__)
+
+
+def sorted_boxes(boxes) -> List[Any]:
+    """Order detected boxes top to bottom, then left to right within a line, as PaddleOCR does"""
+    boxes = sorted(boxes, key=lambda box: (box[0][1], box[0][0]))
+    for i in range(len(boxes) - 1):
+        for j in range(i, -1, -1):
+            if abs(boxes[j + 1][0][1] - boxes[j][0][1]) < 10 and boxes[j + 1][0][0] < boxes[j][0][0]:
+                boxes[j], boxes[j + 1] = boxes[j + 1], boxes[j]
+            else:
+                break
+    return boxes
+
+
+def crop_box(image: np.ndarray, box) -> np.ndarray:
+    """Cut a detected quadrilateral out of the image as an upright line image"""
+    points = np.asarray(box, dtype=np.float32)
+    width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+    height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+    target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    crop = cv2.warpPerspective(
+        image,
+        cv2.getPerspectiveTransform(points, target),
+        (width, height),
+        borderMode=cv2.BORDER_REPLICATE,
+        flags=cv2.INTER_CUBIC,
+    )
+    # Vertical lines are recognised rotated, like PaddleOCR's own crops
+    if crop.shape[0] >= 1.5 * crop.shape[1]:
+        crop = np.rot90(crop)
+    return crop
+
+
+class BatchRecognizer:
+    """
+    Two-stage OCR over a PaddleOCR engine.
+
+    Text lines are detected page by page. The line crops of several pages
+    then go through angle classification and recognition together, so the
+    recogniser runs full batches of rec_batch_num lines instead of one
+    partial batch per page.
+    """
+
+    def __init__(self, engine: Any):
+        self.engine = engine
+        self.use_angle_cls = getattr(engine, "use_angle_cls", True)
+        self.drop_score = getattr(engine, "drop_score", 0.5)
+        self.detect_seconds = 0.0
+        self.recognize_seconds = 0.0
+
+    def _locked(self):
+        # Shared engines from ocr_engine_cache carry the lock that serialises their predictors
+        lock = getattr(self.engine, "lock", None)
+        return lock if lock is not None else nullcontext()
+
+    def detect(self, image: np.ndarray) -> Tuple[List[Any], List[np.ndarray]]:
+        """
+        Detect text lines in one image
+
+        Returns:
+            Tuple of (line boxes in reading order, line crops); crops are
+            copies and stay valid after the image is reused
+        """
+        start = time.perf_counter()
+        if image.ndim == 2:
+            image = cv2.cvtColor(
+                image, cv2.COLOR_GRAY2BGR, dst=ocr_image_buffers.get("bgr", (*image.shape, 3))
+            )
+        with self._locked():
+            boxes, _ = self.engine.text_detector(image)
+        if boxes is None or len(boxes) == 0:
+            self.detect_seconds += time.perf_counter() - start
+            return [], []
+
+        boxes = sorted_boxes(list(boxes))
+        crops = [crop_box(image, box) for box in boxes]
+        self.detect_seconds += time.perf_counter() - start
+        return boxes, crops
+
+    def recognize(self, detections: List[Tuple[List[Any], List[np.ndarray]]]) -> List[List[Any]]:
+        """
+        Recognise the lines of several detected images in shared batches
+
+        Args:
+            detections: (boxes, crops) pairs from detect, one per image
+
+        Returns:
+            Per image, lines in PaddleOCR's [box, (text, score)] format
+        """
+        crops = [crop for _, image_crops in detections for crop in image_crops]
+        if not crops:
+            return [[] for _ in detections]
+
+        start = time.perf_counter()
+        with self._locked():
+            if self.use_angle_cls and getattr(self.engine, "text_classifier", None) is not None:
+                crops, _, _ = self.engine.text_classifier(crops)
+            recognized, _ = self.engine.text_recognizer(crops)
+        self.recognize_seconds += time.perf_counter() - start
+
+        results = []
+        position = 0
+        for boxes, _ in detections:
+            lines = []
+            for box, (text, score) in zip(boxes, recognized[position:position + len(boxes)]):
+                if score >= self.drop_score:
+                    lines.append([np.asarray(box).tolist(), (text, score)])
+            position += len(boxes)
+            results.append(lines)
+        return results
+
+
+class InlineOCRBatch:
+    """
+    In-process stand-in for OCRWorkerPool that OCRs pages in batches.
+
+    Pages submitted by PDFProcessor.iter_pages are queued and go through
+    PDFProcessor._perform_ocr_batch once batch_pages are waiting, or as soon
+    as one of the queued pages is collected.
+    """
+
+    def __init__(self, processor: Any, doc: Any, batch_pages: int):
+        self.processor = processor
+        self.doc = doc
+        self.batch_pages = batch_pages
+        self._pending: List[Tuple[int, Future]] = []
+
+    def submit_page(self, file_path: str, page_num: int) -> Future:
+        """Queue one page of the open document for OCR"""
+        future = Future()
+        self._pending.append((page_num, future))
+        if len(self._pending) >= self.batch_pages:
+            self.flush()
+        return future
+
+    def collect(self, future: Future) -> Tuple[Optional[Dict[str, Any]], Optional[Exception]]:
+        """
+        Wait for a submitted page, running its batch if it is still queued
+
+        Returns:
+            Tuple of (page result, error)
+        """
+        if not future.done():
+            self.flush()
+        try:
+            return future.result(), None
+        except Exception as e:
+            return None, e
+
+    def flush(self) -> None:
+        """OCR every queued page"""
+        pending, self._pending = self._pending, []
+        pending = [(page_num, future) for page_num, future in pending if not future.cancelled()]
+        if not pending:
+            return
+        try:
+            results = self.processor._perform_ocr_batch(
+                [(self.doc[page_num], page_num) for page_num, _ in pending]
+            )
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(pending, results):
+            future.set_result(result)
@@ -0,0 +1,121 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _LockedEngine:
+    """PaddleOCR wrapper that serialises inference; predictors are not thread-safe"""
+
+    def __init__(self, engine: Any):
+        self._engine = engine
+        self._lock = threading.Lock()
+
+    @property
+    def lock(self) -> threading.Lock:
+        """Held around every predictor call, for callers driving the predictors directly"""
+        return self._lock
+
+    def ocr(self, *args, **kwargs):
+        with self._lock:
+            return self._engine.ocr(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._engine, name)
+
+
+class OCREngineCache:
+    """
+    Bounded LRU cache of PaddleOCR engines keyed by their constructor options.
+
+    Building a PaddleOCR instance loads detection, recognition and angle
+    classifier models from disk, so processors share engines through this
+    cache instead of constructing one per document.
+    """
+
+    def __init__(self, max_size: int = 4):
+        self.max_size = max_size
+        self._engines: "OrderedDict[Tuple, _LockedEngine]" = OrderedDict()
+        self._load_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def get(self, **options: Any) -> _LockedEngine:
+        """
+        Get an engine for the given PaddleOCR options, loading it on a miss
+
+        Args:
+            options: Keyword arguments for PaddleOCR
+
+        Returns:
+            Shared, thread-safe OCR engine
+        """
+        key = tuple(sorted(options.items()))
+        with self._lock:
+            engine = self._lookup(key)
+            if engine is not None:
+                return engine
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given configuration; others wait for it
+        with load_lock:
+            with self._lock:
+                engine = self._lookup(key)
+                if engine is not None:
+                    return engine
+                self.misses += 1
+
+            from paddleocr import PaddleOCR
+
+            start = time.perf_counter()
+            engine = _LockedEngine(PaddleOCR(**options))
+            elapsed = time.perf_counter() - start
+            logger.info(f"Loaded OCR engine {dict(key)} in {elapsed:.2f}s")
+
+            with self._lock:
+                self.load_seconds += elapsed
+                self._engines[key] = engine
+                while len(self._engines) > self.max_size:
+                    evicted, _ = self._engines.popitem(last=False)
+                    self._load_locks.pop(evicted, None)
+                    self.evictions += 1
+                    logger.info(f"Evicted OCR engine {dict(evicted)}")
+            return engine
+
+    def _lookup(self, key: Tuple):
+        engine = self._engines.get(key)
+        if engine is not None:
+            self._engines.move_to_end(key)
+            self.hits += 1
+        return engine
+
+    def clear(self) -> None:
+        """Drop all cached engines"""
+        with self._lock:
+            self._engines.clear()
+            self._load_locks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache size, hit rate and model load time"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._engines),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "total_load_seconds": round(self.load_seconds, 3),
+                "avg_load_seconds": round(self.load_seconds / self.misses, 3) if self.misses else 0.0,
+            }
+
+
+# Process-wide cache shared by all processors
+ocr_engine_cache = OCREngineCache()
@@ -0,0 +1,77 @@
+import threading
+from typing import Dict, Any, Tuple
+
+
+class ImageBufferPool:
+    """
+    Per-thread reusable image buffers for the OCR preprocessing path.
+
+    Page images of the same size are preprocessed into the same arrays, so a
+    document costs a handful of allocations instead of several full-page
+    copies per page. Buffers belong to the calling thread and stay valid
+    until that thread asks for a buffer of the same name again.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.pixmap_bytes = 0
+        self.allocations = 0
+        self.allocated_bytes = 0
+        self.reuses = 0
+        self.render_seconds = 0.0
+        self.preprocess_seconds = 0.0
+
+    def get(self, name: str, shape: Tuple[int, ...]) -> Any:
+        """Get this thread's uint8 buffer called name, reallocating on a shape change"""
+        import numpy as np
+
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+
+        buffer = buffers.get(name)
+        if buffer is not None and buffer.shape == tuple(shape):
+            with self._lock:
+                self.reuses += 1
+            return buffer
+
+        buffer = buffers[name] = np.empty(shape, dtype=np.uint8)
+        with self._lock:
+            self.allocations += 1
+            self.allocated_bytes += buffer.nbytes
+        return buffer
+
+    def record_page(self, pixmap_bytes: int, render_seconds: float, preprocess_seconds: float) -> None:
+        """Account for one rendered and preprocessed page"""
+        with self._lock:
+            self.pages += 1
+            self.pixmap_bytes += pixmap_bytes
+            self.render_seconds += render_seconds
+            self.preprocess_seconds += preprocess_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-page allocation and memory bandwidth of the OCR image path"""
+        with self._lock:
+            pages = self.pages
+            return {
+                "pages": pages,
+                "pixmap_bytes": self.pixmap_bytes,
+                "buffer_allocations": self.allocations,
+                "buffer_reuses": self.reuses,
+                "buffer_bytes_allocated": self.allocated_bytes,
+                "allocated_bytes_per_page": (
+                    round((self.pixmap_bytes + self.allocated_bytes) / pages) if pages else 0
+                ),
+                "render_mb_per_s": (
+                    round(self.pixmap_bytes / self.render_seconds / 1e6, 1) if self.render_seconds else 0.0
+                ),
+                "preprocess_mb_per_s": (
+                    round(self.pixmap_bytes / self.preprocess_seconds / 1e6, 1) if self.preprocess_seconds else 0.0
+                ),
+            }
+
+
+# Process-wide pool shared by all processors
+ocr_image_buffers = ImageBufferPool()
@@ -0,0 +1,136 @@
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from ..storage import SQLiteStore, to_json
+
+logger = logging.getLogger(__name__)
+
+
+def page_fingerprint(page) -> str:
+    """
+    Hash of what a page renders from: its content stream, geometry and the
+    raw streams of the images and form XObjects it draws.
+
+    Falls back to hashing the rendered pixmap if the page resources cannot
+    be read.
+    """
+    digest = hashlib.sha256()
+    try:
+        doc = page.parent
+        digest.update(page.read_contents() or b"")
+        digest.update(repr((tuple(page.rect), page.rotation)).encode())
+        for image in page.get_images(full=True):
+            digest.update(doc.xref_stream_raw(image[0]) or b"")
+        for xobject in page.get_xobjects():
+            digest.update(doc.xref_stream_raw(xobject[0]) or b"")
+    except Exception as e:
+        logger.debug(f"Falling back to pixmap fingerprint: {e}")
+        digest = hashlib.sha256(b"pixmap")
+        digest.update(page.get_pixmap(dpi=72).samples)
+    return digest.hexdigest()
+
+
+class OCRPageCache(SQLiteStore):
+    """
+    On-disk cache of per-page OCR results with size-based LRU eviction.
+
+    Entries are zlib-compressed JSON holding the page text, text blocks and
+    confidence, stored in a single SQLite file that survives server
+    restarts. Only the parent process reads and writes it: PDFProcessor
+    looks pages up before queueing them for OCR workers and stores what
+    they return.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS pages (
+            key TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            last_access REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages (last_access)",
+    )
+
+    def __init__(self, db_path: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        super().__init__(db_path)
+
+    @staticmethod
+    def make_key(fingerprint: str, **options: Any) -> str:
+        """Cache key for a page fingerprint under the given OCR settings"""
+        payload = json.dumps({"page": fingerprint, **options}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached page result, None on a miss"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT data FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE pages SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a page result and evict least recently used entries over max_bytes"""
+        data = zlib.compress(
+            json.dumps(result, default=to_json).encode("utf-8"), level=6
+        )
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (key, data, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evict = []
+        for key, size in conn.execute("SELECT key, size FROM pages ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            evict.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM pages WHERE key = ?", evict)
+        self.evictions += len(evict)
+
+    def clear(self) -> None:
+        """Remove all cached pages"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM pages")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and storage usage"""
+        count, total = self._fetchone("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages")
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def get_ocr_page_cache(db_path: Path, max_bytes: int) -> OCRPageCache:
+    """Process-wide page cache for a database file"""
+    return OCRPageCache.shared(db_path, max_bytes)
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-worker state, populated by _init_worker in each child process
+_worker_processor = None
+_worker_doc: Optional[Tuple[Tuple[str, float, int], Any]] = None
+
+
+def _init_worker(config: Dict[str, Any]) -> None:
+    """Load the OCR models once for the lifetime of the worker process"""
+    global _worker_processor
+    from .pdf_processor import PDFProcessor
+
+    _worker_processor = PDFProcessor({**config, "ocr_workers": 1})
+    _worker_processor.ocr  # force model load while the pool is warming up
+
+
+def _open_document(file_path: str):
+    """Keep the most recently used PDF open between page tasks"""
+    global _worker_doc
+    import fitz
+
+    stat = os.stat(file_path)
+    key = (file_path, stat.st_mtime, stat.st_size)
+    if _worker_doc is None or _worker_doc[0] != key:
+        if _worker_doc is not None:
+            _worker_doc[1].close()
+        _worker_doc = (key, fitz.open(file_path))
+    return _worker_doc[1]
+
+
+def _warm_task() -> int:
+    # Held briefly so one ready worker cannot take every warm-up task
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _ocr_page_task(file_path: str, page_num: int) -> Dict[str, Any]:
+    doc = _open_document(file_path)
+    result = _worker_processor._perform_ocr(doc[page_num], page_num)
+    # fitz geometry objects are rebuilt by the parent from its own document
+    result.pop("dimensions", None)
+    return result
+
+
+class OCRWorkerPool:
+    """
+    Process pool of pre-warmed OCR workers.
+
+    Every worker owns a long-lived PDFProcessor and therefore its own
+    PaddleOCR instance, so pages are recognised in parallel without the
+    serialisation of a shared OCR lock. Pools are process-wide and shared
+    by all documents with the same OCR configuration, and are warmed when
+    created: all workers are started and their models loaded before the
+    first page is submitted.
+    """
+
+    _pools: Dict[Tuple[str, int], "OCRWorkerPool"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, config: Dict[str, Any], workers: int):
+        self.workers = workers
+        self.config = {
+            **config,
+            # Split the cores between workers instead of letting every
+            # Paddle instance spin up its default thread count
+            "cpu_threads": max(1, (os.cpu_count() or 1) // workers),
+        }
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            # spawn: never fork a parent that may already hold CUDA/Paddle state
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.config,),
+        )
+
+    @classmethod
+    def get(cls, config: Dict[str, Any], workers: int) -> "OCRWorkerPool":
+        """Get or create (and warm) the shared pool for an OCR configuration"""
+        key = (json.dumps(config, sort_keys=True, default=str), workers)
+        with cls._lock:
+            pool = cls._pools.get(key)
+            if pool is not None:
+                return pool
+            logger.info(f"Starting OCR worker pool with {workers} workers")
+            pool = cls(config, workers)
+            cls._pools[key] = pool
+        # Outside the lock: pools for other configurations stay available meanwhile
+        pool.warm()
+        return pool
+
+    @classmethod
+    def shutdown_all(cls) -> None:
+        """Stop every shared pool"""
+        with cls._lock:
+            pools, cls._pools = list(cls._pools.values()), {}
+        for pool in pools:
+            pool.shutdown()
+
+    def warm(self, timeout: float = 600.0) -> None:
+        """Start all workers and wait until every one has loaded its models"""
+        start = time.perf_counter()
+        ready = set()
+        # A worker only takes tasks once its initializer has finished, so
+        # keep asking until every worker process has answered
+        while len(ready) < self.workers:
+            remaining = timeout - (time.perf_counter() - start)
+            if remaining <= 0:
+                logger.warning(f"OCR pool warm-up timed out with {len(ready)}/{self.workers} workers ready")
+                return
+            futures = [self._executor.submit(_warm_task) for _ in range(self.workers - len(ready))]
+            try:
+                ready.update(future.result(timeout=remaining) for future in futures)
+            except Exception as e:
+                logger.warning(f"OCR pool warm-up failed: {str(e)}")
+                return
+        logger.info(f"OCR worker pool ready: {self.workers} workers in {time.perf_counter() - start:.1f}s")
+
+    def submit_page(self, file_path: str, page_num: int) -> Future:
+        """Queue one page for OCR"""
+        return self._executor.submit(_ocr_page_task, file_path, page_num)
+
+    def collect(self, future: Future) -> Tuple[Optional[Dict[str, Any]], Optional[Exception]]:
+        """
+        Wait for a submitted page
+
+        Returns:
+            Tuple of (page result, error)
+        """
+        try:
+            return future.result(), None
+        except BrokenProcessPool as e:
+            self._discard()
+            return None, e
+        except Exception as e:
+            return None, e
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _discard(self) -> None:
+        """Drop a broken pool so the next document gets a fresh one"""
+        with self._lock:
+            for key, pool in list(self._pools.items()):
+                if pool is self:
+                    del self._pools[key]
+        self.shutdown()
@@ -0,0 +1,86 @@
+import json
+import time
+import zlib
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any
+
+from ..storage import SQLiteStore, to_json
+
+logger = logging.getLogger(__name__)
+
+
+def document_key(file_hash: str, **options: Any) -> str:
+    """Checkpoint key for a file (by its hash_file digest) under the given extraction settings"""
+    payload = json.dumps({"file": file_hash, **options}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PageCheckpointStore(SQLiteStore):
+    """
+    On-disk record of the pages already extracted from a document.
+
+    Every finished page is written as soon as it is produced, so a job that
+    dies part way through a long document picks up the remaining pages on
+    restart instead of extracting it again from page 0. Checkpoints are
+    dropped once the whole document has been extracted.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS pages (
+            doc_key TEXT NOT NULL,
+            page_num INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (doc_key, page_num)
+        )
+        """,
+    )
+
+    def __init__(self, db_path: Path):
+        self.resumed_pages = 0
+        super().__init__(db_path)
+
+    def load(self, doc_key: str) -> Dict[int, Dict[str, Any]]:
+        """Pages checkpointed for a document, by page number"""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT page_num, data FROM pages WHERE doc_key = ?", (doc_key,)
+            ).fetchall()
+            self.resumed_pages += len(rows)
+        return {page_num: json.loads(zlib.decompress(data)) for page_num, data in rows}
+
+    def save(self, doc_key: str, page_num: int, result: Dict[str, Any]) -> None:
+        """Checkpoint one finished page"""
+        # fitz geometry is rebuilt from the document when the page is resumed
+        result = {key: value for key, value in result.items() if key != "dimensions"}
+        data = zlib.compress(json.dumps(result, default=to_json).encode("utf-8"), level=6)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (doc_key, page_num, data, created_at) VALUES (?, ?, ?, ?)",
+                (doc_key, page_num, data, time.time()),
+            )
+
+    def clear(self, doc_key: str) -> None:
+        """Drop the checkpoints of a fully extracted document"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM pages WHERE doc_key = ?", (doc_key,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Documents and pages currently checkpointed"""
+        documents, pages, total = self._fetchone(
+            "SELECT COUNT(DISTINCT doc_key), COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM pages"
+        )
+        return {
+            "documents": documents,
+            "pages": pages,
+            "bytes": total,
+            "resumed_pages": self.resumed_pages,
+        }
+
+
+def get_page_checkpoints(db_path: Path) -> PageCheckpointStore:
+    """Process-wide checkpoint store for a database file"""
+    return PageCheckpointStore.shared(db_path)
@@ -1,41 +1,87 @@
 import gc
 import os
+import time
 from pathlib import Path
-import torch
-from typing import Dict, Any, List, Optional
+from collections import deque
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import fitz
 import numpy as np
 import cv2
-from paddleocr import PaddleOCR
 from PIL import Image
 import io
 import logging
 from .base_processor import BaseProcessor
+from .ocr_pool import OCRWorkerPool
+from .ocr_engine_cache import ocr_engine_cache
+from .ocr_page_cache import OCRPageCache, get_ocr_page_cache, page_fingerprint
+from .ocr_image_buffers import ocr_image_buffers
+from .ocr_batch import BatchRecognizer, InlineOCRBatch
+from .page_checkpoints import document_key, get_page_checkpoints
+from ..storage import hash_file
 from tqdm.auto import tqdm
 
 import warnings
 warnings.filterwarnings("ignore")
 
-print("Torch CUDA available: ", torch.cuda.is_available())
-
 logger = logging.getLogger(__name__)
 
+# Part of every OCR page cache key; bump when preprocessing or result parsing changes
+OCR_PIPELINE_VERSION = 2
+
 
 class PDFProcessor(BaseProcessor):
+    # Preprocessing for pages that skip triage; noisy scans get the same treatment
+    FULL_PREPROCESSING = ("threshold", "denoise")
+
+    # Triage thresholds on the low-res gray render (0 = black, 255 = white)
+    TRIAGE_BLANK_INK_RATIO = 0.001  # dark pixel share below which a page is blank
+    TRIAGE_PHOTO_MIDTONE_RATIO = 0.35  # mid-grey pixel share above which a page is a photo
+    TRIAGE_NOISE_LEVEL = 3.0  # mean background deviation from a 3x3 median above which a scan is noisy
+    TRIAGE_STEPS = {
+        "blank": (),
+        "photo": (),  # binarising a photo destroys the gradients the recogniser needs
+        "noisy_scan": FULL_PREPROCESSING,
+        "clean_scan": ("threshold",),
+    }
+
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
-        self.ocr = self._initialize_ocr()
+        self._ocr = None
         self.max_workers = min(32, (os.cpu_count() or 1) + 4)
+        self.ocr_workers = config.get("ocr_workers", 1)
+        self.ocr_batch_pages = config.get("ocr_batch_pages", 1)
         self.chunk_size = config.get("chunk_size", 10)  # Process pages in chunks
-        self.save_processed_files = config.get("save_processed_files", True)
-        self.save_processed_files_dir = config.get("save_processed_files_dir", "processed_files")
-
-    def _initialize_ocr(self) -> PaddleOCR:
-        return PaddleOCR(
+        self.ocr_cache = (
+            get_ocr_page_cache(
+                config.get("ocr_cache_path", "./cache/ocr_pages.sqlite3"),
+                config.get("ocr_cache_max_bytes", 256 * 1024 * 1024),
+            )
+            if config.get("ocr_cache_enabled", False)
+            else None
+        )
+        self.page_checkpoints = (
+            get_page_checkpoints(config.get("page_checkpoints_path", "./cache/page_checkpoints.sqlite3"))
+            if config.get("page_checkpoints_enabled", False)
+            else None
+        )
+        # Running cost of full-DPI, fully preprocessed pages, the baseline for triage savings
+        self._full_seconds_per_mpx: Optional[float] = None
+
+    @property
+    def ocr(self) -> Any:
+        # Loaded on first use: pages handled by the worker pool never need it
+        if self._ocr is None:
+            self._ocr = self._initialize_ocr()
+        return self._ocr
+
+    def _initialize_ocr(self) -> Any:
+        return ocr_engine_cache.get(
             use_angle_cls=True,
             lang=self.config.get("language", "en"),
             use_gpu= True,
             enable_mkldnn=True,
+            cpu_threads=self.config.get("cpu_threads", 10),
+            rec_batch_num=self.config.get("ocr_rec_batch_size", 6),
             show_log=False,
         )
 
@@ -49,50 +95,213 @@ class PDFProcessor(BaseProcessor):
         if not 72 <= self.config["dpi"] <= 600:
             raise ValueError("DPI must be between 72 and 600")
 
+        if self.config.get("ocr_workers", 1) < 1:
+            raise ValueError("ocr_workers must be at least 1")
+
+        if self.config.get("ocr_batch_pages", 1) < 1:
+            raise ValueError("ocr_batch_pages must be at least 1")
+
     def process(self, file_path: Path) -> Dict[str, Any]:
         try:
             print("Processing PDF file:", file_path)
             logger.info(f"Processing PDF file: {file_path}")
             doc = fitz.open(str(file_path))
-            total_pages = len(doc)
-            pages_content = []
-
-            for page_num in tqdm(range(total_pages)):
-                try:
-                    result = self._process_page(doc[page_num], page_num)
-                    pages_content.append(result)
-                    gc.collect()
-                except Exception as e:
-                    logger.error(f"Page {page_num} failed: {str(e)}")
-                    pages_content.append(self._create_error_page(page_num, str(e)))
-            
-            # self._save_content({"content": pages_content}, self.save_processed_files_dir, file_path.stem)
-            
-            with open(f"/home/ajay/contracts_v2/ext.txt", "w") as f:
-                for page in pages_content:
-                    f.write(page["text"])
-                    f.write("\n\n")
-
+            pages_content = list(self.iter_pages(file_path))
             return {"content": pages_content, "metadata": self._get_metadata(doc)}
         finally:
             if "doc" in locals():
                 doc.close()
                 gc.collect()
-                
-    # def _save_content(self, content: Dict[str, Any], output_dir: Path, file_name: Any) -> None:
-    #     # save the text into a text file
-    #     if isinstance(output_dir, str):
-    #         output_dir = Path(output_dir)
-    #     text_file = output_dir / f"{file_name}.txt"
-    #     logger.info(f"Saving text to: {text_file}")
-    #     with open(text_file, "w") as f:
-    #         for page in content["content"]:
-    #             f.write(page["text"])
-    #             f.write("\n\n")
-    #     print(f"Text saved to: {text_file}")
-        
-
-    def _process_page(self, page, page_num: int) -> Dict[str, Any]:
+
+    def iter_pages(self, file_path: Path, file_hash: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield page results in page order as soon as each is ready
+
+        Native text and cached OCR are taken inline. With ocr_workers > 1 at
+        most ocr_lookahead pages are in flight in the worker pool, so the
+        number of pages held in memory stays bounded for any document length.
+        Otherwise, with ocr_batch_pages > 1, pages needing OCR are recognised
+        together in groups of that size.
+
+        Finished pages are checkpointed as they are yielded, so a run that
+        is interrupted resumes from the pages it already extracted. Callers
+        that already hashed the file pass file_hash to skip reading it again.
+        """
+        doc = fitz.open(str(file_path))
+        checkpoint_key, checkpointed = self._load_checkpoints(file_path, file_hash)
+        pool = None
+        lookahead = self.config.get("ocr_lookahead", 2 * self.ocr_workers)
+        if self.ocr_workers > 1:
+            pool = OCRWorkerPool.get(self._worker_config(), self.ocr_workers)
+        elif self.ocr_batch_pages > 1:
+            pool = InlineOCRBatch(self, doc, self.ocr_batch_pages)
+            lookahead = self.ocr_batch_pages
+
+        # Entries are (page_num, result, future, cache_key); result is None while OCR runs
+        window = deque()
+        in_flight = 0
+        reused = ocr_needed = 0
+        try:
+            for page_num in tqdm(range(len(doc))):
+                if page_num in checkpointed:
+                    entry = (page_num, self._resume_page(doc, page_num, checkpointed.pop(page_num)), None, None)
+                else:
+                    entry = self._start_page(doc, page_num, file_path, pool)
+                _, result, future, cache_key = entry
+                if cache_key is not None:
+                    ocr_needed += 1
+                    if future is None and result.get("cached"):
+                        reused += 1
+                if future is not None:
+                    in_flight += 1
+                window.append(entry)
+
+                # Hand out finished pages; block on the oldest OCR only when the window is full
+                while window and (window[0][2] is None or in_flight >= lookahead):
+                    entry = window.popleft()
+                    if entry[2] is not None:
+                        in_flight -= 1
+                    yield self._checkpoint(checkpoint_key, self._finish_page(doc, pool, *entry))
+
+            while window:
+                yield self._checkpoint(checkpoint_key, self._finish_page(doc, pool, *window.popleft()))
+
+            if ocr_needed and self.ocr_cache is not None:
+                logger.info(f"OCR cache: {reused}/{ocr_needed} pages reused")
+            if checkpoint_key is not None:
+                self.page_checkpoints.clear(checkpoint_key)
+        finally:
+            for _, _, future, _ in window:
+                if future is not None:
+                    future.cancel()
+            doc.close()
+
+    def _load_checkpoints(
+        self, file_path: Path, file_hash: Optional[str] = None
+    ) -> Tuple[Optional[str], Dict[int, Dict[str, Any]]]:
+        """Return the document's checkpoint key and the pages checkpointed under it"""
+        if self.page_checkpoints is None:
+            return None, {}
+        try:
+            key = document_key(
+                file_hash or hash_file(file_path),
+                ocr_enabled=self.config.get("ocr_enabled"),
+                dpi=self.config.get("dpi", 300),
+                language=self.config.get("language", "en"),
+                deskew=bool(self.config.get("enable_deskew")),
+                triage=(
+                    (self.config.get("ocr_triage_dpi", 72), self.config.get("ocr_clean_scan_dpi", 200))
+                    if self.config.get("ocr_triage_enabled")
+                    else None
+                ),
+                pipeline=OCR_PIPELINE_VERSION,
+            )
+            pages = self.page_checkpoints.load(key)
+        except Exception as e:
+            logger.warning(f"Page checkpoints unavailable for {file_path}: {str(e)}")
+            return None, {}
+        if pages:
+            logger.info(f"Resuming {file_path}: {len(pages)} pages already extracted")
+        return key, pages
+
+    def _resume_page(self, doc, page_num: int, result: Dict[str, Any]) -> Dict[str, Any]:
+        result["resumed"] = True
+        result["dimensions"] = doc[page_num].rect.round()
+        return result
+
+    def _checkpoint(self, key: Optional[str], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a finished page; failed pages are left to be retried"""
+        if key is not None and "error" not in result and not result.get("resumed"):
+            try:
+                self.page_checkpoints.save(key, result["page"], result)
+            except Exception as e:
+                logger.warning(f"Page checkpoint failed for page {result.get('page')}: {str(e)}")
+        return result
+
+    def _start_page(self, doc, page_num: int, file_path: Path, pool):
+        """Resolve a page inline if possible, otherwise run or queue its OCR"""
+        try:
+            page = doc[page_num]
+            result = self._extract_native(page, page_num)
+            if result is not None:
+                return page_num, result, None, None
+
+            cache_key, result = self._lookup_ocr(page, page_num)
+            if result is None and pool is not None:
+                return page_num, None, pool.submit_page(str(file_path), page_num), cache_key
+            if result is None:
+                result = self._perform_ocr(page, page_num)
+                self._remember_ocr(cache_key, result)
+            return page_num, result, None, cache_key
+        except Exception as e:
+            logger.error(f"Page {page_num} failed: {str(e)}")
+            return page_num, self._create_error_page(page_num, str(e)), None, None
+
+    def _finish_page(self, doc, pool, page_num: int, result, future, cache_key) -> Dict[str, Any]:
+        if future is None:
+            return result
+
+        result, error = pool.collect(future)
+        if error is not None:
+            logger.error(f"OCR worker failed for page {page_num}: {str(error)}")
+            return self._create_error_page(page_num, str(error))
+        result["dimensions"] = doc[page_num].rect.round()
+        self._remember_ocr(cache_key, result)
+        return result
+
+    def _lookup_ocr(self, page, page_num: int) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Return the page cache key and the cached OCR result, if any"""
+        if self.ocr_cache is None:
+            return None, None
+
+        try:
+            key = OCRPageCache.make_key(
+                page_fingerprint(page),
+                dpi=self.config.get("dpi", 300),
+                language=self.config.get("language", "en"),
+                deskew=bool(self.config.get("enable_deskew")),
+                triage=(
+                    (self.config.get("ocr_triage_dpi", 72), self.config.get("ocr_clean_scan_dpi", 200))
+                    if self.config.get("ocr_triage_enabled")
+                    else None
+                ),
+                pipeline=OCR_PIPELINE_VERSION,
+            )
+            cached = self.ocr_cache.get(key)
+        except Exception as e:
+            logger.warning(f"OCR cache lookup failed for page {page_num}: {str(e)}")
+            return None, None
+
+        if cached is None:
+            return key, None
+        for block in cached["text_blocks"]:
+            block["page"] = page_num
+        return key, {
+            **cached,
+            "source": "ocr",
+            "cached": True,
+            "page": page_num,
+            "dimensions": page.rect.round(),
+        }
+
+    def _remember_ocr(self, key: Optional[str], result: Dict[str, Any]) -> None:
+        """Store a successful OCR result in the page cache"""
+        if key is None or self.ocr_cache is None or "error" in result:
+            return
+        try:
+            entry = {
+                "text": result["text"],
+                "text_blocks": result.get("text_blocks", []),
+                "confidence": float(result.get("confidence", 0)),
+            }
+            if "triage" in result:
+                entry["triage"] = result["triage"]
+            self.ocr_cache.put(key, entry)
+        except Exception as e:
+            logger.warning(f"OCR cache store failed: {str(e)}")
+
+    def _extract_native(self, page, page_num: int) -> Optional[Dict[str, Any]]:
+        """Return page content without OCR, or None if the page needs OCR"""
         text = page.get_text().strip()
         if text:
             return self._create_page_content(text, "native", page_num, page)
@@ -100,71 +309,279 @@ class PDFProcessor(BaseProcessor):
         if not self.config.get("ocr_enabled"):
             return self._create_page_content("", "none", page_num, page)
 
-        return self._perform_ocr(page, page_num)
+        return None
+
+    def warm_ocr_pool(self) -> None:
+        """Start the OCR worker pool and load its models ahead of the first document"""
+        if self.config.get("ocr_enabled") and self.ocr_workers > 1:
+            OCRWorkerPool.get(self._worker_config(), self.ocr_workers)
+
+    def _worker_config(self) -> Dict[str, Any]:
+        """Configuration handed to OCR worker processes"""
+        return {
+            key: value
+            for key, value in self.config.items()
+            if key not in ("ocr_workers", "ocr_lookahead", "ocr_batch_pages", "cpu_threads")
+            and not key.startswith(("ocr_cache", "page_checkpoints"))
+        }
 
     def _perform_ocr(self, page, page_num: int) -> Dict[str, Any]:
         try:
-            pix = page.get_pixmap(dpi=self.config.get("dpi", 300))
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            img_np = np.array(img)
-            processed_img = self._preprocess_image(img_np)
-
-            results = self.ocr.ocr(processed_img)
-            del pix, img, img_np, processed_img
-
-            if not results or not results[0]:
-                return self._create_page_content("", "ocr", page_num, page)
-
-            text_blocks = []
-            full_text = []
-            for line in results[0]:
-                if line[1][0].strip():
-                    text = '\n' + line[1][0].strip()
-                    
-                    
-                    text_blocks.append(
-                        {
-                            "text": line[1][0],
-                            "confidence": float(line[1][1]),
-                            "bbox": line[0],
-                            "page": page_num,
-                        }
-                    )
-                    full_text.append(text)
-
-            return {
-                "text": " ".join(full_text),
-                "text_blocks": text_blocks,
-                "source": "ocr",
-                "page": page_num,
-                "dimensions": page.rect.round(),
-                "confidence": (
-                    np.mean([b["confidence"] for b in text_blocks])
-                    if text_blocks
-                    else 0
-                ),
-            }
+            start = time.perf_counter()
+            triage, pix, image, dpi, steps = self._render_for_ocr(page, page_num)
+            lines = None
+            if pix is not None:
+                # The image may be a view into pix, so pix outlives the OCR call
+                results = self.ocr.ocr(image)
+                lines = results[0] if results else None
+                del image, pix
+            return self._ocr_result(lines, page, page_num, triage, dpi, steps, time.perf_counter() - start)
         except Exception as e:
             logger.error(f"OCR failed for page {page_num}: {str(e)}")
             return self._create_error_page(page_num, str(e))
-        finally:
-            gc.collect()
 
-    def _preprocess_image(self, image: np.ndarray) -> np.ndarray:
+    def _perform_ocr_batch(self, pages: List[Tuple[Any, int]]) -> List[Dict[str, Any]]:
+        """
+        OCR several pages with one shared recognition pass
+
+        Lines are detected page by page while each page image is live, then
+        the line crops of all pages are recognised together in batches of
+        ocr_rec_batch_size.
+        """
+        recognizer = BatchRecognizer(self.ocr)
+        prepared = []
+        errors = {}
+        for page, page_num in pages:
+            start = time.perf_counter()
+            try:
+                triage, pix, image, dpi, steps = self._render_for_ocr(page, page_num)
+                detection = ([], []) if pix is None else recognizer.detect(image)
+                del image, pix
+                prepared.append((page, page_num, triage, dpi, steps, detection, time.perf_counter() - start))
+            except Exception as e:
+                logger.error(f"OCR failed for page {page_num}: {str(e)}")
+                errors[page_num] = str(e)
+                prepared.append((page, page_num, None, None, None, None, 0.0))
+
+        detections = [entry[5] for entry in prepared if entry[5] is not None]
+        try:
+            start = time.perf_counter()
+            recognized = iter(recognizer.recognize(detections))
+            recognize_seconds = time.perf_counter() - start
+        except Exception as e:
+            logger.error(f"Batch recognition failed for pages {[num for _, num in pages]}: {str(e)}")
+            return [self._create_error_page(page_num, str(e)) for _, page_num in pages]
+
+        # Recognition time is shared out by each page's number of lines
+        total_lines = sum(len(boxes) for boxes, _ in detections) or 1
+        results = []
+        for page, page_num, triage, dpi, steps, detection, seconds in prepared:
+            if detection is None:
+                results.append(self._create_error_page(page_num, errors[page_num]))
+                continue
+            seconds += recognize_seconds * len(detection[0]) / total_lines
+            results.append(
+                self._ocr_result(next(recognized), page, page_num, triage, dpi, steps, seconds)
+            )
+        return results
+
+    def _render_for_ocr(self, page, page_num: int):
+        """
+        Triage, render and preprocess a page for OCR
+
+        Returns:
+            Tuple of (triage, pixmap, image, dpi, steps); pixmap and image
+            are None for blank pages, and image may be a view into pixmap
+        """
+        triage = None
+        if self.config.get("ocr_triage_enabled"):
+            try:
+                triage = self._triage_page(page)
+            except Exception as e:
+                logger.warning(f"Triage failed for page {page_num}, using full settings: {str(e)}")
+        if triage is not None and triage["class"] == "blank":
+            return triage, None, None, None, ()
+
+        dpi = triage["dpi"] if triage else self.config.get("dpi", 300)
+        steps = tuple(triage["steps"]) if triage else self.FULL_PREPROCESSING
+
+        start = time.perf_counter()
+        # Render straight to 8-bit gray: a third of the RGB bytes and no colour conversion
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+        rendered = time.perf_counter()
+        image = self._preprocess_image(self._pixmap_view(pix), steps)
+        ocr_image_buffers.record_page(
+            pixmap_bytes=pix.stride * pix.height,
+            render_seconds=rendered - start,
+            preprocess_seconds=time.perf_counter() - rendered,
+        )
+        return triage, pix, image, dpi, steps
+
+    def _ocr_result(
+        self, lines, page, page_num: int, triage, dpi, steps, seconds: float
+    ) -> Dict[str, Any]:
+        """Page result from recognised lines, with triage and cost bookkeeping"""
+        if not lines:
+            result = self._create_page_content("", "ocr", page_num, page)
+        else:
+            result = self._parse_ocr_lines(lines, page_num, page)
+
+        if dpi == self.config.get("dpi", 300) and steps == self.FULL_PREPROCESSING:
+            self._observe_full_cost(page, seconds - (triage["triage_seconds"] if triage else 0.0))
+        if triage is not None:
+            result["triage"] = self._triage_report(triage, page, seconds)
+        return result
+
+    def _parse_ocr_lines(self, lines, page_num: int, page) -> Dict[str, Any]:
+        text_blocks = []
+        full_text = []
+        for line in lines:
+            if line[1][0].strip():
+                text = '\n' + line[1][0].strip()
+                
+                
+                text_blocks.append(
+                    {
+                        "text": line[1][0],
+                        "confidence": float(line[1][1]),
+                        "bbox": line[0],
+                        "page": page_num,
+                    }
+                )
+                full_text.append(text)
+
+        return {
+            "text": " ".join(full_text),
+            "text_blocks": text_blocks,
+            "source": "ocr",
+            "page": page_num,
+            "dimensions": page.rect.round(),
+            "confidence": (
+                np.mean([b["confidence"] for b in text_blocks])
+                if text_blocks
+                else 0
+            ),
+        }
+
+    def _triage_page(self, page) -> Dict[str, Any]:
+        """
+        Classify a text-less page from a low-res gray render
+
+        Returns the class (blank, photo, noisy_scan or clean_scan), the DPI
+        and preprocessing steps to OCR it with, and the measurements the
+        decision was based on.
+        """
+        start = time.perf_counter()
+        pix = page.get_pixmap(
+            dpi=self.config.get("ocr_triage_dpi", 72), colorspace=fitz.csGRAY, alpha=False
+        )
+        image = np.ascontiguousarray(self._pixmap_view(pix))
+        del pix
+
+        size = image.size or 1
+        ink_ratio = np.count_nonzero(image < 128) / size
+        midtone_ratio = np.count_nonzero((image > 48) & (image < 208)) / size
+        # Speckle shows up as deviation from the local median on the paper background;
+        # text strokes are excluded because their median is dark
+        median = cv2.medianBlur(image, 3)
+        background = median > 200
+        noise = float(cv2.absdiff(image, median)[background].mean()) if background.any() else 0.0
+
+        if ink_ratio < self.TRIAGE_BLANK_INK_RATIO:
+            page_class = "blank"
+        elif midtone_ratio > self.TRIAGE_PHOTO_MIDTONE_RATIO:
+            page_class = "photo"
+        elif noise > self.TRIAGE_NOISE_LEVEL:
+            page_class = "noisy_scan"
+        else:
+            page_class = "clean_scan"
+
+        dpi = self.config.get("dpi", 300)
+        if page_class == "blank":
+            dpi = None
+        elif page_class == "clean_scan":
+            dpi = min(dpi, self.config.get("ocr_clean_scan_dpi", 200))
+
+        return {
+            "class": page_class,
+            "dpi": dpi,
+            "steps": list(self.TRIAGE_STEPS[page_class]),
+            "ink_ratio": round(float(ink_ratio), 4),
+            "midtone_ratio": round(float(midtone_ratio), 4),
+            "noise": round(noise, 2),
+            "triage_seconds": round(time.perf_counter() - start, 4),
+        }
+
+    def _triage_report(self, triage: Dict[str, Any], page, seconds: float) -> Dict[str, Any]:
+        """
+        Triage decision with the page's OCR time and the estimated time saved
+
+        The saving is measured against the running cost per megapixel of
+        pages OCRed at full DPI with full preprocessing, and is None until
+        this process has seen such a page.
+        """
+        saved = None
+        if self._full_seconds_per_mpx is not None:
+            full_seconds = self._full_seconds_per_mpx * self._page_megapixels(
+                page, self.config.get("dpi", 300)
+            )
+            saved = round(full_seconds - seconds, 4)
+        return {**triage, "seconds": round(seconds, 4), "estimated_seconds_saved": saved}
+
+    def _observe_full_cost(self, page, seconds: float) -> None:
+        megapixels = self._page_megapixels(page, self.config.get("dpi", 300))
+        if megapixels <= 0:
+            return
+        cost = seconds / megapixels
+        if self._full_seconds_per_mpx is None:
+            self._full_seconds_per_mpx = cost
+        else:
+            self._full_seconds_per_mpx = 0.8 * self._full_seconds_per_mpx + 0.2 * cost
+
+    @staticmethod
+    def _page_megapixels(page, dpi: int) -> float:
+        scale = dpi / 72
+        return page.rect.width * scale * page.rect.height * scale / 1e6
+
+    @staticmethod
+    def _pixmap_view(pix) -> np.ndarray:
+        """Wrap pixmap samples as a uint8 array without copying; only valid while pix lives"""
+        samples = pix.samples_mv if hasattr(pix, "samples_mv") else pix.samples
+        rows = np.frombuffer(samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+        view = rows[:, : pix.width * pix.n]
+        return view if pix.n == 1 else view.reshape(pix.height, pix.width, pix.n)
+
+    def _preprocess_image(
+        self, image: np.ndarray, steps: Tuple[str, ...] = FULL_PREPROCESSING
+    ) -> np.ndarray:
+        """
+        Binarise and/or denoise a page image for OCR, as listed in steps
+
+        Results are written into this thread's reusable buffers, so the
+        returned array is overwritten by the next page preprocessed here.
+        """
         try:
             if image is None:
                 raise ValueError("Invalid image")
 
+            shape = image.shape[:2]
             if len(image.shape) == 2:
                 processed = image
             else:
-                processed = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-
-            processed = cv2.adaptiveThreshold(
-                processed, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-            )
-
-            processed = cv2.fastNlMeansDenoising(processed)
+                processed = cv2.cvtColor(
+                    image, cv2.COLOR_RGB2GRAY, dst=ocr_image_buffers.get("gray", shape)
+                )
+
+            if "threshold" in steps:
+                processed = cv2.adaptiveThreshold(
+                    processed, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2,
+                    dst=ocr_image_buffers.get("binary", shape),
+                )
+
+            if "denoise" in steps:
+                processed = cv2.fastNlMeansDenoising(
+                    processed, dst=ocr_image_buffers.get("denoised", shape)
+                )
 
             if self.config.get("enable_deskew"):
                 processed = self._deskew(processed)
@@ -1,11 +1,7 @@
 from pathlib import Path
 from typing import Dict, Any
 import json
-import xmltodict
-import pandas as pd
-import markdown
 from .base_processor import BaseProcessor
-from docx import Document
 
 class StructuredProcessor(BaseProcessor):
     SUPPORTED_FORMATS = {
@@ -39,6 +35,8 @@ class StructuredProcessor(BaseProcessor):
 
     def _process_docx(self, file_path: Path) -> Dict[str, Any]:
         """Process DOCX files."""
+        from docx import Document
+
         doc = Document(file_path)
         paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
         word_count = sum(len(para.split()) for para in paragraphs)
@@ -55,6 +53,8 @@ class StructuredProcessor(BaseProcessor):
 
     def _process_markdown(self, file_path: Path) -> Dict[str, Any]:
         """Process Markdown files."""
+        import markdown
+
         with open(file_path, 'r', encoding='utf-8') as f:
             md_content = f.read()
             html_content = markdown.markdown(md_content, extensions=['extra', 'tables', 'fenced_code'])
@@ -83,6 +83,8 @@ class StructuredProcessor(BaseProcessor):
             }
     
     def _process_xml(self, file_path: Path) -> Dict[str, Any]:
+        import xmltodict
+
         with open(file_path) as f:
             data = xmltodict.parse(f.read())
             return {
@@ -94,6 +96,8 @@ class StructuredProcessor(BaseProcessor):
             }
     
     def _process_excel(self, file_path: Path) -> Dict[str, Any]:
+        import pandas as pd
+
         df = pd.read_excel(file_path)
         return {
             'content': df.to_dict(),
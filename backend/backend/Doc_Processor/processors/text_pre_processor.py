@@ -1,11 +1,14 @@
-from ollama import chat
 import json
 import re
 from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
 
 
 def process_text_chunks(text, chunk_size=3000):
     """Process text in chunks and get JSON responses from Ollama API"""
+    from ollama import chat
+
     all_responses = []
 
     # Process text in chunks
@@ -118,57 +121,240 @@ def reorganize_sections(json_data):
     return organized
 
 
-def split_text_into_chunks(text: str, chunk_size: int = 5000) -> list:
+DEFAULT_ENCODING_NAME = "cl100k_base"
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+
+@lru_cache(maxsize=4)
+def _get_encoding(encoding_name: str):
+    import tiktoken
+
+    return tiktoken.get_encoding(encoding_name)
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING_NAME) -> int:
+    """Number of tokens in text under a tiktoken encoding"""
+    return len(_get_encoding(encoding_name).encode_ordinary(text))
+
+
+def _iter_spans(text: str, pattern: re.Pattern, start: int, end: int):
+    """Yield (start, end) spans of text[start:end] between pattern matches, whitespace-trimmed"""
+    pos = start
+    for match in pattern.finditer(text, start, end):
+        yield from _trim_span(text, pos, match.start())
+        pos = match.end()
+    yield from _trim_span(text, pos, end)
+
+
+def _trim_span(text: str, start: int, end: int):
+    segment = text[start:end]
+    stripped = segment.strip()
+    if stripped:
+        offset = start + (len(segment) - len(segment.lstrip()))
+        yield offset, offset + len(stripped)
+
+
+def _split_units(text: str, chunk_size: int, encoding) -> List[Tuple[int, int, int, bool, bool]]:
+    """
+    Split text into sentence units no longer than chunk_size tokens
+
+    Returns:
+        List of (char_start, char_end, token_count, starts_paragraph,
+        starts_sentence); starts_sentence is False for the second and later
+        pieces of a sentence cut to fit chunk_size
+    """
+    spans = []
+    for para_start, para_end in _iter_spans(text, _PARAGRAPH_BREAK, 0, len(text)):
+        for i, (start, end) in enumerate(_iter_spans(text, _SENTENCE_BREAK, para_start, para_end)):
+            spans.append((start, end, i == 0))
+
+    # One batched encoder call for the whole document
+    token_lists = encoding.encode_ordinary_batch([text[start:end] for start, end, _ in spans])
+
+    units = []
+    for (start, end, starts_paragraph), tokens in zip(spans, token_lists):
+        if len(tokens) <= chunk_size:
+            units.append((start, end, len(tokens), starts_paragraph, True))
+            continue
+
+        # A single sentence over budget: cut it on token boundaries
+        _, offsets = encoding.decode_with_offsets(tokens)
+        for i in range(0, len(tokens), chunk_size):
+            piece_start = start + offsets[i]
+            piece_end = start + offsets[i + chunk_size] if i + chunk_size < len(tokens) else end
+            for trimmed_start, trimmed_end in _trim_span(text, piece_start, piece_end):
+                units.append(
+                    (trimmed_start, trimmed_end, len(tokens[i:i + chunk_size]), starts_paragraph and i == 0, i == 0)
+                )
+    return units
+
+
+def split_text_into_token_chunks(
+    text: str,
+    chunk_size: int = 200,
+    chunk_overlap: int = 0,
+    encoding_name: str = DEFAULT_ENCODING_NAME,
+) -> List[Dict[str, Any]]:
+    """
+    Split text into token-budgeted chunks that respect paragraph and sentence boundaries.
+
+    Sentences are packed greedily up to chunk_size tokens, preferring to
+    close a chunk on a paragraph boundary. Consecutive chunks share whole
+    trailing sentences worth up to chunk_overlap tokens.
+
+    Args:
+        text: The input text to be split
+        chunk_size: Maximum tokens per chunk
+        chunk_overlap: Maximum tokens repeated from the end of the previous chunk
+        encoding_name: tiktoken encoding used to count tokens
+
+    Returns:
+        List of dicts with text, char_start, char_end and token_count
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if not 0 <= chunk_overlap < chunk_size:
+        raise ValueError("chunk_overlap must be between 0 and chunk_size")
+
+    return [chunk for chunk, _ in _pack_units(text, chunk_size, chunk_overlap, encoding_name)]
+
+
+def _pack_units(
+    text: str, chunk_size: int, chunk_overlap: int, encoding_name: str
+) -> List[Tuple[Dict[str, Any], bool]]:
+    """Chunks of split_text_into_token_chunks, each with whether it starts on a whole sentence"""
+    units = _split_units(text, chunk_size, _get_encoding(encoding_name))
+    chunks = []
+    i = 0
+    while i < len(units):
+        # Extend the window while the next sentence fits (1 token per gap for the separator)
+        j = i + 1
+        total = units[i][2]
+        last_paragraph_cut = None
+        while j < len(units) and total + 1 + units[j][2] <= chunk_size:
+            if units[j][3] and total >= chunk_size // 2:
+                last_paragraph_cut = (j, total)
+            total += 1 + units[j][2]
+            j += 1
+
+        if j < len(units) and last_paragraph_cut is not None:
+            j, total = last_paragraph_cut
+
+        chunks.append(({
+            "text": text[units[i][0]:units[j - 1][1]],
+            "char_start": units[i][0],
+            "char_end": units[j - 1][1],
+            "token_count": total,
+        }, units[i][4]))
+        if j >= len(units):
+            break
+
+        # Step back over whole sentences for the overlap, always moving forward
+        k, overlap = j, 0
+        while k - 1 > i and overlap + units[k - 1][2] <= chunk_overlap:
+            k -= 1
+            overlap += units[k][2]
+        i = k
+
+    return chunks
+
+
+class TokenChunkStream:
+    """
+    Incremental split_text_into_token_chunks for text that arrives in pieces.
+
+    A chunk is only emitted once text after it has arrived, so emitted
+    chunks are final. Only the still-open tail is kept and re-chunked, and
+    chunk offsets are relative to the start of the whole stream.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 200,
+        chunk_overlap: int = 0,
+        encoding_name: str = DEFAULT_ENCODING_NAME,
+    ):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be between 0 and chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.encoding_name = encoding_name
+        self._buffer = ""
+        self._offset = 0
+        # Wait for a few chunks' worth of text (~4 chars per token) before re-chunking
+        self._min_pending_chars = 16 * chunk_size
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Append text and return the chunks that can no longer change"""
+        self._buffer += text
+        if len(self._buffer) < self._min_pending_chars:
+            return []
+        return self._drain(final=False)
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Return the remaining chunks at the end of the stream"""
+        return self._drain(final=True)
+
+    def _drain(self, final: bool) -> List[Dict[str, Any]]:
+        packed = _pack_units(self._buffer, self.chunk_size, self.chunk_overlap, self.encoding_name)
+        if final:
+            chunks = [chunk for chunk, _ in packed]
+            consumed = len(self._buffer)
+        else:
+            # The last chunk may still grow; restart from it next time. A chunk
+            # starting inside a cut sentence would be cut differently from a
+            # new origin, so restart from the last one that starts a sentence.
+            restart = next(
+                (index for index in range(len(packed) - 1, 0, -1) if packed[index][1]), None
+            )
+            if restart is None:
+                return []
+            chunks = [chunk for chunk, _ in packed[:restart]]
+            consumed = packed[restart][0]["char_start"]
+
+        offset = self._offset
+        self._buffer = self._buffer[consumed:]
+        self._offset += consumed
+        for chunk in chunks:
+            chunk["char_start"] += offset
+            chunk["char_end"] += offset
+        return chunks
+
+
+def split_text_into_chunks(
+    text: str,
+    chunk_size: int = 200,
+    chunk_overlap: int = 0,
+    encoding_name: str = DEFAULT_ENCODING_NAME,
+) -> list:
     """
-    Split text into chunks while respecting paragraph boundaries.
+    Split text into token-budgeted chunks while respecting paragraph boundaries.
     
     Args:
         text (str): The input text to be split
-        chunk_size (int): Maximum size of each chunk in characters
+        chunk_size (int): Maximum size of each chunk in tokens
+        chunk_overlap (int): Tokens shared between consecutive chunks
+        encoding_name (str): tiktoken encoding used to count tokens
         
     Returns:
         list: List of text chunks
     """
-    chunks = []
-    current_chunk = ""
-    
-    # Split text into paragraphs
-    paragraphs = text.split('\n\n')
-    
-    for paragraph in paragraphs:
-        # If adding this paragraph would exceed chunk size and we have existing content
-        if len(current_chunk) + len(paragraph) > chunk_size:
-            if current_chunk:  # Add current chunk if not empty
-                chunks.append(current_chunk.strip())
-            # If single paragraph is larger than chunk_size, split at last sentence
-            if len(paragraph) > chunk_size:
-                sentences = paragraph.split('. ')
-                current_chunk = ""
-                temp_chunk = ""
-                
-                for sentence in sentences:
-                    if len(temp_chunk) + len(sentence) > chunk_size:
-                        if temp_chunk:
-                            chunks.append(temp_chunk.strip())
-                        temp_chunk = sentence + '. '
-                    else:
-                        temp_chunk += sentence + '. '
-                
-                current_chunk = temp_chunk
-            else:
-                current_chunk = paragraph
-        else:
-            # Add paragraph with a newline if current_chunk is not empty
-            separator = '\n\n' if current_chunk else ''
-            current_chunk += separator + paragraph
-    
-    # Add the last chunk if not empty
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+    return [
+        chunk["text"]
+        for chunk in split_text_into_token_chunks(text, chunk_size, chunk_overlap, encoding_name)
+    ]
 
-def process_agreement(text, use_llm: bool = False, chunk_size: int = 5000):
+def process_agreement(
+    text,
+    use_llm: bool = False,
+    chunk_size: int = 200,
+    chunk_overlap: int = 0,
+    encoding_name: str = DEFAULT_ENCODING_NAME,
+):
     """Main function to process agreement text and return final JSON"""
     
     if use_llm:
@@ -185,4 +371,4 @@ def process_agreement(text, use_llm: bool = False, chunk_size: int = 5000):
         return final_json
     else:
         # Split the text into chunks using the new function
-        return split_text_into_chunks(text, chunk_size)
\ No newline at end of file
+        return split_text_into_chunks(text, chunk_size, chunk_overlap, encoding_name)
\ No newline at end of file
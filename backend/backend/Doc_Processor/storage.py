@@ -0,0 +1,67 @@
+# storage.py
+from typing import Dict, Any, Tuple
+from pathlib import Path
+import threading
+import hashlib
+import sqlite3
+
+
+def hash_file(file_path: Path, block_size: int = 1 << 20) -> str:
+    """SHA-256 of the raw file bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def to_json(value: Any) -> Any:
+    """json.dumps default for stored page results"""
+    # PaddleOCR boxes and scores may come back as NumPy values
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class SQLiteStore:
+    """
+    Base for the single-file SQLite stores (caches, checkpoints, indexes)
+
+    Each operation opens its own connection, and a lock serialises access
+    from the threads of one process. Subclasses list their CREATE
+    statements in SCHEMA.
+    """
+
+    SCHEMA: Tuple[str, ...] = ()
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def _init_schema(self) -> None:
+        with self._lock, self._connect() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _fetchone(self, sql: str, params: Tuple = ()) -> Any:
+        with self._lock, self._connect() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    @classmethod
+    def shared(cls, db_path: Path, *args: Any) -> "SQLiteStore":
+        """Process-wide instance of this store for a database file"""
+        key = (cls, str(Path(db_path).resolve()))
+        with _shared_lock:
+            store = _shared.get(key)
+            if store is None:
+                store = _shared[key] = cls(db_path, *args)
+            return store
+
+
+_shared: Dict[Tuple[type, str], SQLiteStore] = {}
+_shared_lock = threading.Lock()
@@ -2,9 +2,12 @@
 import sys
 import json
 import argparse
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List
 from contract_analyzer.database import VectorDB
-from contract_analyzer.agents.agent_manager import AgentManager
+from contract_analyzer.parallel import ParallelRunner
+from contract_analyzer.response_cache import bypass_response_cache
+from contract_analyzer.streaming import emit_event, run_agent
+from contract_analyzer.agents.agent_manager import AgentManager, get_agent_manager
 from contract_analyzer.config import Config
 from contract_analyzer.agents.template.contract_analyst import (
     ContractAnalystTemplate,
@@ -30,83 +33,99 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-vector_db = VectorDB()
+
+def run_agent_prompts(
+    agent_manager: AgentManager,
+    template_name: str,
+    prompts: Dict[str, Callable[[], str]],
+    custom_instructions: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Run independent prompts concurrently, one pooled agent per prompt
+
+    phi agents keep per-run state, so concurrent calls must not share one.
+    Each response is emitted as a section event as soon as it completes.
+
+    Args:
+        agent_manager: Agent manager instance
+        template_name: Agent template to use for every prompt
+        prompts: Mapping of result key to a callable building the prompt
+        custom_instructions: Optional additional agent instructions
+
+    Returns:
+        Agent responses keyed like prompts, None where a call failed
+    """
+    model_type = Config._current_model_type
+    total = len(prompts)
+    completed = 0
+
+    def make_task(key: str, build_prompt: Callable[[], str]) -> Callable[[], Any]:
+        def task():
+            with agent_manager.acquire_agent(
+                template_name,
+                custom_instructions=custom_instructions,
+                model_type=model_type,
+            ) as agent:
+                return run_agent(agent, build_prompt(), key)
+        return task
+
+    def report(key: str, response: Any) -> None:
+        nonlocal completed
+        completed += 1
+        emit_event(
+            "section",
+            section=key,
+            content=response.content if response else "",
+            completed=completed,
+            total=total,
+        )
+
+    return ParallelRunner.run_all(
+        {key: make_task(key, build_prompt) for key, build_prompt in prompts.items()},
+        model_type=model_type,
+        on_result=report,
+    )
 
 
 def perform_contract_review(
-    content: str, agent_manager: AgentManager, collection_name: str
+    content: str, agent_manager: AgentManager, collection_name: str, vector_db: VectorDB
 ) -> Optional[Dict[str, Any]]:
     try:
-        agent = agent_manager.create_agent(
-            "contract_analyst", model_type=Config._current_model_type
-        )
         initial_content = ''
-        analysis_prompt = ContractAnalystTemplate.create_analysis_prompt(
-            initial_content, AnalysisScope.COMPREHENSIVE
-        )
-        
-        # logger.info(f"Contract Review Prompt: {analysis_prompt}")
 
         if vector_db.set_active_collection(collection_name):
             logger.info(f"Collection set to: {collection_name}")
         else:
             raise ValueError(f"Failed to set collection: {collection_name[:200]}")
-        
-        content = vector_db.get_context(analysis_prompt, num_results=5)
 
-        analysis_prompt = ContractAnalystTemplate.create_analysis_prompt(
-            content, AnalysisScope.COMPREHENSIVE
-        )
-        
-        result = agent.run(analysis_prompt)
-        
-        print("Completed Comprehensive Analysis")
-        
-        # logger.info(f"Contract Review Result: {result.content}")
-
-        extarct_key_prompt = ContractAnalystTemplate.extract_key_terms(initial_content)
-
-        content = vector_db.get_context(extarct_key_prompt, num_results=5)
-
-        extarct_key_prompt = ContractAnalystTemplate.extract_key_terms(content)
-
-        key_terms = agent.run(extarct_key_prompt)
-        
-        print("Completed Key Term Extraction")
-
-        analyze_obg_prompt = ContractAnalystTemplate.analyze_obligations(initial_content)
-
-        content = vector_db.get_context(analyze_obg_prompt, num_results=5)
-
-        analyze_obg_prompt = ContractAnalystTemplate.analyze_obligations(content)
-
-        obligations = agent.run(analyze_obg_prompt)
+        prompt_builders = {
+            "Contract Review": lambda context: ContractAnalystTemplate.create_analysis_prompt(
+                context, AnalysisScope.COMPREHENSIVE
+            ),
+            "Key Terms": ContractAnalystTemplate.extract_key_terms,
+            "Obligations": ContractAnalystTemplate.analyze_obligations,
+            "Parties": ContractAnalystTemplate.create_party_extraction_prompt,
+        }
 
-        print("Completed Obligations Analysis")
-        
-        party_extract_prompt = ContractAnalystTemplate.create_party_extraction_prompt(
-            initial_content
+        # The empty-context prompts double as retrieval queries; fetch all contexts in one batch
+        emit_event("progress", stage="retrieval")
+        contexts = vector_db.get_contexts(
+            [build(initial_content) for build in prompt_builders.values()],
+            num_results=5,
+            expand_neighbors=Config.DATABASE_CONFIG.neighbor_window,
+            token_budget=Config.DATABASE_CONFIG.context_token_budget,
         )
 
-        content = vector_db.get_context(party_extract_prompt, num_results=5)
-
-        party_extract_prompt = ContractAnalystTemplate.create_party_extraction_prompt(
-            content
-        )
+        responses = run_agent_prompts(agent_manager, "contract_analyst", {
+            key: (lambda build=build, context=context: build(context))
+            for (key, build), context in zip(prompt_builders.items(), contexts)
+        })
 
-        parties = agent.run(party_extract_prompt)
-        
-        print("Completed Parties Extraction")
-        
-        # logger.info(f"Key Terms: {key_terms.content}")
-        
-        # logging.INFO(f"Contract Review completed successfully")
+        print("Completed Contract Review")
 
         return {
-            "Contract Review": result.content,
-            "Key Terms": key_terms.content,
-            "Obligations": obligations.content,
-            "Parties": parties.content,
+            key: response.content if response else ""
+            for key, response in responses.items()
         }
     except Exception as e:
         logger.error(f"Contract review failed: {str(e)}")
@@ -143,44 +162,38 @@ def perform_contract_review(
 def perform_legal_research(
     content: str, agent_manager: AgentManager, collection_name: str
 ) -> Optional[Dict[str, Any]]:
-    agent = agent_manager.create_agent(
-        "legal_researcher", model_type=Config._current_model_type
-    )
-
     prompt = LegalResearcherTemplate.create_research_prompt(
         context=content,
         scope=ResearchScope.COMPREHENSIVE,
         domain=ResearchDomain.CONTRACT_LAW,
     )
 
-    result = agent.run(prompt)
+    result = run_agent_prompts(agent_manager, "legal_researcher", {
+        "Legal Research": lambda: prompt,
+    })["Legal Research"]
     return {"Legal Research": result.content} if result else None
 
 
 def perform_risk_assessment(
-    content: str, agent_manager: AgentManager
+    content: str, agent_manager: AgentManager, collection_name: Optional[str] = None
 ) -> Optional[Dict[str, Any]]:
 
-    agent = agent_manager.create_agent(
-        "risk_assessor", model_type=Config._current_model_type
-    )
-
-    prompt = RiskAssessmentTemplate.create_assessment_prompt(
-        context=content, risk_level=RiskLevel.HIGH
-    )
-
     # Get detailed risk analysis by categories
-    results = {}
-    for category in [
+    categories = [
         RiskCategory.LEGAL,
         RiskCategory.FINANCIAL,
         RiskCategory.OPERATIONAL,
         RiskCategory.COMPLIANCE,
-    ]:
-        category_prompt = RiskAssessmentTemplate.get_risk_prompt(content, category)
-        category_result = agent.run(category_prompt)
+    ]
+    responses = run_agent_prompts(agent_manager, "risk_assessor", {
+        category.value: (lambda category=category: RiskAssessmentTemplate.get_risk_prompt(content, category))
+        for category in categories
+    })
+
+    results = {}
+    for key, category_result in responses.items():
         if category_result:
-            results[category.value] = category_result.content
+            results[key] = category_result.content
             
     
 
@@ -207,38 +220,19 @@ def perform_risk_assessment(
 def perform_contract_summary(
     content: str, agent_manager: AgentManager, collection_name: str
 ) -> Optional[Dict[str, Any]]:
-    agent = agent_manager.create_agent(
-        "contract_summarizer", model_type=Config._current_model_type
-    )
-
-    # Get initial context
-    prompt = ContractSummaryTemplate.create_summary_prompt(context=content)
-    result = agent.run(prompt)
-
-    # Extract core details
-    prompt_parties = ContractSummaryTemplate.extract_details_prompt(content, "parties")
-    parties_result = agent.run(prompt_parties)
-
-    prompt_obligations = ContractSummaryTemplate.extract_details_prompt(
-        content, "obligations"
-    )
-    obligations_result = agent.run(prompt_obligations)
-
-    prompt_dates = ContractSummaryTemplate.extract_details_prompt(content, "deadlines")
-    dates_result = agent.run(prompt_dates)
-
-    prompt_penalties = ContractSummaryTemplate.extract_details_prompt(
-        content, "penalties"
-    )
-    penalties_result = agent.run(prompt_penalties)
+    # Summary and core details are independent prompts over the same content
+    responses = run_agent_prompts(agent_manager, "contract_summarizer", {
+        "summary": lambda: ContractSummaryTemplate.create_summary_prompt(context=content),
+        "overview": lambda: ContractSummaryTemplate.extract_details_prompt(content, "parties"),
+        "obligations": lambda: ContractSummaryTemplate.extract_details_prompt(content, "obligations"),
+        "deadlines": lambda: ContractSummaryTemplate.extract_details_prompt(content, "deadlines"),
+        "penalties": lambda: ContractSummaryTemplate.extract_details_prompt(content, "penalties"),
+    })
 
     # Format extracted data
     extracted_data = {
-        "summary": result.content if result else "",
-        "overview": parties_result.content if parties_result else "",
-        "obligations": obligations_result.content if obligations_result else "",
-        "deadlines": dates_result.content if dates_result else "",
-        "penalties": penalties_result.content if penalties_result else "",
+        key: response.content if response else ""
+        for key, response in responses.items()
     }
 
     summary = ContractSummaryTemplate.format_summary(extracted_data)
@@ -246,7 +240,7 @@ def perform_contract_summary(
 
 
 def perform_custom_analysis(
-    content: str, custom_query: str, agent_manager: AgentManager, collection_name: str
+    content: str, custom_query: str, agent_manager: AgentManager, collection_name: str, vector_db: VectorDB
 ) -> Optional[Dict[str, Any]]:
     
     if vector_db.set_active_collection(collection_name):
@@ -254,13 +248,12 @@ def perform_custom_analysis(
     else:
         raise ValueError(f"Failed to set collection: {collection_name[:200]}")
     
-    content = vector_db.get_context(custom_query)
-
-    agent = agent_manager.create_agent(
-        "custom_analyst",
-        custom_instructions=["Perform specialized analysis based on query"],
-        model_type=Config._current_model_type,
-    )
+    emit_event("progress", stage="retrieval")
+    content = vector_db.get_contexts(
+        [custom_query],
+        expand_neighbors=Config.DATABASE_CONFIG.neighbor_window,
+        token_budget=Config.DATABASE_CONFIG.context_token_budget,
+    )[0]
 
     prompt = f"""Analyze the following document based on the custom query:
 
@@ -271,10 +264,15 @@ Query: {custom_query}
 
 """
 
-    result = agent.run(prompt)
+    result = run_agent_prompts(
+        agent_manager,
+        "custom_analyst",
+        {"Custom Analysis": lambda: prompt},
+        custom_instructions=["Perform specialized analysis based on query"],
+    )["Custom Analysis"]
     return {"Custom Analysis": result.content} if result else None
 
-def perform_information_extraction(content: str, agent_manager: AgentManager, collection_name: str) -> Optional[Dict[str, Any]]:
+def perform_information_extraction(content: str, agent_manager: AgentManager, collection_name: str, vector_db: VectorDB) -> Optional[Dict[str, Any]]:
     """
     Perform information extraction on contract content
     
@@ -282,17 +280,12 @@ def perform_information_extraction(content: str, agent_manager: AgentManager, co
         content: Contract content to analyze
         agent_manager: Agent manager instance
         collection_name: Name of the vector DB collection
+        vector_db: Vector database bound to the shared client
         
     Returns:
         Dictionary containing extracted information
     """
     try:
-        # Create agent
-        agent = agent_manager.create_agent(
-            "extract_information", 
-            model_type=Config._current_model_type
-        )
-        
         # Set vector DB collection
         if vector_db.set_active_collection(collection_name):
             logger.info(f"Collection set to: {collection_name}")
@@ -306,22 +299,24 @@ def perform_information_extraction(content: str, agent_manager: AgentManager, co
 
         print("Collection set to: ", collection_name)
         
-        # Process extractions
+        # Process extractions, one pooled agent per concurrently running section
+        model_type = Config._current_model_type
         processor.process_extractions(
             content=content,
             vec=vector_db,
-            agent=agent,
+            acquire_agent=lambda response_format=None: agent_manager.acquire_agent(
+                "extract_information", model_type=model_type, response_format=response_format
+            ),
+            model_type=model_type,
         )
         
-        # Get results in proper format
-        results = processor.export_results(format='json')
-        
         # Get summary statistics
         
         # Return formatted output
         return {
             "Information Extraction": {
-                "results": json.loads(results),  # Parse JSON string to dict
+                "results": processor.results.to_list(),
+                "section_stats": processor.section_stats,
                 "status": "success"
             }
         }
@@ -339,45 +334,53 @@ def perform_analysis(
     content: str, 
     analysis_type: str, 
     custom_query: Optional[str] = None, 
-    collection_name: Optional[str] = None
+    collection_name: Optional[str] = None,
+    bypass_cache: bool = False
 ) -> Optional[Dict[str, Any]]:
     """
     Perform analysis based on type
+
+    Set bypass_cache to ignore cached LLM responses and force fresh answers.
     """
-    agent_manager = AgentManager()
+    # Shared templates and pooled agents; nothing is built per request once warm
+    agent_manager = get_agent_manager()
+    # Cheap per-request view over the process-wide client and embedding model
+    vector_db = VectorDB()
 
     try:
-        result = None
+        with bypass_response_cache(bypass_cache):
+            result = None
+            emit_event("started", analysis_type=analysis_type)
         
-        if analysis_type == "Information Extraction":
-            if not collection_name:
-                raise ValueError("Collection name required for Information Extraction")
-            result = perform_information_extraction(content, agent_manager, collection_name)
-        elif analysis_type == "Contract Review":
-            result = perform_contract_review(content, agent_manager, collection_name)
-        elif analysis_type == "Legal Research":
-            result = perform_legal_research(content, agent_manager, collection_name)
-        elif analysis_type == "Risk Assessment":
-            result = perform_risk_assessment(content, agent_manager, collection_name)
-        elif analysis_type == "Contract Summary":
-            result = perform_contract_summary(content, agent_manager, collection_name)
-        elif analysis_type == "Custom Analysis":
-            result = perform_custom_analysis(content, custom_query, agent_manager, collection_name)
-        else:
-            raise ValueError(f"Unsupported analysis type: {analysis_type}")
-
-        # Ensure result is JSON serializable
-        if result:
-            try:
-                json.dumps(result)  # Test JSON serialization
-                return result
-            except (TypeError, json.JSONDecodeError) as e:
-                logger.error(f"JSON serialization failed: {str(e)}")
-                return {
-                    "error": "Result could not be serialized to JSON",
-                    "status": "failed"
-                }
-        return None
+            if analysis_type == "Information Extraction":
+                if not collection_name:
+                    raise ValueError("Collection name required for Information Extraction")
+                result = perform_information_extraction(content, agent_manager, collection_name, vector_db)
+            elif analysis_type == "Contract Review":
+                result = perform_contract_review(content, agent_manager, collection_name, vector_db)
+            elif analysis_type == "Legal Research":
+                result = perform_legal_research(content, agent_manager, collection_name)
+            elif analysis_type == "Risk Assessment":
+                result = perform_risk_assessment(content, agent_manager, collection_name)
+            elif analysis_type == "Contract Summary":
+                result = perform_contract_summary(content, agent_manager, collection_name)
+            elif analysis_type == "Custom Analysis":
+                result = perform_custom_analysis(content, custom_query, agent_manager, collection_name, vector_db)
+            else:
+                raise ValueError(f"Unsupported analysis type: {analysis_type}")
+
+            # Ensure result is JSON serializable
+            if result:
+                try:
+                    json.dumps(result)  # Test JSON serialization
+                    return result
+                except (TypeError, json.JSONDecodeError) as e:
+                    logger.error(f"JSON serialization failed: {str(e)}")
+                    return {
+                        "error": "Result could not be serialized to JSON",
+                        "status": "failed"
+                    }
+            return None
 
     except Exception as e:
         logger.error(f"Analysis failed: {str(e)}")
@@ -385,8 +388,6 @@ def perform_analysis(
             "error": str(e),
             "status": "failed"
         }
-    finally:
-        agent_manager.cleanup()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Analyze contract documents")
@@ -394,11 +395,12 @@ if __name__ == "__main__":
     parser.add_argument("--type", required=True, help="Type of analysis to perform")
     parser.add_argument("--query", help="Custom query for analysis")
     parser.add_argument("--collection_name", help="Collection name for querying the database")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached LLM responses")
 
     args = parser.parse_args()
     
     try:
-        result = perform_analysis(args.content, args.type, args.query, args.collection_name)
+        result = perform_analysis(args.content, args.type, args.query, args.collection_name, bypass_cache=args.no_cache)
         
         if result:
             # Ensure proper JSON formatting
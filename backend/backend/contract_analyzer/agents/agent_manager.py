@@ -1,12 +1,17 @@
 # agent_manager.py
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Iterator, Mapping, Sequence, Tuple, TYPE_CHECKING
+from dataclasses import dataclass, replace
+from contextlib import contextmanager
+from types import MappingProxyType
+import threading
 import logging
-from datetime import datetime
+import json
 from enum import Enum
-from phi.agent import Agent
+if TYPE_CHECKING:
+    from phi.agent import Agent
 from ..config import Config, ModelType
 from ..error_handler import handle_errors, ErrorCategory
+from ..response_cache import CachedAgent, get_response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -22,22 +27,44 @@ class AgentRole(Enum):
     CONTRACT_SUMMARIZER = "contract_summarizer"
     EXTRACT_INFORMATION = "extract_information"
 
-@dataclass
+@dataclass(frozen=True)
 class AgentTemplate:
-    """Template for creating agents"""
+    """Immutable template for creating agents; lists and dicts are frozen on construction"""
     name: str
     role: AgentRole
-    instructions: List[str]
-    capabilities: List[str]
-    requirements: Dict[str, Any]
-    metadata: Dict[str, Any]
+    instructions: Sequence[str]
+    capabilities: Sequence[str]
+    requirements: Mapping[str, Any]
+    metadata: Mapping[str, Any]
+
+    def __post_init__(self):
+        object.__setattr__(self, "instructions", tuple(self.instructions))
+        object.__setattr__(self, "capabilities", tuple(self.capabilities))
+        object.__setattr__(self, "requirements", MappingProxyType(dict(self.requirements)))
+        object.__setattr__(self, "metadata", MappingProxyType(dict(self.metadata)))
+
+# Pool key: (template name, model type, extra instructions, output format as JSON)
+_PoolKey = Tuple[str, ModelType, Tuple[str, ...], Optional[str]]
 
 class AgentManager:
-    """Manages agent creation and lifecycle"""
+    """
+    Manages agent templates and a pool of ready-built agents
+
+    One manager is shared by all requests (see get_agent_manager). phi
+    agents keep per-run state, so an agent serves one run at a time:
+    acquire_agent checks an idle agent for the (template, model,
+    instructions) combination out of the pool, building one only when all
+    are busy, and returns it afterwards. Agents constrained to an output
+    format are pooled separately per format.
+    """
     
     def __init__(self):
-        self._agents: Dict[str, Agent] = {}
+        self._agents: Dict[str, "Agent"] = {}
         self._templates: Dict[str, AgentTemplate] = {}
+        self._idle: Dict[_PoolKey, List["Agent"]] = {}
+        self._built = 0
+        self._reused = 0
+        self._lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
         self._load_default_templates()
 
@@ -46,7 +73,7 @@ class AgentManager:
         template_name: str,
         custom_instructions: Optional[List[str]] = None,
         model_type: Optional[ModelType] = None
-    ) -> Optional[Agent]:
+    ) -> Optional["Agent"]:
         """
         Create a new agent from template
         
@@ -56,83 +83,186 @@ class AgentManager:
             model_type: Optional specific model to use
         """
         try:
+            return self._build_agent(template_name, tuple(custom_instructions or ()), model_type)
+        except Exception as e:
+            self.logger.error(f"Agent creation failed: {str(e)}")
+            return None
+
+    def _build_agent(
+        self,
+        template_name: str,
+        custom_instructions: Tuple[str, ...],
+        model_type: Optional[ModelType],
+        response_format: Optional[Any] = None
+    ) -> "Agent":
+        with self._lock:
             template = self._templates.get(template_name)
-            # print("+++++++",template_name)
-            # print("+++++++",template)
-            # print("+++++++",self._templates)
-            if not template:
-                raise ValueError(f"Template {template_name} not found")
-
-            # Get instructions
-            instructions = template.instructions
-            if custom_instructions:
-                instructions.extend(custom_instructions)
-
-            # Get model
-            model_type = model_type or Config._current_model_type
-            model = Config.get_model_instance(model_type)
-
-            # Create agent
-            agent = Agent(
-                name=template.name,
-                role=template.role.value,
-                instructions=instructions,
-                model=model
-            )
+        if not template:
+            raise ValueError(f"Template {template_name} not found")
 
-            # Store agent
-            agent_id = f"{template.name}_{datetime.now().timestamp()}"
-            self._agents[agent_id] = agent
+        # A fresh list per agent; the template's instructions are never modified
+        instructions = [*template.instructions, *custom_instructions]
 
-            self.logger.info(f"Created agent: {template.name} with ID: {agent_id}")
-            return agent
+        # Get model
+        model_type = model_type or Config._current_model_type
+        model = Config.get_model_instance(model_type, response_format)
 
-        except Exception as e:
-            self.logger.error(f"Agent creation failed: {str(e)}")
-            return None
+        from phi.agent import Agent
+
+        # Create agent
+        agent = Agent(
+            name=template.name,
+            role=template.role.value,
+            instructions=instructions,
+            model=model
+        )
+
+        if Config.RESPONSE_CACHE_CONFIG.enabled:
+            model_options = Config.MODEL_OPTIONS
+            if response_format is not None:
+                model_options = {**model_options, "format": response_format}
+            agent = CachedAgent(agent, get_response_cache(), model_options)
+
+        self.logger.info(f"Created agent: {template.name} for {model_type.value}")
+        return agent
+
+    @contextmanager
+    def acquire_agent(
+        self,
+        template_name: str,
+        custom_instructions: Optional[List[str]] = None,
+        model_type: Optional[ModelType] = None,
+        response_format: Optional[Any] = None
+    ) -> Iterator["Agent"]:
+        """
+        Check out an agent for one run and return it to the pool afterwards
+
+        Args:
+            template_name: Name of template to use
+            custom_instructions: Optional additional instructions
+            model_type: Optional specific model to use
+            response_format: Optional Ollama output format, "json" or a JSON schema
+
+        Raises:
+            ValueError: If the template is not registered
+        """
+        model_type = model_type or Config._current_model_type
+        key = (
+            template_name,
+            model_type,
+            tuple(custom_instructions or ()),
+            json.dumps(response_format, sort_keys=True) if response_format is not None else None,
+        )
+        with self._lock:
+            idle = self._idle.get(key)
+            agent = idle.pop() if idle else None
+            if agent is not None:
+                self._reused += 1
+
+        if agent is None:
+            agent = self._build_agent(template_name, key[2], model_type, response_format)
+            with self._lock:
+                self._built += 1
+                self._agents[f"{template_name}_{model_type.value}_{self._built}"] = agent
 
-    def register_template(self, template: AgentTemplate) -> bool:
-        """Register new agent template"""
         try:
-            template_id = f"{template.role.value}_{template.name}"
-            self._templates[template.role.value] = template
-            # print("+++++++",self._templates)
-            self.logger.info(f"Registered template: {template_id}")
+            yield agent
+        finally:
+            self._release(key, agent)
+
+    def _release(self, key: _PoolKey, agent: "Agent") -> None:
+        # Drop the finished run from the agent's memory so it does not grow across requests
+        memory = getattr(agent, "memory", None)
+        if memory is not None and hasattr(memory, "clear"):
+            memory.clear()
+
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            # Keep no more idle agents than can run at once for a model
+            if len(idle) < Config.MAX_PARALLEL_LLM_CALLS:
+                idle.append(agent)
+                return
+            for agent_id, pooled in list(self._agents.items()):
+                if pooled is agent:
+                    del self._agents[agent_id]
+
+    def warm(self, model_type: Optional[ModelType] = None) -> None:
+        """Pre-build one agent per template for a model"""
+        with self._lock:
+            template_names = list(self._templates)
+        for template_name in template_names:
+            try:
+                with self.acquire_agent(template_name, model_type=model_type):
+                    pass
+            except Exception as e:
+                self.logger.warning(f"Could not pre-build agent {template_name}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size and reuse"""
+        with self._lock:
+            checkouts = self._built + self._reused
+            return {
+                "templates": len(self._templates),
+                "agents": len(self._agents),
+                "idle": sum(len(idle) for idle in self._idle.values()),
+                "built": self._built,
+                "reused": self._reused,
+                "reuse_rate": self._reused / checkouts if checkouts else 0.0,
+            }
+
+    def register_template(self, template: AgentTemplate, template_id: Optional[str] = None) -> bool:
+        """Register new agent template, under its role unless a template_id is given"""
+        try:
+            key = template_id or template.role.value
+            with self._lock:
+                self._templates[key] = template
+                # Agents built from a replaced template are stale
+                for pool_key in [k for k in self._idle if k[0] == key]:
+                    del self._idle[pool_key]
+            self.logger.info(f"Registered template: {key} ({template.name})")
             return True
         except Exception as e:
             self.logger.error(f"Template registration failed: {str(e)}")
             return False
 
-    def get_agent(self, agent_id: str) -> Optional[Agent]:
-        """Get agent by ID"""
+    def get_agent(self, agent_id: str) -> Optional["Agent"]:
+        """Get a pooled agent by ID"""
         return self._agents.get(agent_id)
 
     def list_agents(self) -> Dict[str, Dict[str, Any]]:
-        """List all active agents with metadata"""
+        """List all pooled agents with metadata"""
+        with self._lock:
+            agents = dict(self._agents)
         return {
             agent_id: {
                 'name': agent.name,
                 'role': agent.role,
                 'model': agent.model.id
             }
-            for agent_id, agent in self._agents.items()
+            for agent_id, agent in agents.items()
         }
 
     def remove_agent(self, agent_id: str) -> bool:
-        """Remove an agent"""
+        """Remove a pooled agent"""
         try:
-            if agent_id in self._agents:
-                del self._agents[agent_id]
-                self.logger.info(f"Removed agent: {agent_id}")
-                return True
-            return False
+            with self._lock:
+                agent = self._agents.pop(agent_id, None)
+                if agent is None:
+                    return False
+                for idle in self._idle.values():
+                    if agent in idle:
+                        idle.remove(agent)
+            self.logger.info(f"Removed agent: {agent_id}")
+            return True
         except Exception as e:
             self.logger.error(f"Agent removal failed: {str(e)}")
             return False
     
     def cleanup(self) -> None:
-        """Cleanup agents"""
-        self._agents = {}
+        """Drop all pooled agents, e.g. after the model changes"""
+        with self._lock:
+            self._agents = {}
+            self._idle = {}
             
     def _load_default_templates(self) -> None:
         default_templates = {
@@ -275,7 +405,7 @@ class AgentBuilder:
     def with_name(self, name: str) -> 'AgentBuilder':
         """Set agent name"""
         if self._template:
-            self._template.name = name
+            self._template = replace(self._template, name=name)
         return self
 
     def add_instruction(self, instruction: str) -> 'AgentBuilder':
@@ -298,20 +428,35 @@ class AgentBuilder:
         self._metadata[key] = value
         return self
 
-    def build(self) -> Optional[Agent]:
+    def build(self) -> Optional["Agent"]:
         """Build the agent"""
         if not self._template:
             return None
 
-        self._template.instructions = self._instructions
-        self._template.capabilities = self._capabilities
-        self._template.requirements = self._requirements
-        self._template.metadata.update(self._metadata)
+        template = replace(
+            self._template,
+            instructions=self._instructions,
+            capabilities=self._capabilities,
+            requirements=self._requirements,
+            metadata={**self._template.metadata, **self._metadata},
+        )
 
-        # Register template
-        template_id = f"custom_{self._template.name}"
-        if self.manager.register_template(self._template):
-            print("inside build")
+        # Register under its own id so the default custom template is left alone
+        template_id = f"custom_{template.name}"
+        if self.manager.register_template(template, template_id):
             return self.manager.create_agent(template_id)
 
-        return None
\ No newline at end of file
+        return None
+
+
+_agent_manager: Optional[AgentManager] = None
+_agent_manager_lock = threading.Lock()
+
+
+def get_agent_manager() -> AgentManager:
+    """Process-wide agent manager"""
+    global _agent_manager
+    with _agent_manager_lock:
+        if _agent_manager is None:
+            _agent_manager = AgentManager()
+        return _agent_manager
@@ -1,18 +1,197 @@
 import re
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Callable, ContextManager, Dict, IO, Iterator, List, Optional, Any, Tuple, Union
+from dataclasses import dataclass, asdict
 from datetime import datetime
-from tqdm.auto import tqdm
-import pandas as pd
+from pathlib import Path
+import logging
+import csv
+import io
+import time
 import json
 
+from Doc_Processor.processors.text_pre_processor import count_tokens
+
+from ...config import Config, ModelType
+from ...json_repair import repair_json
+from ...rule_extraction import RuleMatch, extract_fields
+from ...parallel import ParallelRunner
+from ...streaming import emit_event, run_agent
+
+logger = logging.getLogger(__name__)
+
+
+def _token_count(text: str) -> int:
+    # Reporting only; fall back to ~4 chars per token if the encoding cannot be loaded
+    try:
+        return count_tokens(text, Config.ENCODING_NAME)
+    except Exception:
+        return len(text) // 4
+
+
+@dataclass
+class ExtractionRecord:
+    """Extracted value of one term"""
+
+    term: str
+    extracted_value: Any
+    timestamp: str
+    section: Optional[str] = None
+    # Character offsets of the value in the contract text, when it is quoted verbatim
+    span: Optional[Tuple[int, int]] = None
+    # "llm", or "rules" for values read by rule_extraction
+    source: str = "llm"
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = asdict(self)
+        record["span"] = list(self.span) if self.span else None
+        return record
+
+
+class ExtractionResults:
+    """
+    Extraction records indexed by term, in insertion order
+
+    Upserting a term that is already present replaces its record in place,
+    so a term appears once however many times it is extracted or repaired.
+    Exports stream record by record rather than building a DataFrame.
+    """
+
+    FIELDS = ("term", "extracted_value", "timestamp", "section", "span", "source")
+
+    def __init__(self):
+        self._records: Dict[str, ExtractionRecord] = {}
+
+    def upsert(
+        self,
+        term: str,
+        extracted_value: Any,
+        section: Optional[str] = None,
+        span: Optional[Tuple[int, int]] = None,
+        timestamp: Optional[str] = None,
+        source: str = "llm",
+    ) -> ExtractionRecord:
+        """Add or replace the record of a term"""
+        record = ExtractionRecord(
+            term=term,
+            extracted_value=extracted_value,
+            timestamp=timestamp or datetime.now().isoformat(),
+            section=section,
+            span=span,
+            source=source,
+        )
+        self._records[term] = record
+        return record
+
+    def get(self, term: str) -> Optional[ExtractionRecord]:
+        return self._records.get(term)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[ExtractionRecord]:
+        return iter(self._records.values())
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Records as JSON-ready dicts"""
+        return [record.to_dict() for record in self]
+
+    def iter_json(self) -> Iterator[str]:
+        """Yield a JSON array of the records piece by piece"""
+        yield "["
+        for i, record in enumerate(self):
+            yield ("," if i else "") + "\n  " + json.dumps(record.to_dict(), default=str)
+        yield "\n]" if self._records else "]"
+
+    def iter_csv(self) -> Iterator[str]:
+        """Yield CSV lines, header first; structured values are JSON-encoded"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.FIELDS)
+        for record in self:
+            writer.writerow(self._flat_row(record))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        # The header alone when there are no records
+        if buffer.getvalue():
+            yield buffer.getvalue()
+
+    def write(self, destination: Union[str, Path, IO], format: str = "json", row_group_size: int = 1000) -> None:
+        """
+        Stream the records to a file
+
+        Args:
+            destination: Path, or open file object (text for json/csv, binary for parquet)
+            format: "json", "csv" or "parquet"
+            row_group_size: Records per Parquet row group
+        """
+        if format == "parquet":
+            self._write_parquet(destination, row_group_size)
+            return
+        if format == "json":
+            pieces = self.iter_json()
+        elif format == "csv":
+            pieces = self.iter_csv()
+        else:
+            raise ValueError(f"Unsupported format: {format}")
+
+        if isinstance(destination, (str, Path)):
+            with open(destination, "w", encoding="utf-8", newline="") as f:
+                f.writelines(pieces)
+        else:
+            destination.writelines(pieces)
+
+    def _write_parquet(self, destination: Union[str, Path, IO], row_group_size: int) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ("term", pa.string()),
+            ("extracted_value", pa.string()),
+            ("timestamp", pa.string()),
+            ("section", pa.string()),
+            ("span", pa.list_(pa.int64())),
+            ("source", pa.string()),
+        ])
+        if isinstance(destination, Path):
+            destination = str(destination)
+        with pq.ParquetWriter(destination, schema) as writer:
+            batch = []
+            for record in self:
+                row = self._flat_row(record)
+                row[4] = list(record.span) if record.span else None
+                batch.append(row)
+                if len(batch) >= row_group_size:
+                    writer.write_table(pa.Table.from_arrays(list(map(list, zip(*batch))), schema=schema))
+                    batch = []
+            if batch or not self._records:
+                columns = list(map(list, zip(*batch))) if batch else [[] for _ in self.FIELDS]
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+
+    @staticmethod
+    def _flat_row(record: ExtractionRecord) -> List[Any]:
+        value = record.extracted_value
+        if not isinstance(value, str):
+            value = json.dumps(value, default=str)
+        span = f"{record.span[0]}-{record.span[1]}" if record.span else ""
+        return [record.term, value, record.timestamp, record.section or "", span, record.source]
+
 
 class ExtractionProcessor:
     """Enhanced processor for contract information extraction with section tracking"""
 
+    # Fix-up prompts sent for a section whose answer is not valid JSON even after local repair
+    MAX_JSON_REPAIRS = 1
+
+    # Opening of the contract, where the metadata fields are stated
+    METADATA_CONTEXT_CHARS = 3000
+
     def __init__(self):
-        self.results = []
-        self.error_strs = []
+        self.results = ExtractionResults()
+        self.section_stats: Dict[str, Dict[str, Any]] = {}
         self.contract_sections = {
             "Contract Metadata": [
                 "Contract Name",
@@ -164,49 +343,313 @@ class ExtractionProcessor:
             ],
         }
 
-    def create_df(self) -> pd.DataFrame:
+    def create_df(self) -> "pd.DataFrame":
         """Create DataFrame from extraction types"""
+        import pandas as pd
+
         return pd.DataFrame(
             list(self.extraction_types.items()), columns=["Term", "Terms"]
         )
 
-    def process_extractions(self, content, vec, agent) -> None:
-        """Process all extractions"""
-        for key, value in self.contract_sections.items():
-            if key == "Contract Metadata":
-                context = content[:3000]
+    def process_extractions(
+        self,
+        content,
+        vec,
+        agent=None,
+        acquire_agent: Optional[Callable[..., ContextManager[Any]]] = None,
+        model_type: Optional[ModelType] = None,
+    ) -> None:
+        """
+        Process all extractions
+
+        Fields with a fixed shape (dates, durations, amounts, notice days)
+        are first read from the full text by rule_extraction. Values read
+        next to their label (RuleMatch.resolved) are final: they are not
+        asked for, and a section resolved entirely by rules makes no LLM
+        call. Inferred values (currency, arbitrator count, notice days) are
+        given to the model as suggestions it may correct; such a value is
+        kept when the model confirms it or finds nothing. Rule values keep
+        their span and source "rules".
+
+        With acquire_agent, a callable taking an Ollama output format and
+        returning a context manager that checks out an agent constrained to
+        it (see Config.EXTRACTION_OUTPUT_FORMAT), sections are extracted
+        concurrently, at most MAX_PARALLEL_LLM_CALLS at a time for the model;
+        a single agent keeps state between runs, so with agent they run one
+        after another. Results are merged in contract_sections order either way.
+
+        With vec bound to the document's collection, each section is sent
+        only the chunks retrieved for its field names, within the database
+        context_token_budget, instead of the whole contract. Tokens sent and
+        latency per section are kept in section_stats.
+        """
+        if acquire_agent is None and agent is None:
+            raise ValueError("Either agent or acquire_agent is required")
+        # One agent cannot serve concurrent runs
+        parallel = acquire_agent is not None
+
+        total = len(self.contract_sections)
+        completed = 0
+        start = time.perf_counter()
+        prefilled = extract_fields(content) if Config.RULE_EXTRACTION else {}
+        rule_seconds = time.perf_counter() - start
+        resolved = {term for term, match in prefilled.items() if match.resolved}
+        pending = {
+            key: [term for term in terms if term not in resolved]
+            for key, terms in self.contract_sections.items()
+        }
+        contexts = self._section_contexts(content, vec, pending)
+        self.section_stats = {}
+
+        def make_task(key: str, terms: List[str]) -> Callable[[], Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+            context = contexts[key][0]
+            remaining = pending[key]
+            rule_entries = [self._rule_entry(term, prefilled[term]) for term in terms if term in resolved]
+            hints = {term: prefilled[term] for term in remaining if term in prefilled}
+
+            def extract(section_agent: Any) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+                entries, stats = self._extract_section(section_agent, key, context, remaining, hints)
+                stats["rule_fields"] = len(rule_entries)
+                return rule_entries + self._apply_hints(entries, hints, stats), stats
+
+            if not remaining:
+                return lambda: (rule_entries, {"llm_calls": 0, "rule_fields": len(rule_entries)})
+            if not parallel:
+                return lambda: extract(agent)
+
+            def task():
+                with acquire_agent(self._response_format(remaining)) as section_agent:
+                    return extract(section_agent)
+            return task
+
+        def report(key: str, outcome: Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]) -> None:
+            nonlocal completed
+            completed += 1
+            entries, stats = outcome or (self._not_found(self.contract_sections[key]), {})
+            stats["context_source"] = contexts[key][1]
+            self.section_stats[key] = stats
+            emit_event(
+                "section",
+                section=key,
+                content={entry["term"]: entry["extracted_value"] for entry in entries},
+                completed=completed,
+                total=total,
+                stats=stats,
+            )
+
+        tasks = {key: make_task(key, terms) for key, terms in self.contract_sections.items()}
+        if parallel:
+            section_results = ParallelRunner.run_all(tasks, model_type=model_type, on_result=report)
+        else:
+            section_results = {}
+            for key, task in tasks.items():
+                section_results[key] = ParallelRunner._run_task(key, task)
+                report(key, section_results[key])
+
+        # Deterministic merge: section order, then term order within the answer
+        self.results = ExtractionResults()
+        lowered = content.lower()
+        for key, terms in self.contract_sections.items():
+            outcome = section_results.get(key)
+            if outcome is None:
+                logger.error(f"Extraction of section '{key}' failed")
+                entries = self._not_found(terms)
             else:
-                context = content
+                entries = outcome[0]
+            for entry in entries:
+                self.results.upsert(
+                    entry["term"],
+                    entry["extracted_value"],
+                    section=key,
+                    span=entry.get("span") or self._locate(lowered, entry["extracted_value"]),
+                    timestamp=entry["timestamp"],
+                    source=entry.get("source", "llm"),
+                )
+        self.section_stats = {key: self.section_stats[key] for key in self.contract_sections}
 
-            response = agent.run(self._build_extraction_prompt(context, value))
-            self._store_result([response.content])
+        sent = sum(stats.get("prompt_tokens", 0) for stats in self.section_stats.values())
+        logger.info(
+            f"Extracted {total} sections, {len(resolved)} fields by rules in {rule_seconds * 1000:.0f}ms, "
+            f"{len(prefilled) - len(resolved)} rule hints "
+            f"({sum(s.get('rule_kept', 0) for s in self.section_stats.values())} kept), "
+            f"{sum(s.get('llm_calls', 0) for s in self.section_stats.values())} LLM calls, "
+            f"{sent} prompt tokens, "
+            f"{sum(s.get('seconds', 0.0) for s in self.section_stats.values()):.1f}s of LLM time"
+        )
+
+    def _section_contexts(self, content: str, vec: Any, pending: Dict[str, List[str]]) -> Dict[str, Tuple[str, str]]:
+        """
+        Context to send with each section's prompt
+
+        Args:
+            pending: Fields of each section still to be extracted by the model
+
+        Returns:
+            Mapping of section to (context, source), where source is
+            "opening", "retrieved", "full" (retrieval unavailable) or
+            "rules" (no field left for the model)
+        """
+        contexts = {key: (content, "full") for key in self.contract_sections}
+        contexts["Contract Metadata"] = (content[:self.METADATA_CONTEXT_CHARS], "opening")
+        for key, terms in pending.items():
+            if not terms:
+                contexts[key] = ("", "rules")
+
+        db_config = Config.DATABASE_CONFIG
+        keys = [key for key in self.contract_sections if key != "Contract Metadata" and pending[key]]
+        if not keys or not db_config.extraction_retrieval or vec is None or not getattr(vec, "active_collection", None):
+            return contexts
+
+        # One embedding pass and one query for every section
+        emit_event("progress", stage="retrieval")
+        retrieved = vec.get_contexts(
+            [f"{key}: {', '.join(pending[key])}" for key in keys],
+            num_results=db_config.max_results,
+            expand_neighbors=db_config.neighbor_window,
+            token_budget=db_config.context_token_budget,
+        )
+        for key, context in zip(keys, retrieved):
+            if context:
+                contexts[key] = (context, "retrieved")
+            else:
+                logger.warning(f"No context retrieved for '{key}', sending the full contract")
+        return contexts
+
+    def _extract_section(
+        self,
+        agent: Any,
+        key: str,
+        context: str,
+        terms: List[str],
+        hints: Optional[Dict[str, RuleMatch]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Extract one section, repairing invalid JSON answers with the same agent
+
+        Returns:
+            Tuple of (result entries, stats with the tokens sent and received
+            and the seconds spent in LLM calls)
+        """
+        stats = {
+            "context_tokens": _token_count(context),
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "llm_calls": 0,
+            "seconds": 0.0,
+        }
+
+        def call(prompt: str) -> str:
+            start = time.perf_counter()
+            answer = run_agent(agent, prompt, key).content
+            stats["seconds"] += time.perf_counter() - start
+            stats["prompt_tokens"] += _token_count(prompt)
+            stats["completion_tokens"] += _token_count(answer or "")
+            stats["llm_calls"] += 1
+            return answer
+
+        parsed, error_prompts = self._parse_response(
+            [call(self._build_extraction_prompt(context, terms, hints))], terms
+        )
+
+        for _ in range(self.MAX_JSON_REPAIRS):
+            if not error_prompts:
+                break
+            repaired_data, error_prompts = self._parse_response(
+                [call(error_prompt) for error_prompt in error_prompts], terms
+            )
+            parsed.update(repaired_data)
+        if error_prompts:
+            logger.warning(f"Section '{key}' still not valid JSON after repair")
+
+        stats["seconds"] = round(stats["seconds"], 3)
+        entries = [self._result_entry(term, value) for term, value in parsed.items()]
+        found = {entry["term"] for entry in entries}
+        return entries + self._not_found([term for term in terms if term not in found]), stats
+
+    @staticmethod
+    def _response_format(terms: List[str]) -> Optional[Any]:
+        """Ollama output format for a section's answer"""
+        if Config.EXTRACTION_OUTPUT_FORMAT != "schema":
+            return Config.EXTRACTION_OUTPUT_FORMAT
+        terms = list(dict.fromkeys(terms))
+        return {
+            "type": "object",
+            "properties": {term: {"type": "string"} for term in terms},
+            "required": terms,
+        }
+
+    @staticmethod
+    def _result_entry(term: str, value: Any) -> Dict[str, Any]:
+        if value == None or value == "":
+            value = "Not Found"
+        return {
+            "term": term,
+            "extracted_value": value,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    def _rule_entry(self, term: str, match: RuleMatch) -> Dict[str, Any]:
+        return {**self._result_entry(term, match.value), "span": match.span, "source": "rules"}
+
+    def _apply_hints(
+        self, entries: List[Dict[str, Any]], hints: Dict[str, RuleMatch], stats: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Keep a rule value the model confirmed or could not answer; the model's own answer wins otherwise"""
+        kept = 0
+        merged = []
+        for entry in entries:
+            match = hints.get(entry["term"])
+            value = entry["extracted_value"]
+            if match is not None and (
+                value == "Not Found" or str(value).strip().lower() == match.value.strip().lower()
+            ):
+                entry = self._rule_entry(entry["term"], match)
+                kept += 1
+            merged.append(entry)
+        stats["rule_hints"] = len(hints)
+        stats["rule_kept"] = kept
+        return merged
+
+    def _not_found(self, terms: List[str]) -> List[Dict[str, Any]]:
+        return [self._result_entry(term, None) for term in terms]
+
+    @staticmethod
+    def _locate(lowered_content: str, value: Any) -> Optional[Tuple[int, int]]:
+        """Span of a value quoted verbatim (ignoring case) in the contract"""
+        if not isinstance(value, str) or value == "Not Found" or len(value) < 3:
+            return None
+        start = lowered_content.find(value.lower())
+        return (start, start + len(value)) if start >= 0 else None
 
-            # break
-            self.check_results(value)
-            
-        if len(self.error_strs) > 0:
-            for error_str in self.error_strs:
-                response = agent.run(error_str)
-                self._store_result([response.content])
-                
-                self.check_results(value)
-                
     def generate_response_format(self, values):
         response_format = ''
         for value in values:
             response_format += f"{value}: " + "<extracted_value>" + "\n"
         
         return response_format
+
+    def generate_hints(self, hints: Optional[Dict[str, RuleMatch]]) -> str:
+        """Rule values suggested to the model, to confirm against the text or correct"""
+        if not hints:
+            return ""
+        lines = "\n".join(f"{term}: {match.value}" for term, match in hints.items())
+        return (
+            "\n        Suggested values found by pattern matching; they may be wrong. Check each against the text,\n"
+            "        return it if correct and the right value if not:\n"
+            f"{lines}\n"
+        )
             
 
-    def _build_extraction_prompt(self, context: str, value: List) -> str:
+    def _build_extraction_prompt(
+        self, context: str, value: List, hints: Optional[Dict[str, RuleMatch]] = None
+    ) -> str:
         """Build extraction prompt"""
         return f"""From the following text {context}
         Extract the following fields from the OCR content of the contract document:
         maintain the sequence of the fields as per the contract
 
         {value}
-
+        {self.generate_hints(hints)}
         Response Format:
         {self.generate_response_format(value)}
 
@@ -232,20 +675,23 @@ class ExtractionProcessor:
     def check_results(self, value: List) -> None:
         """Check if the extracted value is present in the OCR content"""
         for v in value:
-            if v not in [result["term"] for result in self.results]:
-                self.results.append(
-                    {
-                        "term": v,
-                        "extracted_value": "Not Found",
-                        "timestamp": datetime.now().isoformat(),
-                    }
-                )
+            if v not in self.results:
+                self.results.upsert(v, "Not Found")
 
-    def _parse_response(self, json_strings: Any) -> Dict[str, str]:
-        """Parse the response to extract value and section"""
-        merged_data = {}
+    def _parse_response(
+        self, json_strings: Any, terms: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, str], List[str]]:
+        """
+        Parse the response to extract value and section
+
+        Strings that are not valid JSON are repaired locally first (see
+        repair_json); only those that cannot be recovered get a repair prompt.
 
-        self.error_strs = []
+        Returns:
+            Tuple of (merged data, repair prompts for strings that are not valid JSON)
+        """
+        merged_data = {}
+        error_prompts = []
         
         # Process each JSON string in the list
         for json_str in json_strings:
@@ -257,11 +703,19 @@ class ExtractionProcessor:
 
                 # Parse the JSON string
                 json_obj = json.loads(cleaned_json)
+                if not isinstance(json_obj, dict):
+                    json_obj = repair_json(cleaned_json, terms) or {}
 
                 # Update the merged data with the current JSON object
                 merged_data.update(json_obj)
 
             except json.JSONDecodeError as e:
+                repaired = repair_json(json_str, terms)
+                if repaired is not None:
+                    logger.debug("Repaired extraction JSON locally")
+                    merged_data.update(repaired)
+                    continue
+
                 print(f"Error parsing JSON: {e}")
                 print(f"Problematic JSON string: {json_str[:100]}...")
                 
@@ -271,31 +725,37 @@ class ExtractionProcessor:
                 
                 Note Just return the JSON String in the correct format. Do not print any other information or analysis
                 """
-                self.error_strs.append(error_prompt)
+                error_prompts.append(error_prompt)
                 continue
 
-        return merged_data
+        return merged_data, error_prompts
 
     def _store_result(self, response: Any) -> None:
         """Store extraction result with section information"""
-        parsed_response = self._parse_response(response)
-
+        parsed_response, _ = self._parse_response(response)
         for key, value in parsed_response.items():
-            if value == None or value == "":
-                value = "Not Found"
-            self.results.append(
-                {
-                    "term": key,
-                    "extracted_value": value,
-                    "timestamp": datetime.now().isoformat(),
-                }
-            )
+            self.results.upsert(key, self._result_entry(key, value)["extracted_value"])
+
+    def export_results(self, format: str = "json", destination: Optional[Union[str, Path, IO]] = None) -> Any:
+        """
+        Export results in specified format
 
-    def export_results(self, format: str = "json") -> Any:
-        """Export results in specified format"""
+        With destination, json, csv and parquet output is streamed to the
+        file and None returned; otherwise the json or csv text is returned.
+        """
+        if destination is not None:
+            self.results.write(destination, format)
+            return None
         if format == "json":
-            return json.dumps(self.results, indent=2)
-        elif format in ["csv", "dataframe"]:
-            df = pd.DataFrame(self.results)
-            return df.to_csv(index=False) if format == "csv" else df
+            return "".join(self.results.iter_json())
+        elif format == "csv":
+            return "".join(self.results.iter_csv())
+        elif format == "parquet":
+            buffer = io.BytesIO()
+            self.results.write(buffer, format)
+            return buffer.getvalue()
+        elif format == "dataframe":
+            import pandas as pd
+
+            return pd.DataFrame(self.results.to_list())
         raise ValueError(f"Unsupported format: {format}")
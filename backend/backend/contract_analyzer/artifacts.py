@@ -0,0 +1,245 @@
+# artifacts.py
+from typing import Dict, Any, Optional, List, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from pathlib import Path
+import threading
+import tempfile
+import hashlib
+import logging
+import json
+import zlib
+import os
+
+from Doc_Processor.storage import SQLiteStore, to_json
+from .config import Config, ArtifactConfig
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactStore(SQLiteStore):
+    """
+    Content-addressed store of extraction output
+
+    Blobs (page JSON with OCR blocks, page lists, document text) are
+    zlib-compressed files named by the SHA-256 of their content, so
+    identical pages are stored once. A SQLite table maps a document's file
+    hash to the blobs of each artifact kind. Blobs are hashed on the caller's
+    thread and compressed and written by a single background writer, which
+    keeps disk I/O off the request path; a ref is queued behind the blobs it
+    points to, so it never names a blob that is not on disk yet.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS refs (
+            doc_key TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (doc_key, kind)
+        )
+        """,
+    )
+
+    def __init__(self, config: Optional[ArtifactConfig] = None):
+        self.config = config or Config.ARTIFACT_CONFIG
+        self.root = Path(self.config.path)
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact-writer")
+        self._pending: List[Future] = []
+        self.blobs_written = 0
+        self.blobs_deduplicated = 0
+        self.bytes_written = 0
+        self.write_errors = 0
+        super().__init__(self.root / "refs.sqlite3")
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest[2:]}.z"
+
+    # Writing
+
+    def put_blob_async(self, data: bytes) -> str:
+        """Queue a blob for writing and return its digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        self._submit(self._write_blob, digest, data)
+        return digest
+
+    def put_json_async(self, value: Any) -> str:
+        """Queue a JSON-serialisable value as a blob and return its digest"""
+        return self.put_blob_async(
+            json.dumps(value, sort_keys=True, default=to_json).encode("utf-8")
+        )
+
+    def put_ref_async(self, doc_key: str, kind: str, digest: str) -> None:
+        """Point a document's artifact of the given kind at a blob, once queued blobs are written"""
+        self._submit(self._write_ref, doc_key, kind, digest)
+
+    def record_pages(self, doc_key: str, pages: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Pass pages through unchanged while storing each one
+
+        The document's page list is only recorded if the iteration runs to
+        the end and no page failed, so an interrupted or partly failed
+        extraction leaves nothing to rebuild from and is extracted again.
+        """
+        digests = []
+        iterator = iter(pages)
+        try:
+            for page in iterator:
+                if digests is not None and "error" in page:
+                    logger.warning(f"Not storing pages of {doc_key}: page {page.get('page')} failed")
+                    digests = None
+                if digests is not None:
+                    try:
+                        digests.append(self.put_json_async(_page_record(page)))
+                    except Exception as e:
+                        logger.warning(f"Not storing pages of {doc_key}: {str(e)}")
+                        digests = None
+                yield page
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+        if digests is not None:
+            self.put_ref_async(doc_key, "pages", self.put_json_async(digests))
+
+    def put_text_async(self, doc_key: str, text: str) -> None:
+        """Store a document's extracted text"""
+        self.put_ref_async(doc_key, "text", self.put_blob_async(text.encode("utf-8")))
+
+    def _submit(self, fn, *args) -> None:
+        future = self._writer.submit(fn, *args)
+        with self._lock:
+            self._pending = [f for f in self._pending if not f.done()]
+            self._pending.append(future)
+
+    def _write_blob(self, digest: str, data: bytes) -> None:
+        path = self._blob_path(digest)
+        try:
+            if path.exists():
+                self.blobs_deduplicated += 1
+                return
+            path.parent.mkdir(parents=True, exist_ok=True)
+            compressed = zlib.compress(data, self.config.compression_level)
+            # Write then rename, so readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+            self.blobs_written += 1
+            self.bytes_written += len(compressed)
+        except Exception as e:
+            self.write_errors += 1
+            logger.error(f"Artifact write failed for {digest}: {str(e)}")
+
+    def _write_ref(self, doc_key: str, kind: str, digest: str) -> None:
+        if not self._blob_path(digest).exists():
+            self.write_errors += 1
+            logger.error(f"Not recording {kind} artifact for {doc_key}: blob {digest} missing")
+            return
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO refs (doc_key, kind, digest, created_at) VALUES (?, ?, ?, ?)",
+                    (doc_key, kind, digest, datetime.now().isoformat()),
+                )
+        except Exception as e:
+            self.write_errors += 1
+            logger.error(f"Artifact ref write failed for {doc_key}/{kind}: {str(e)}")
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait for queued writes"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for future in pending:
+            future.result(timeout=timeout)
+
+    def shutdown(self) -> None:
+        """Finish queued writes and stop the writer"""
+        self._writer.shutdown(wait=True)
+
+    # Reading
+
+    def get_blob(self, digest: str) -> Optional[bytes]:
+        """Read a blob, None if it is not stored"""
+        try:
+            return zlib.decompress(self._blob_path(digest).read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def get_ref(self, doc_key: str, kind: str) -> Optional[str]:
+        """Digest of a document's artifact, None if not recorded"""
+        row = self._fetchone("SELECT digest FROM refs WHERE doc_key = ? AND kind = ?", (doc_key, kind))
+        return row[0] if row else None
+
+    def has_pages(self, doc_key: str) -> bool:
+        """Whether a document's complete page list is stored"""
+        return self.get_ref(doc_key, "pages") is not None
+
+    def get_text(self, doc_key: str) -> Optional[str]:
+        """A document's extracted text"""
+        digest = self.get_ref(doc_key, "text")
+        data = self.get_blob(digest) if digest else None
+        return data.decode("utf-8") if data is not None else None
+
+    def iter_pages(self, doc_key: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yield a document's stored pages in order, in the shape of DocumentHandler.iter_pages
+
+        Raises:
+            KeyError: If the document has no complete page list, or a page blob is missing
+        """
+        digest = self.get_ref(doc_key, "pages")
+        data = self.get_blob(digest) if digest else None
+        if data is None:
+            raise KeyError(f"No stored pages for {doc_key}")
+        for page_digest in json.loads(data):
+            page = self.get_blob(page_digest)
+            if page is None:
+                raise KeyError(f"Missing page artifact {page_digest} for {doc_key}")
+            yield json.loads(page)
+
+    def iter_ocr_blocks(self, doc_key: str) -> Iterator[Dict[str, Any]]:
+        """Yield the OCR text blocks of a document's stored pages"""
+        for page in self.iter_pages(doc_key):
+            yield from page.get("text_blocks", [])
+
+    def stats(self) -> Dict[str, Any]:
+        """Documents stored and writer activity"""
+        documents = self._fetchone("SELECT COUNT(DISTINCT doc_key) FROM refs")[0]
+        with self._lock:
+            pending = sum(1 for f in self._pending if not f.done())
+        return {
+            "documents": documents,
+            "blobs_written": self.blobs_written,
+            "blobs_deduplicated": self.blobs_deduplicated,
+            "bytes_written": self.bytes_written,
+            "pending_writes": pending,
+            "write_errors": self.write_errors,
+        }
+
+
+# fitz geometry is not serialisable; the flags describe how a run got the page, not the page
+_VOLATILE_PAGE_KEYS = ("dimensions", "cached", "resumed")
+
+
+def _page_record(page: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in page.items() if key not in _VOLATILE_PAGE_KEYS}
+
+
+_artifact_store: Optional[ArtifactStore] = None
+_artifact_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> Optional[ArtifactStore]:
+    """Process-wide artifact store, None when disabled"""
+    global _artifact_store
+    if not Config.ARTIFACT_CONFIG.enabled:
+        return None
+    with _artifact_store_lock:
+        if _artifact_store is None:
+            _artifact_store = ArtifactStore()
+        return _artifact_store
@@ -4,7 +4,8 @@ from enum import Enum
 from dataclasses import dataclass, field
 from pathlib import Path
 import datetime
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Tuple
+import json
 import gc
 import logging
 
@@ -53,13 +54,50 @@ class ProcessorConfig:
     dpi: int = 300
     extract_images: bool = True
     max_workers: int = 4
+    ocr_workers: int = 1  # OCR worker processes per PDF, 1 = in-process
+    ocr_cache_enabled: bool = True  # reuse OCR results of unchanged pages
+    ocr_cache_path: Path = Path("./cache/ocr_pages.sqlite3")
+    ocr_cache_max_bytes: int = 256 * 1024 * 1024
+    ocr_triage_enabled: bool = True  # classify scanned pages at low res to pick DPI and preprocessing
+    ocr_triage_dpi: int = 72
+    ocr_clean_scan_dpi: int = 200  # DPI for clean scans; noisy scans and photos use dpi
+    ocr_batch_pages: int = 1  # PDF pages recognised together when ocr_workers is 1, 1 = per-page
+    ocr_rec_batch_size: int = 6  # text line crops per recogniser call
+    page_checkpoints_enabled: bool = True  # resume interrupted PDF extraction from finished pages
+    page_checkpoints_path: Path = Path("./cache/page_checkpoints.sqlite3")
     batch_size: int = 100
-    chunk_size: int = 2048
+    # cl100k tokens, not the embedder's: all-MiniLM-L6-v2 truncates at 256 WordPieces
+    # including [CLS]/[SEP], and WordPiece splits numbers, dates and rare legal terms
+    # into more pieces than cl100k, so chunks stay well under 256 to keep their ends
+    chunk_size: int = 200
     chunk_overlap: int = 50
-    save_processed_files: bool = True
-    save_processed_files_dir: Path = Path(
-        r"/home/ajay/LLM-Agents/server/python/processed_files"
-    )
+
+    def handler_config(self) -> Dict[str, Any]:
+        """DocumentHandler configuration (per processor type) for these settings"""
+        return {
+            "pdf": {
+                "ocr_enabled": self.ocr_enabled,
+                "language": self.language,
+                "dpi": self.dpi,
+                "ocr_workers": self.ocr_workers,
+                "ocr_cache_enabled": self.ocr_cache_enabled,
+                "ocr_cache_path": str(self.ocr_cache_path),
+                "ocr_cache_max_bytes": self.ocr_cache_max_bytes,
+                "ocr_triage_enabled": self.ocr_triage_enabled,
+                "ocr_triage_dpi": self.ocr_triage_dpi,
+                "ocr_clean_scan_dpi": self.ocr_clean_scan_dpi,
+                "ocr_batch_pages": self.ocr_batch_pages,
+                "ocr_rec_batch_size": self.ocr_rec_batch_size,
+                "page_checkpoints_enabled": self.page_checkpoints_enabled,
+                "page_checkpoints_path": str(self.page_checkpoints_path),
+            },
+            "image": {
+                "ocr_language": self.language,
+                "ocr_rec_batch_size": self.ocr_rec_batch_size,
+                "preprocessing_steps": ["denoise", "deskew", "contrast"],
+            },
+            "structured": {"schema_validation": True},
+        }
 
 
 @dataclass
@@ -82,6 +120,41 @@ class DatabaseConfig:
     similarity_threshold: float = 0.85
     max_results: int = 5
     cache_ttl_minutes: int = 30
+    neighbor_window: int = 1  # chunks on each side of a hit added to the context
+    context_token_budget: int = 2048  # per retrieved context, well inside num_ctx
+    extraction_retrieval: bool = True  # send each extraction section only its retrieved context
+    fingerprint_store_path: Path = Path("./cache/fingerprints.sqlite3")
+    ingest_batch_size: int = 64  # chunks embedded and upserted per batch
+    ingest_queue_size: int = 8  # pages / batches buffered between ingestion stages
+
+
+@dataclass
+class JobConfig:
+    """Configuration for background jobs"""
+
+    max_workers: int = 2
+    store_path: Path = Path("./jobs/jobs.sqlite3")
+    upload_dir: Path = Path("./jobs/uploads")
+
+
+@dataclass
+class ResponseCacheConfig:
+    """Configuration for the LLM response cache"""
+
+    enabled: bool = True
+    path: Path = Path("./cache/llm_responses.sqlite3")
+    ttl_seconds: int = 7 * 24 * 3600
+    max_entries: int = 5000
+    max_bytes: int = 200 * 1024 * 1024
+
+
+@dataclass
+class ArtifactConfig:
+    """Configuration for the extraction artifact store"""
+
+    enabled: bool = True
+    path: Path = Path("./cache/artifacts")
+    compression_level: int = 6
 
 
 class Config:
@@ -100,10 +173,29 @@ class Config:
     _current_model: Optional[ModelConfig] = None
     _current_model_type: ModelType = ModelType.LLAMA_3_1
     _model_instances: Dict[ModelType, Any] = {}
+    _structured_model_instances: Dict[Tuple[ModelType, str], Any] = {}
+
+    # Generation options shared by all model instances
+    MODEL_OPTIONS: Dict[str, Any] = {
+        "temperature": 0.9,
+        "num_ctx": 4096,
+    }
+
+    # Ollama output format for extraction: "schema" constrains answers to a JSON
+    # schema built from each section's fields (Ollama >= 0.5), "json" to any
+    # JSON object, None leaves the output free
+    EXTRACTION_OUTPUT_FORMAT: Optional[str] = "schema"
+    # Read fixed-shape fields (dates, amounts, notice days) with patterns before the LLM
+    RULE_EXTRACTION = True
 
     # Processing configuration
     PROCESSOR_CONFIG = ProcessorConfig()
 
+    # Concurrent LLM calls within an analysis pipeline
+    PARALLEL_ANALYSIS = True
+    MAX_PARALLEL_LLM_CALLS = 4  # per model, keep <= OLLAMA_NUM_PARALLEL
+    LLM_EXECUTOR_THREADS = 16
+
     # Agent building configuration
     AGENT_BUILD_CONFIG = AgentBuildConfig(
         required_capabilities={
@@ -113,14 +205,18 @@ class Config:
         }
     )
 
-    SAVE_PROCESSED_TEXT = True
-    SAVE_PROCESSED_TEXT_DIR = Path(
-        "/home/ajay/LLM-Agents/server/python/processed_files"
-    )
+    # Extraction artifact store configuration
+    ARTIFACT_CONFIG = ArtifactConfig()
 
     # Database configuration
     DATABASE_CONFIG = DatabaseConfig()
 
+    # Background job configuration
+    JOB_CONFIG = JobConfig()
+
+    # LLM response cache configuration
+    RESPONSE_CACHE_CONFIG = ResponseCacheConfig()
+
     # Available models configuration
     AVAILABLE_MODELS = {
         ModelType.LLAMA_3_2_VISION: ModelConfig(
@@ -196,6 +292,8 @@ class Config:
             # Clean up old model instance
             if cls._current_model_type in cls._model_instances:
                 del cls._model_instances[cls._current_model_type]
+                for key in [k for k in cls._structured_model_instances if k[0] == cls._current_model_type]:
+                    del cls._structured_model_instances[key]
                 gc.collect()
                 logging.info(f"Cleaned up model: {cls._current_model_type.value}")
 
@@ -210,15 +308,29 @@ class Config:
             raise
 
     @classmethod
-    def get_model_instance(cls, model_type: ModelType) -> Any:
-        """Get or create model instance with caching"""
+    def get_model_instance(cls, model_type: ModelType, response_format: Optional[Any] = None) -> Any:
+        """
+        Get or create model instance with caching
+
+        Args:
+            model_type: Model to use
+            response_format: Optional Ollama output format, "json" or a JSON
+                schema; instances are cached per format
+        """
+        if response_format is not None:
+            key = (model_type, json.dumps(response_format, sort_keys=True))
+            if key not in cls._structured_model_instances:
+                config = cls.AVAILABLE_MODELS[model_type]
+                cls._structured_model_instances[key] = cls._create_model_instance(config, response_format)
+            return cls._structured_model_instances[key]
+
         if model_type not in cls._model_instances:
             config = cls.AVAILABLE_MODELS[model_type]
             cls._model_instances[model_type] = cls._create_model_instance(config)
         return cls._model_instances[model_type]
 
     @staticmethod
-    def _create_model_instance(config: ModelConfig) -> Any:
+    def _create_model_instance(config: ModelConfig, response_format: Optional[Any] = None) -> Any:
         """Create new model instance using Ollama"""
         from phi.model.ollama import Ollama
 
@@ -226,10 +338,9 @@ class Config:
         
         return Ollama(
             id=config.name.lower(),
-            config={
-                "temperature": 0.9,
-                "num_ctx": 4096,
-            },
+            config=dict(Config.MODEL_OPTIONS),
+            # Passed through to ollama.chat(format=...), which accepts a schema as well as "json"
+            request_params={"format": response_format} if response_format is not None else None,
         )
 
     @staticmethod
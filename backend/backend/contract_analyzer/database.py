@@ -1,39 +1,104 @@
-import chromadb
-import tiktoken
-from sentence_transformers import SentenceTransformer
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Union
+from bisect import bisect_right
+from datetime import datetime
 import logging
 from functools import lru_cache
 import os
 import re
-from chromadb.utils import embedding_functions
+import threading
 from contract_analyzer.config import Config
-from Doc_Processor.processors.text_pre_processor import process_agreement
+from Doc_Processor.processors.text_pre_processor import process_agreement, split_text_into_token_chunks
 
 logger = logging.getLogger(__name__)
 
 import re
 
-    
+CONTENT_PREFIX = "content: "
+
+
+class VectorDBRegistry:
+    """
+    Process-wide registry for the Chroma client and embedding function.
+
+    Opening the persistent client and loading the sentence-transformer model
+    are the expensive parts of a VectorDB, so they are created once per
+    process and shared. VectorDB instances stay cheap and keep their own
+    active collection, so concurrent requests do not interfere.
+    """
+
+    EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+    _lock = threading.RLock()
+    _client = None
+    _embedding_fn = None
+
+    @classmethod
+    def get_client(cls):
+        """Get the shared Chroma client, opening it on first use"""
+        if cls._client is None:
+            with cls._lock:
+                if cls._client is None:
+                    import chromadb
+
+                    db_path = str(Config.CHROMA_DB_PATH)
+                    os.makedirs(db_path, exist_ok=True)
+                    cls._client = chromadb.PersistentClient(path=db_path)
+                    logger.info(f"Opened Chroma client at: {db_path}")
+        return cls._client
+
+    @classmethod
+    def get_embedding_fn(cls):
+        """Get the shared embedding function, loading the model on first use"""
+        if cls._embedding_fn is None:
+            with cls._lock:
+                if cls._embedding_fn is None:
+                    from chromadb.utils import embedding_functions
+
+                    cls._embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
+                        model_name=cls.EMBEDDING_MODEL_NAME
+                    )
+                    logger.info(f"Loaded embedding model: {cls.EMBEDDING_MODEL_NAME}")
+        return cls._embedding_fn
+
+    @classmethod
+    def is_warm(cls) -> bool:
+        """Check whether client and embedding model are loaded"""
+        return cls._client is not None and cls._embedding_fn is not None
+
+    @classmethod
+    def warm(cls) -> None:
+        """Eagerly open the client and load the embedding model"""
+        cls.get_client()
+        cls.get_embedding_fn()
+
+    @classmethod
+    def close(cls) -> None:
+        """Release the shared client and embedding model"""
+        with cls._lock:
+            client, cls._client = cls._client, None
+            cls._embedding_fn = None
+            if client is not None:
+                try:
+                    client.clear_system_cache()
+                except Exception as e:
+                    logger.warning(f"Chroma client shutdown failed: {str(e)}")
+            logger.info("Closed shared vector database resources")
+
+
 class VectorDB:
     """Core vector database operations"""
 
     def __init__(self):
         """Initialize database components"""
+        self.logger = logging.getLogger(__name__)
         self.active_collection = None
         self._init_components()
-        self.logger = logging.getLogger(__name__)
 
     def _init_components(self):
-        """Initialize required database components"""
+        """Bind to the process-wide client and embedding function"""
         try:
-            db_path = str(Config.CHROMA_DB_PATH)
-            os.makedirs(db_path, exist_ok=True)
-            
-            self.client = chromadb.PersistentClient(path=db_path)
-            self.embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
-    )
+            self.client = VectorDBRegistry.get_client()
+            self.embedding_fn = VectorDBRegistry.get_embedding_fn()
             
         except Exception as e:
             self.logger.error(f"VectorDB initialization failed: {str(e)}")
@@ -76,7 +141,10 @@ class VectorDB:
                 logging.info(f"Created new collection: {safe_name}")
                 self.logger.info(f"Created new collection: {safe_name}")
             else:
-                self.active_collection = self.client.get_collection(name=safe_name)
+                self.active_collection = self.client.get_collection(
+                    name=safe_name,
+                    embedding_function=self.embedding_fn
+                    )
                 self.logger.info(f"Using existing collection: {safe_name}")
             return True
             
@@ -114,15 +182,18 @@ class VectorDB:
     
     def add_documents(
         self, 
-        texts: str,
+        texts: Union[str, List[str]],
         use_llm: bool = False,
+        page_starts: Optional[List[Tuple[int, int]]] = None,
     ) -> bool:
         """
         Add documents to the active collection
         
         Args:
-            docs: List of documents to add
-            metadatas: Optional metadata for each document
+            texts: Document text, or list of texts joined as paragraphs
+            use_llm: Split into sections with the LLM instead of token chunks
+            page_starts: Optional (char_offset, page_number) pairs, ascending,
+                used to record the page of each chunk
             
         Returns:
             Success status
@@ -132,6 +203,9 @@ class VectorDB:
             self.logger.error("No active collection")
             return False
             
+        if isinstance(texts, list):
+            texts = "\n\n".join(texts)
+
         try:
             
             if use_llm:
@@ -158,23 +232,30 @@ class VectorDB:
                 return True
             
             else:
-                # Get chunks from process_agreement
-                chunks = process_agreement(texts, use_llm=use_llm, chunk_size=5000)
+                # Token-budgeted chunks with their position in the document
+                chunks = split_text_into_token_chunks(
+                    texts,
+                    chunk_size=Config.PROCESSOR_CONFIG.chunk_size,
+                    chunk_overlap=Config.PROCESSOR_CONFIG.chunk_overlap,
+                    encoding_name=Config.ENCODING_NAME,
+                )
                 
                 print(f"********Adding {len(chunks)} chunks to collection")
                 
-                # Generate unique IDs for each chunk
-                chunk_ids = [f"chunk_{i}" for i in range(len(chunks))]
-                
-                # Format documents with content prefix
-                documents = [f"content: {chunk}" for chunk in chunks]
-                
-                # Add chunks to collection
-                self.active_collection.add(
-                    ids=chunk_ids,
-                    documents=documents,
+                # Embed in batches; batches committed by an interrupted run are skipped
+                batch_size = Config.DATABASE_CONFIG.ingest_batch_size
+                metadatas = self._prepare_batch_metadata(
+                    chunks, page_starts, total_chunks=len(chunks)
                 )
+                resumed = 0
+                for start in range(0, len(chunks), batch_size):
+                    resumed += self._upsert_uncommitted(
+                        chunks[start:start + batch_size], start, metadatas[start:start + batch_size]
+                    )
+                self.trim_chunks(len(chunks))
                 
+                if resumed:
+                    self.logger.info(f"Resumed after {resumed} already committed chunks")
                 self.logger.info(f"Added {len(chunks)} chunks to collection")
                 print("********Chunks added")
                 return True
@@ -183,6 +264,96 @@ class VectorDB:
             self.logger.error(f"Document addition failed: {str(e)}")
             return False
 
+    def add_chunks(
+        self,
+        chunks: List[Dict[str, Any]],
+        start_index: int,
+        page_starts: Optional[List[Tuple[int, int]]] = None,
+    ) -> bool:
+        """
+        Upsert one batch of pre-split chunks into the active collection
+
+        Used by streaming ingestion, where the total number of chunks is not
+        known yet, so chunk metadata carries no total_chunks.
+        
+        Args:
+            chunks: Chunks from the token chunker, with document offsets
+            start_index: Position of the first chunk in the document
+            page_starts: (char_offset, page_number) pairs seen so far
+            
+        Returns:
+            Success status
+        """
+        if not self.active_collection:
+            self.logger.error("No active collection")
+            return False
+
+        try:
+            self._upsert_uncommitted(
+                chunks,
+                start_index,
+                self._prepare_batch_metadata(chunks, page_starts, start_index=start_index),
+            )
+            return True
+        except Exception as e:
+            self.logger.error(f"Chunk upsert failed: {str(e)}")
+            return False
+
+    def _upsert_uncommitted(
+        self,
+        chunks: List[Dict[str, Any]],
+        start_index: int,
+        metadatas: List[Dict[str, Any]],
+    ) -> int:
+        """
+        Embed and upsert the chunks of a batch not already stored with the same text
+
+        Chunk ids are positional, so after an interrupted ingestion the
+        chunks it committed are found by id and not embedded again.
+
+        Returns:
+            Number of chunks skipped as already committed
+        """
+        ids = [f"chunk_{start_index + i}" for i in range(len(chunks))]
+        documents = [f"{CONTENT_PREFIX}{chunk['text']}" for chunk in chunks]
+
+        existing = self.active_collection.get(ids=ids, include=["documents"])
+        stored = dict(zip(existing['ids'], existing['documents'] or []))
+        pending = [i for i, (id_, document) in enumerate(zip(ids, documents)) if stored.get(id_) != document]
+        if pending:
+            self.active_collection.upsert(
+                ids=[ids[i] for i in pending],
+                documents=[documents[i] for i in pending],
+                metadatas=[metadatas[i] for i in pending],
+            )
+        return len(ids) - len(pending)
+
+    def trim_chunks(self, chunk_count: int) -> int:
+        """
+        Delete chunks at or past chunk_count from the active collection
+
+        Clears chunks left by an earlier, interrupted ingestion of the same
+        document that produced more chunks than this one.
+
+        Returns:
+            Number of chunks deleted
+        """
+        if not self.active_collection:
+            return 0
+        try:
+            ids = self.active_collection.get(include=[])['ids']
+            stale = [
+                id_ for id_ in ids
+                if id_.startswith("chunk_") and id_[6:].isdigit() and int(id_[6:]) >= chunk_count
+            ]
+            if stale:
+                self.active_collection.delete(ids=stale)
+                self.logger.info(f"Removed {len(stale)} stale chunks")
+            return len(stale)
+        except Exception as e:
+            self.logger.error(f"Chunk trim failed: {str(e)}")
+            return 0
+
     def get_documents(
         self, 
         ids: Optional[List[str]] = None
@@ -222,33 +393,149 @@ class VectorDB:
         Returns:
             Combined context string
         """
+        contexts = self.get_contexts([query], num_results=num_results)
+        return contexts[0] if contexts else None
+
+    def get_contexts(
+        self,
+        queries: List[str],
+        num_results: int = 3,
+        expand_neighbors: int = 0,
+        token_budget: Optional[int] = None
+    ) -> List[Optional[str]]:
+        """
+        Get relevant context for several queries with one embedding pass and one query
+
+        Retrieved chunks are reassembled in document order and adjacent
+        chunks are merged into a single passage.
+        
+        Args:
+            queries: Search queries
+            num_results: Number of results to return per query
+            expand_neighbors: Also include chunks up to this distance from each hit
+            token_budget: Optional cap on the tokens of context per query
+            
+        Returns:
+            Combined context string per query, in query order
+        """
         
         if not self.active_collection:
             print("********No active collection while getting context")
             self.logger.error("No active collection")
-            return None
+            return [None] * len(queries)
+
+        if not queries:
+            return []
             
         try:
-            
+            # Embed every query in a single batch, then issue a single query
+            query_embeddings = self.embedding_fn(list(queries))
             results = self.active_collection.query(
-                query_texts=[query],
+                query_embeddings=query_embeddings,
                 n_results=num_results,
+                include=["documents", "metadatas"],
             )
-            
-            if not results['documents'] or not results['documents'][0]:
-                return None
-            
-            chunks = results['documents'][0]
-            metadatas = results['metadatas'][0]
-            
-            sorted_results = sorted(
-                zip(chunks, metadatas))
-            
-            return "\n...\n".join(chunk for chunk, _ in sorted_results)
+
+            per_query_hits = []
+            neighbor_ids = set()
+            for chunks, metadatas in zip(results['documents'], results['metadatas']):
+                metadatas = metadatas or [None] * len(chunks)
+                if chunks and all(m and 'chunk_index' in m for m in metadatas):
+                    hits = [self._to_passage(chunk, m) for chunk, m in zip(chunks, metadatas)]
+                    neighbor_ids.update(self._neighbor_ids(hits, expand_neighbors))
+                    per_query_hits.append(hits)
+                else:
+                    per_query_hits.append(chunks)
+
+            neighbors = {}
+            if neighbor_ids:
+                fetched = self.active_collection.get(
+                    ids=sorted(neighbor_ids), include=["documents", "metadatas"]
+                )
+                for chunk, metadata in zip(fetched['documents'], fetched['metadatas']):
+                    if metadata and 'chunk_index' in metadata:
+                        passage = self._to_passage(chunk, metadata)
+                        neighbors[passage['chunk_index']] = passage
+
+            contexts = []
+            for hits in per_query_hits:
+                if not hits:
+                    contexts.append(None)
+                elif isinstance(hits[0], str):
+                    # Collections indexed without position metadata
+                    contexts.append("\n...\n".join(sorted(hits)))
+                else:
+                    selected = self._select_chunks(hits, neighbors, expand_neighbors, token_budget)
+                    contexts.append(self._assemble_passages(selected))
+            return contexts
             
         except Exception as e:
             self.logger.error(f"Context retrieval failed: {str(e)}")
-            return None
+            return [None] * len(queries)
+
+    @staticmethod
+    def _to_passage(document: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        text = document[len(CONTENT_PREFIX):] if document.startswith(CONTENT_PREFIX) else document
+        return {
+            'chunk_index': metadata['chunk_index'],
+            'total_chunks': metadata.get('total_chunks'),
+            'char_start': metadata.get('char_start'),
+            'char_end': metadata.get('char_end'),
+            'tokens': metadata.get('tokens', 0),
+            'text': text,
+        }
+
+    @staticmethod
+    def _neighbor_ids(hits: List[Dict[str, Any]], distance: int) -> List[str]:
+        ids = []
+        for hit in hits:
+            for d in range(1, distance + 1):
+                for index in (hit['chunk_index'] - d, hit['chunk_index'] + d):
+                    if 0 <= index and (hit['total_chunks'] is None or index < hit['total_chunks']):
+                        ids.append(f"chunk_{index}")
+        return ids
+
+    @staticmethod
+    def _select_chunks(
+        hits: List[Dict[str, Any]],
+        neighbors: Dict[int, Dict[str, Any]],
+        distance: int,
+        token_budget: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        """Take hits by rank, then neighbours by distance, while within the token budget"""
+        candidates = list(hits)
+        for d in range(1, distance + 1):
+            for hit in hits:
+                for index in (hit['chunk_index'] - d, hit['chunk_index'] + d):
+                    if index in neighbors:
+                        candidates.append(neighbors[index])
+
+        selected = {}
+        used = 0
+        for passage in candidates:
+            if passage['chunk_index'] in selected:
+                continue
+            if token_budget is not None and selected and used + passage['tokens'] > token_budget:
+                continue
+            selected[passage['chunk_index']] = passage
+            used += passage['tokens']
+        return list(selected.values())
+
+    @staticmethod
+    def _assemble_passages(chunks: List[Dict[str, Any]]) -> str:
+        """Order chunks by position and merge consecutive ones, dropping their overlap"""
+        passages = []
+        previous = None
+        for chunk in sorted(chunks, key=lambda c: c['chunk_index']):
+            if previous is not None and chunk['chunk_index'] == previous['chunk_index'] + 1:
+                overlap = 0
+                if previous['char_end'] is not None and chunk['char_start'] is not None:
+                    overlap = max(0, previous['char_end'] - chunk['char_start'])
+                passages[-1] += chunk['text'][overlap:] if overlap else "\n" + chunk['text']
+            else:
+                passages.append(chunk['text'])
+            previous = chunk
+        return "\n...\n".join(f"{CONTENT_PREFIX}{passage}" for passage in passages)
 
     def delete_collection(self, collection_name: str) -> bool:
         """
@@ -278,6 +565,10 @@ class VectorDB:
             self.logger.error(f"Collection deletion failed: {str(e)}")
             return False
 
+    def collection_exists(self, collection_name: str) -> bool:
+        """Check if a collection exists, sanitising the name first"""
+        return self._collection_exists(self._sanitize_collection_name(collection_name))
+
     def _collection_exists(self, collection_name: str) -> bool:
         """Check if a collection exists"""
         # print("*********Checking if collection exists")
@@ -290,29 +581,32 @@ class VectorDB:
 
     def _prepare_batch_metadata(
         self,
-        batch_start: int,
-        batch_size: int,
-        token_counts: List[int],
-        timestamp: str,
-        total_chunks: int,
-        metadatas: Optional[List[Dict[str, Any]]] = None
+        chunks: List[Dict[str, Any]],
+        page_starts: Optional[List[Tuple[int, int]]] = None,
+        start_index: int = 0,
+        total_chunks: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Prepare metadata for batch processing"""
-        if metadatas:
-            return [{
-                **metadatas[batch_start//batch_size].copy(),
-                'tokens': count,
-                'timestamp': timestamp,
-                'chunk_index': batch_start + j,
-                'total_chunks': total_chunks
-            } for j, count in enumerate(token_counts)]
-        else:
-            return [{
-                'tokens': count,
+        """Prepare position metadata for each chunk"""
+        timestamp = datetime.now().isoformat()
+        offsets = [offset for offset, _ in page_starts or []]
+        metadatas = []
+        for index, chunk in enumerate(chunks, start=start_index):
+            metadata = {
+                'chunk_index': index,
+                'char_start': chunk['char_start'],
+                'char_end': chunk['char_end'],
+                'tokens': chunk['token_count'],
                 'timestamp': timestamp,
-                'chunk_index': batch_start + j,
-                'total_chunks': total_chunks
-            } for j, count in enumerate(token_counts)]
+            }
+            if total_chunks is not None:
+                metadata['total_chunks'] = total_chunks
+            if offsets:
+                first = max(0, bisect_right(offsets, chunk['char_start']) - 1)
+                last = max(0, bisect_right(offsets, max(chunk['char_start'], chunk['char_end'] - 1)) - 1)
+                metadata['page'] = page_starts[first][1]
+                metadata['page_end'] = page_starts[last][1]
+            metadatas.append(metadata)
+        return metadatas
 
     def cleanup(self):
         """Cleanup database resources"""
@@ -0,0 +1,143 @@
+# fingerprints.py
+from typing import Dict, List, Optional, Iterator
+from dataclasses import dataclass
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import threading
+import hashlib
+import logging
+import re
+
+from Doc_Processor.storage import SQLiteStore, hash_file
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def hash_text(text: str) -> str:
+    """SHA-256 of extracted text with whitespace runs collapsed"""
+    normalised = _WHITESPACE.sub(" ", text).strip()
+    return hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+
+
+def collection_name_for(content_hash: str) -> str:
+    """Vector DB collection name for a document's content hash"""
+    return f"{Config.DATABASE_CONFIG.collection_prefix}_{content_hash[:40]}"
+
+
+@dataclass
+class DocumentFingerprint:
+    """Extracted text and index location of an ingested document"""
+    text_hash: str
+    collection_name: str
+    content: str
+    created_at: str
+
+
+class FingerprintStore(SQLiteStore):
+    """
+    SQLite index of ingested documents
+
+    Maps raw file hashes to the hash of their extracted text, and text
+    hashes to the collection holding their embeddings, so re-uploads skip
+    extraction and embedding, and re-encoded copies of the same contract
+    share one collection.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS documents (
+            text_hash TEXT PRIMARY KEY,
+            collection_name TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS files (
+            file_hash TEXT PRIMARY KEY,
+            text_hash TEXT NOT NULL REFERENCES documents (text_hash),
+            file_name TEXT,
+            created_at TEXT NOT NULL
+        )
+        """,
+    )
+
+    def __init__(self, db_path: Optional[Path] = None):
+        # Key to [lock, holders]; entries are dropped when the last holder leaves
+        self._key_locks: Dict[str, List] = {}
+        super().__init__(db_path or Config.DATABASE_CONFIG.fingerprint_store_path)
+
+    @contextmanager
+    def locked(self, key: str) -> Iterator[None]:
+        """Serialise ingestion of the same file or text within this process"""
+        # Per key rather than striped: callers nest a file lock and a text lock
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+
+    def get_by_file(self, file_hash: str) -> Optional[DocumentFingerprint]:
+        """Look up a document by the hash of its file bytes"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT d.text_hash, d.collection_name, d.content, d.created_at "
+                "FROM files f JOIN documents d ON d.text_hash = f.text_hash "
+                "WHERE f.file_hash = ?",
+                (file_hash,),
+            ).fetchone()
+        return DocumentFingerprint(*row) if row else None
+
+    def get_by_text(self, text_hash: str) -> Optional[DocumentFingerprint]:
+        """Look up a document by the hash of its extracted text"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT text_hash, collection_name, content, created_at "
+                "FROM documents WHERE text_hash = ?",
+                (text_hash,),
+            ).fetchone()
+        return DocumentFingerprint(*row) if row else None
+
+    def put(
+        self,
+        file_hash: str,
+        text_hash: str,
+        collection_name: str,
+        content: str,
+        file_name: Optional[str] = None,
+    ) -> DocumentFingerprint:
+        """Record an indexed document and the file it was extracted from"""
+        now = datetime.now().isoformat()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO documents (text_hash, collection_name, content, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (text_hash, collection_name, content, now),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO files (file_hash, text_hash, file_name, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (file_hash, text_hash, file_name, now),
+            )
+        return self.get_by_text(text_hash)
+
+    def forget(self, text_hash: str) -> None:
+        """Drop a document whose collection no longer exists"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM files WHERE text_hash = ?", (text_hash,))
+            conn.execute("DELETE FROM documents WHERE text_hash = ?", (text_hash,))
+
+
+def get_fingerprint_store() -> FingerprintStore:
+    """Process-wide fingerprint store"""
+    return FingerprintStore.shared(Config.DATABASE_CONFIG.fingerprint_store_path)
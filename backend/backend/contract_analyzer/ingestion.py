@@ -0,0 +1,173 @@
+# ingestion.py
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import threading
+import logging
+import queue
+
+from .config import Config
+from .database import VectorDB
+from Doc_Processor.processors.text_pre_processor import TokenChunkStream
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class IngestionPipeline:
+    """
+    Streams extracted pages through the chunker into the active collection
+
+    Extraction, chunking and embedding run in their own threads joined by
+    bounded queues: OCR of later pages overlaps with embedding of earlier
+    ones, a slow stage blocks the stages feeding it, and only the page text
+    (never OCR boxes) is kept once a page has been chunked.
+    """
+
+    def __init__(
+        self,
+        vector_db: VectorDB,
+        batch_size: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        self.vector_db = vector_db
+        self.batch_size = batch_size or Config.DATABASE_CONFIG.ingest_batch_size
+        self.queue_size = queue_size or Config.DATABASE_CONFIG.ingest_queue_size
+        self._stop = threading.Event()
+        self._errors: List[Exception] = []
+
+    def run(self, pages: Iterable[Dict[str, Any]]) -> Tuple[str, List[Tuple[int, int]], int]:
+        """
+        Ingest pages into the active collection as they are produced
+
+        Args:
+            pages: Page dicts with 'text' and 'page', in document order
+
+        Returns:
+            Tuple of (document text, (char_offset, page_number) pairs, chunk count)
+        """
+        page_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        batch_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        producer = threading.Thread(
+            target=self._produce, args=(pages, page_queue), name="ingest-extract", daemon=True
+        )
+        embedder = threading.Thread(
+            target=self._embed, args=(batch_queue,), name="ingest-embed", daemon=True
+        )
+        producer.start()
+        embedder.start()
+        try:
+            result = self._chunk(page_queue, batch_queue)
+        except Exception as e:
+            self._fail(e)
+            raise
+        finally:
+            embedder.join()
+            producer.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return result
+
+    def _produce(self, pages: Iterable[Dict[str, Any]], page_queue: queue.Queue) -> None:
+        """Extraction stage: pull pages from the processor"""
+        iterator = iter(pages)
+        try:
+            for page in iterator:
+                if not self._put(page_queue, (page.get("text") or "", page.get("page"))):
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            self._put(page_queue, _DONE)
+
+    def _chunk(
+        self, page_queue: queue.Queue, batch_queue: queue.Queue
+    ) -> Tuple[str, List[Tuple[int, int]], int]:
+        """Chunking stage: join pages like process_content_with_pages and cut chunks"""
+        chunker = TokenChunkStream(
+            chunk_size=Config.PROCESSOR_CONFIG.chunk_size,
+            chunk_overlap=Config.PROCESSOR_CONFIG.chunk_overlap,
+            encoding_name=Config.ENCODING_NAME,
+        )
+        parts: List[str] = []
+        page_starts: List[Tuple[int, int]] = []
+        offset = 0
+        batch: List[Dict[str, Any]] = []
+        next_index = 0
+
+        def flush() -> bool:
+            nonlocal batch, next_index
+            if not batch:
+                return True
+            sent = self._put(batch_queue, (next_index, batch, list(page_starts)))
+            next_index += len(batch)
+            batch = []
+            return sent
+
+        while True:
+            item = self._get(page_queue)
+            if item is _DONE:
+                break
+            text, page = item
+            # The document text is stripped, so drop leading whitespace of the first page
+            text = text if parts else text.lstrip()
+            if not text:
+                continue
+
+            piece = "\n" + text if parts else text
+            if page is not None:
+                page_starts.append((offset + len(piece) - len(text), page))
+            parts.append(piece)
+            offset += len(piece)
+
+            for chunk in chunker.feed(piece):
+                batch.append(chunk)
+                if len(batch) >= self.batch_size and not flush():
+                    break
+
+        if not self._stop.is_set():
+            batch.extend(chunker.finish())
+            flush()
+        self._put(batch_queue, _DONE)
+        return "".join(parts).rstrip(), page_starts, next_index
+
+    def _embed(self, batch_queue: queue.Queue) -> None:
+        """Embedding stage: embed and upsert chunk batches"""
+        try:
+            while True:
+                item = self._get(batch_queue)
+                if item is _DONE:
+                    return
+                start_index, chunks, page_starts = item
+                if not self.vector_db.add_chunks(chunks, start_index, page_starts):
+                    raise RuntimeError("Failed to add chunks to vector DB")
+                logger.info(f"Indexed chunks {start_index}-{start_index + len(chunks) - 1}")
+        except Exception as e:
+            self._fail(e)
+
+    def _fail(self, error: Exception) -> None:
+        self._errors.append(error)
+        self._stop.set()
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        """Blocking put that gives up once another stage has failed"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        """Blocking get that returns _DONE once another stage has failed"""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
@@ -0,0 +1,305 @@
+# jobs.py
+from typing import Dict, Any, Optional, Callable, List
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from enum import Enum
+import contextvars
+import threading
+import logging
+import json
+import uuid
+
+from Doc_Processor.storage import SQLiteStore
+from .config import Config, JobConfig
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(Enum):
+    """Lifecycle states of a background job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINAL_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+@dataclass
+class Job:
+    """Background job record"""
+    job_id: str
+    kind: str
+    status: JobStatus
+    payload: Dict[str, Any]
+    created_at: str
+    updated_at: str
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+    def to_dict(self, include_result: bool = False) -> Dict[str, Any]:
+        """Convert to API-friendly dictionary"""
+        data = asdict(self)
+        data['status'] = self.status.value
+        data.pop('payload')
+        if not include_result:
+            data.pop('result')
+        return data
+
+
+class JobStore(SQLiteStore):
+    """SQLite-backed persistent job store"""
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """,
+    )
+
+    def create(self, kind: str, payload: Dict[str, Any], job_id: Optional[str] = None) -> Job:
+        """Insert a new queued job"""
+        now = datetime.now().isoformat()
+        job = Job(
+            job_id=job_id or uuid.uuid4().hex,
+            kind=kind,
+            status=JobStatus.QUEUED,
+            payload=payload,
+            created_at=now,
+            updated_at=now,
+        )
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, status, payload, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job.job_id, kind, job.status.value, json.dumps(payload), now, now),
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get job by ID"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT job_id, kind, status, payload, result, error, created_at, updated_at "
+                "FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def update(
+        self,
+        job_id: str,
+        status: JobStatus,
+        result: Optional[Any] = None,
+        error: Optional[str] = None,
+        expected: Optional[List[JobStatus]] = None,
+    ) -> bool:
+        """
+        Update job status, optionally only when it is in an expected state
+
+        Returns:
+            True if a row was updated
+        """
+        query = "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE job_id = ?"
+        params = [
+            status.value,
+            json.dumps(result) if result is not None else None,
+            error,
+            datetime.now().isoformat(),
+            job_id,
+        ]
+        if expected:
+            query += f" AND status IN ({', '.join('?' for _ in expected)})"
+            params.extend(s.value for s in expected)
+
+        with self._lock, self._connect() as conn:
+            return conn.execute(query, params).rowcount > 0
+
+    def list_by_status(self, statuses: List[JobStatus]) -> List[Job]:
+        """List jobs in any of the given states, oldest first"""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id, kind, status, payload, result, error, created_at, updated_at "
+                f"FROM jobs WHERE status IN ({', '.join('?' for _ in statuses)}) "
+                "ORDER BY created_at",
+                [s.value for s in statuses],
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    @staticmethod
+    def _row_to_job(row: tuple) -> Job:
+        job_id, kind, status, payload, result, error, created_at, updated_at = row
+        return Job(
+            job_id=job_id,
+            kind=kind,
+            status=JobStatus(status),
+            payload=json.loads(payload),
+            result=json.loads(result) if result is not None else None,
+            error=error,
+            created_at=created_at,
+            updated_at=updated_at,
+        )
+
+
+class JobManager:
+    """Runs jobs on a bounded worker pool and tracks them in a JobStore"""
+
+    def __init__(self, config: Optional[JobConfig] = None):
+        self.config = config or Config.JOB_CONFIG
+        self.store = JobStore(self.config.store_path)
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._cleanups: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.logger = logging.getLogger(__name__)
+
+    def register_handler(
+        self,
+        kind: str,
+        handler: Callable[[Dict[str, Any]], Any],
+        cleanup: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> None:
+        """
+        Register the function that executes jobs of a given kind
+
+        Args:
+            kind: Job kind
+            handler: Called with the payload to run a job
+            cleanup: Called with the payload of a job that will never run
+                (cancelled while queued), to release what was staged for it
+        """
+        self._handlers[kind] = handler
+        if cleanup is not None:
+            self._cleanups[kind] = cleanup
+
+    def start(self) -> None:
+        """Start the worker pool and resume jobs left over from a previous run"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config.max_workers,
+                thread_name_prefix="job-worker",
+            )
+
+        pending = self.store.list_by_status([JobStatus.QUEUED, JobStatus.RUNNING])
+        for job in pending:
+            self.store.update(job.job_id, JobStatus.QUEUED)
+            self._schedule(job)
+        if pending:
+            self.logger.info(f"Resumed {len(pending)} unfinished jobs")
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stop the worker pool
+
+        Queued jobs stay queued in the store and are resumed on next start.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._futures.clear()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def submit(self, kind: str, payload: Dict[str, Any], job_id: Optional[str] = None) -> Job:
+        """
+        Persist and schedule a new job
+
+        Args:
+            kind: Registered handler name
+            payload: JSON-serialisable handler arguments
+            job_id: Optional pre-generated job ID
+
+        Returns:
+            The queued job
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = self.store.create(kind, payload, job_id=job_id)
+        self._schedule(job)
+        return job
+
+    def get_future(self, job_id: str) -> Optional[Future]:
+        """Get the in-process future for a scheduled job"""
+        with self._lock:
+            return self._futures.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get job record"""
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job
+
+        Queued jobs are never started. Running jobs cannot be interrupted,
+        but are marked cancelled and their result is discarded.
+        """
+        job = self.store.get(job_id)
+        if job is None or job.status in FINAL_STATUSES:
+            return job
+
+        future = self.get_future(job_id)
+        # A scheduled future that could not be cancelled still reaches _run, which cleans up when it skips
+        unscheduled = future is None or future.cancel()
+        if self.store.update(job_id, JobStatus.CANCELLED, expected=[JobStatus.QUEUED]):
+            if unscheduled:
+                self._cleanup(job)
+        else:
+            self.store.update(job_id, JobStatus.CANCELLED, expected=[JobStatus.RUNNING])
+        return self.store.get(job_id)
+
+    def _schedule(self, job: Job) -> None:
+        with self._lock:
+            if self._executor is None:
+                raise RuntimeError("Job manager is not started")
+            # Jobs run in the submitter's context (e.g. a streaming client's event sink)
+            future = self._executor.submit(contextvars.copy_context().run, self._run, job)
+            self._futures[job.job_id] = future
+        future.add_done_callback(lambda _: self._forget(job.job_id))
+
+    def _forget(self, job_id: str) -> None:
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _cleanup(self, job: Job) -> None:
+        cleanup = self._cleanups.get(job.kind)
+        if cleanup is None:
+            return
+        try:
+            cleanup(job.payload)
+        except Exception as e:
+            self.logger.error(f"Cleanup of job {job.job_id} failed: {str(e)}")
+
+    def _run(self, job: Job) -> Any:
+        if not self.store.update(job.job_id, JobStatus.RUNNING, expected=[JobStatus.QUEUED]):
+            self.logger.info(f"Skipping job {job.job_id}: no longer queued")
+            self._cleanup(job)
+            return None
+
+        try:
+            result = self._handlers[job.kind](job.payload)
+        except Exception as e:
+            self.logger.error(f"Job {job.job_id} failed: {str(e)}")
+            self.store.update(
+                job.job_id, JobStatus.FAILED, error=str(e), expected=[JobStatus.RUNNING]
+            )
+            raise
+
+        # A cancel request that arrived mid-run wins over the result
+        self.store.update(
+            job.job_id, JobStatus.SUCCEEDED, result=result, expected=[JobStatus.RUNNING]
+        )
+        return result
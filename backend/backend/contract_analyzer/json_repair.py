@@ -0,0 +1,110 @@
+# json_repair.py
+from typing import Dict, Any, Optional, Sequence, Iterator
+import json
+import re
+
+_FENCE = re.compile(r"```(?:json)?", re.IGNORECASE)
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_PYTHON_LITERALS = re.compile(r"(?<=[:\[,\s])(None|True|False)(?=\s*[,}\]])")
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+# A value ending one line and a key starting the next, without the comma between them
+_MISSING_COMMA = re.compile(r'(["\d}\]]|true|false|null)(\s*\n\s*)(")')
+_DANGLING_KEY = re.compile(r',?\s*"[^"]*"\s*:\s*$')
+_KEY_LINE = re.compile(r'^[\s\-*"\']*(.+?)["\']?\s*:\s*(.*?)\s*,?\s*$')
+
+
+def repair_json(text: str, keys: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Parse a model's JSON object answer, fixing common defects without another LLM call
+
+    Handles code fences, prose around the object, smart and single quotes,
+    Python literals, raw newlines in strings, missing and trailing commas
+    and output cut off before the closing braces. As a last resort, with
+    keys given, "Key: value" lines for those keys are read instead.
+
+    Returns:
+        The parsed object, None if the text cannot be recovered
+    """
+    if not text:
+        return None
+    for candidate in _candidates(text):
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            return value
+        # Some models answer with one object per field
+        if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+            merged = {}
+            for item in value:
+                merged.update(item)
+            return merged
+    return _parse_key_lines(text, keys) if keys else None
+
+
+def _candidates(text: str) -> Iterator[str]:
+    text = _FENCE.sub("", text).strip()
+    yield text
+
+    start = text.find("{")
+    if start < 0:
+        return
+    end = text.rfind("}")
+    body = text[start:end + 1] if end > start else text[start:]
+    yield body
+
+    fixed = body.translate(_SMART_QUOTES)
+    if '"' not in fixed:
+        fixed = fixed.replace("'", '"')
+    fixed = _PYTHON_LITERALS.sub(lambda m: {"None": "null", "True": "true", "False": "false"}[m.group(1)], fixed)
+    fixed = _close(fixed)
+    fixed = _MISSING_COMMA.sub(r"\1,\2\3", fixed)
+    yield _TRAILING_COMMA.sub(r"\1", fixed)
+
+
+def _close(text: str) -> str:
+    """Escape raw control characters inside strings and close whatever was left open"""
+    out = []
+    stack = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n"
+            elif char == "\t":
+                char = "\\t"
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+        out.append(char)
+
+    if not in_string and not stack:
+        return "".join(out)
+
+    # Truncated: finish the open string, drop a key left without a value, close the rest
+    closed = "".join(out) + ('"' if in_string else "")
+    closed = _DANGLING_KEY.sub("", closed).rstrip().rstrip(",")
+    return closed + "".join(reversed(stack))
+
+
+def _parse_key_lines(text: str, keys: Sequence[str]) -> Optional[Dict[str, Any]]:
+    by_name = {key.strip().lower(): key for key in keys}
+    found = {}
+    for line in text.splitlines():
+        match = _KEY_LINE.match(line)
+        if not match:
+            continue
+        key = by_name.get(match.group(1).strip().strip("\"'").lower())
+        if key is not None:
+            found[key] = match.group(2).strip().strip("\"'")
+    return found or None
@@ -0,0 +1,101 @@
+# parallel.py
+from typing import Dict, Any, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import threading
+import logging
+
+from .config import Config, ModelType
+
+logger = logging.getLogger(__name__)
+
+
+class ParallelRunner:
+    """Runs independent LLM calls concurrently, bounded per model"""
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _semaphores: Dict[ModelType, threading.BoundedSemaphore] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=Config.LLM_EXECUTOR_THREADS,
+                    thread_name_prefix="llm-call",
+                )
+            return cls._executor
+
+    @classmethod
+    def _get_semaphore(cls, model_type: ModelType) -> threading.BoundedSemaphore:
+        with cls._lock:
+            if model_type not in cls._semaphores:
+                cls._semaphores[model_type] = threading.BoundedSemaphore(
+                    Config.MAX_PARALLEL_LLM_CALLS
+                )
+            return cls._semaphores[model_type]
+
+    @classmethod
+    def run_all(
+        cls,
+        tasks: Dict[str, Callable[[], Any]],
+        model_type: Optional[ModelType] = None,
+        on_result: Optional[Callable[[str, Any], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run independent tasks and collect their results
+
+        Args:
+            tasks: Mapping of result key to zero-argument callable
+            model_type: Model the tasks call, used for the concurrency limit
+            on_result: Called with (key, result) as each task finishes
+
+        Returns:
+            Results keyed like tasks, in the same order. Failed tasks map to None.
+        """
+        report_lock = threading.Lock()
+
+        def run(key: str, task: Callable[[], Any]) -> Any:
+            result = cls._run_task(key, task)
+            if on_result is not None:
+                # Serialised so callbacks can keep simple progress counters
+                with report_lock:
+                    try:
+                        on_result(key, result)
+                    except Exception as e:
+                        logger.warning(f"Result callback for '{key}' failed: {str(e)}")
+            return result
+
+        if not Config.PARALLEL_ANALYSIS or len(tasks) <= 1:
+            return {key: run(key, task) for key, task in tasks.items()}
+
+        semaphore = cls._get_semaphore(model_type or Config._current_model_type)
+
+        def bounded(key: str, task: Callable[[], Any]) -> Any:
+            with semaphore:
+                return run(key, task)
+
+        executor = cls._get_executor()
+        # Carry request-scoped settings (e.g. cache bypass) into the worker threads
+        futures = {
+            key: executor.submit(contextvars.copy_context().run, bounded, key, task)
+            for key, task in tasks.items()
+        }
+        return {key: future.result() for key, future in futures.items()}
+
+    @staticmethod
+    def _run_task(key: str, task: Callable[[], Any]) -> Any:
+        try:
+            return task()
+        except Exception as e:
+            logger.error(f"Parallel task '{key}' failed: {str(e)}")
+            return None
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Stop the shared executor"""
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
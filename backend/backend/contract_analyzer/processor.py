@@ -38,16 +38,17 @@ class ContractMetadata:
 class ContractProcessor:
     """Enhanced contract processor with negotiation capabilities"""
     
-    def __init__(self, vector_db: VectorDB, config: Optional[ProcessorConfig] = None):
+    def __init__(self, vector_db: Optional[VectorDB] = None, config: Optional[ProcessorConfig] = None):
         """
         Initialize the contract processor.
         
         Args:
-            vector_db: Vector database instance
+            vector_db: Optional vector database instance, defaults to one
+                bound to the process-wide client and embedding model
             config: Optional processing configuration
         """
         self.config = config or Config.PROCESSOR_CONFIG
-        self.vector_db = vector_db
+        self.vector_db = vector_db or VectorDB()
         self.doc_handler = self._initialize_handler()
         self.logger = logging.getLogger(__name__)
 
@@ -55,23 +56,8 @@ class ContractProcessor:
     def _initialize_handler(self) -> DocumentHandler:
         """Initialize document handler with configuration"""
         try:
-            processor_config = {
-                'pdf': {
-                    'ocr_enabled': self.config.ocr_enabled,
-                    'language': self.config.language,
-                    'dpi': self.config.dpi
-                },
-                'image': {
-                    'ocr_language': self.config.language,
-                    'preprocessing_steps': ['denoise', 'deskew', 'contrast']
-                },
-                'structured': {
-                    'schema_validation': True
-                }
-            }
-            
             # Validate configuration
-            validated_config = validate_config(processor_config)
+            validated_config = validate_config(self.config.handler_config())
             return DocumentHandler(validated_config)
             
         except Exception as e:
@@ -0,0 +1,236 @@
+# response_cache.py
+from typing import Dict, Any, Optional, List, Iterator
+from dataclasses import dataclass
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import hashlib
+import sqlite3
+import logging
+import json
+import time
+
+from Doc_Processor.storage import SQLiteStore
+from .config import Config, ResponseCacheConfig
+
+logger = logging.getLogger(__name__)
+
+# Set per request to force fresh answers; copied into worker threads by ParallelRunner
+_bypass_cache: ContextVar[bool] = ContextVar("bypass_response_cache", default=False)
+
+
+@contextmanager
+def bypass_response_cache(bypass: bool = True):
+    """Skip cache lookups (results are still stored) within this context"""
+    token = _bypass_cache.set(bypass)
+    try:
+        yield
+    finally:
+        _bypass_cache.reset(token)
+
+
+@dataclass
+class CachedRunResponse:
+    """Minimal stand-in for phi's RunResponse when served from cache"""
+    content: Any
+    cached: bool = True
+
+
+class ResponseCache(SQLiteStore):
+    """SQLite-backed LLM response cache with TTL and LRU size bounds"""
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            content TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)",
+    )
+
+    def __init__(self, config: Optional[ResponseCacheConfig] = None):
+        self.config = config or Config.RESPONSE_CACHE_CONFIG
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        super().__init__(self.config.path)
+
+    @staticmethod
+    def make_key(
+        model: str,
+        model_options: Dict[str, Any],
+        name: str,
+        role: str,
+        instructions: List[str],
+        prompt: str,
+    ) -> str:
+        """Content-addressed key for a model call"""
+        payload = {
+            "model": model,
+            "options": model_options,
+            "name": name,
+            "role": role,
+            "instructions": list(instructions or []),
+            "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached response, None if missing or expired"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT content, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.config.ttl_seconds:
+                conn.execute(
+                    "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+                )
+                self.hits += 1
+                return row[0]
+            if row:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, key: str, model: str, content: str) -> None:
+        """Store a response and evict expired and least recently used entries"""
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, content, size, now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.config.ttl_seconds,)
+        )
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.config.max_entries and total <= self.config.max_bytes:
+            return
+
+        rows = conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ).fetchall()
+        evict = []
+        for key, size in rows:
+            if count <= self.config.max_entries and total <= self.config.max_bytes:
+                break
+            evict.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", evict)
+
+    def clear(self) -> None:
+        """Remove all cached responses"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and storage usage"""
+        count, total = self._fetchone("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses")
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total,
+            "max_entries": self.config.max_entries,
+            "max_bytes": self.config.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CachedAgent:
+    """Wraps a phi Agent so identical runs are answered from the response cache"""
+
+    def __init__(self, agent: Any, cache: ResponseCache, model_options: Dict[str, Any]):
+        self._agent = agent
+        self._cache = cache
+        self._model_options = model_options
+
+    def __getattr__(self, name: str) -> Any:
+        # name, role, model, memory, ... of the wrapped agent
+        return getattr(self._agent, name)
+
+    def run(self, message: Any = None, *args, **kwargs) -> Any:
+        # Non-text messages go straight to the model
+        if args or not isinstance(message, str):
+            return self._agent.run(message, *args, **kwargs)
+
+        key = self._make_key(message)
+        if kwargs.get("stream"):
+            return self._run_stream(key, message, **kwargs)
+
+        content = self._lookup(key)
+        if content is not None:
+            return CachedRunResponse(content=content)
+
+        response = self._agent.run(message, **kwargs)
+        self._store(key, getattr(response, "content", None))
+        return response
+
+    def _run_stream(self, key: str, message: str, **kwargs) -> Iterator[Any]:
+        """Stream a run, replaying a cached answer as a single chunk"""
+        content = self._lookup(key)
+        if content is not None:
+            yield CachedRunResponse(content=content)
+            return
+
+        parts = []
+        for chunk in self._agent.run(message, **kwargs):
+            delta = getattr(chunk, "content", None)
+            if isinstance(delta, str):
+                parts.append(delta)
+            yield chunk
+        self._store(key, "".join(parts))
+
+    def _make_key(self, message: str) -> str:
+        return ResponseCache.make_key(
+            model=self._agent.model.id,
+            model_options=self._model_options,
+            name=self._agent.name,
+            role=self._agent.role,
+            instructions=self._agent.instructions,
+            prompt=message,
+        )
+
+    def _lookup(self, key: str) -> Optional[str]:
+        if _bypass_cache.get():
+            self._cache.bypassed += 1
+            return None
+        return self._cache.get(key)
+
+    def _store(self, key: str, content: Any) -> None:
+        if isinstance(content, str) and content:
+            try:
+                self._cache.put(key, self._agent.model.id, content)
+            except Exception as e:
+                logger.warning(f"Failed to cache response: {str(e)}")
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache"""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
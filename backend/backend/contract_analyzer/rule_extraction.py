@@ -0,0 +1,281 @@
+# rule_extraction.py
+from typing import Dict, Optional, List, Tuple, Iterator
+from dataclasses import dataclass
+from collections import Counter
+import re
+
+
+@dataclass(frozen=True)
+class RuleMatch:
+    """Field value found by a pattern, with its character offsets in the contract"""
+    value: str
+    span: Tuple[int, int]
+    rule: str
+
+    @property
+    def resolved(self) -> bool:
+        """
+        Whether the value settles the field without asking the model
+
+        Only values read next to their label in agreement wording ("this
+        Agreement shall expire on ...") are. Counts, majority currency and
+        notice periods are inferred and only suggested to the model.
+        """
+        return self.rule.startswith("labelled:")
+
+
+_MONTHS = (
+    r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?|"
+    r"Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\.?"
+)
+DATE = (
+    rf"(?:\d{{1,2}}(?:st|nd|rd|th)?(?:\s+day\s+of)?\s+{_MONTHS},?\s+\d{{4}}"  # 1st January, 2024
+    rf"|{_MONTHS}\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}"  # January 1, 2024
+    r"|\d{4}-\d{2}-\d{2}"  # 2024-01-01
+    r"|\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4})"  # 01/01/2024
+)
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "eighteen": 18,
+    "twenty": 20, "twenty-four": 24, "thirty": 30, "thirty-six": 36, "forty-five": 45,
+    "sixty": 60, "ninety": 90, "one hundred twenty": 120, "one hundred eighty": 180,
+}
+_NUMBER = (
+    r"(?:(?P<word>" + "|".join(sorted(map(re.escape, _NUMBER_WORDS), key=len, reverse=True)) + r")"
+    r"(?:\s*\(\s*(?P<paren>\d{1,4})\s*\))?|(?P<digits>\d{1,4}))"
+)
+_DURATION_PARTS = re.compile(
+    _NUMBER + r"\s*(?P<unit>calendar\s+days?|business\s+days?|working\s+days?|days?|weeks?|months?|years?)",
+    re.IGNORECASE,
+)
+# Without named groups, for embedding in the patterns below
+DURATION = re.sub(r"\(\?P<\w+>", "(?:", _DURATION_PARTS.pattern)
+
+# Matched case-sensitively even inside IGNORECASE patterns, so "aed" or "rs" in words never count
+_CURRENCIES = {
+    "INR": r"INR|Rs\.?|₹|[Rr]upees",
+    "USD": r"USD|US\$|\$|US\s+[Dd]ollars|[Dd]ollars",
+    "EUR": r"EUR|€|[Ee]uros?",
+    "GBP": r"GBP|£|[Pp]ounds?\s+[Ss]terling",
+    "AED": r"AED|[Dd]irhams?",
+    "SGD": r"SGD|S\$",
+}
+_CURRENCY = "(?-i:" + "|".join(f"(?:{pattern})" for pattern in _CURRENCIES.values()) + ")"
+AMOUNT = (
+    rf"(?:(?:{_CURRENCY})\s*\d+(?:,\d+)*(?:\.\d+)?(?:\s*(?:lakhs?|crores?|million|billion|thousand))?"
+    rf"(?:\s*(?:{_CURRENCY}))?"
+    rf"|\d+(?:,\d+)*(?:\.\d+)?(?:\s*(?:lakhs?|crores?|million|billion))?\s*(?:{_CURRENCY}))"
+)
+
+_I = re.IGNORECASE
+_SENTENCE = re.compile(r"[^.;\n]+(?:\.(?=\d)[^.;\n]*)*[.;\n]?")
+# A number next to its currency; a currency word alone in prose says nothing
+_AMOUNT_TOKEN = re.compile(rf"(?<![A-Za-z]){AMOUNT}", _I)
+_CURRENCY_TOKEN = re.compile(_CURRENCY)
+_CURRENCY_CODES = [(code, re.compile(rf"^(?:{pattern})$")) for code, pattern in _CURRENCIES.items()]
+
+# Clause boundaries: semicolons, line breaks and full stops that end a sentence (not "Rs. 10" or "Jan. 5")
+_CLAUSE_END = re.compile(r"[;\n]|\.(?=\s+[A-Z\"“(]|\s*$)")
+_CLAUSE_WINDOW = 400
+# The agreement itself, possibly named (capitalised): "this Agreement", "the Master Services Agreement"
+_THIS_AGREEMENT = r"(?:this|the)\s+(?:(?-i:[A-Z][\w-]*)\s+){0,3}?(?:agreement|contract)"
+_AGREEMENT = re.compile(rf"\b{_THIS_AGREEMENT}\b", _I)
+# ... as the subject of the clause, not "the warranty under this Agreement"
+_AGREEMENT_SUBJECT = r"(?<!under\s)(?<!of\s)(?<!to\s)(?<!in\s)(?<!by\s)(?<!with\s)(?<!for\s)" + _THIS_AGREEMENT
+# Caps, penalties and cover are amounts in the contract, not its value
+_NOT_CONTRACT_VALUE = re.compile(r"\bliabilit|\bcap(?:s|ped)?\b|\bdamages\b|\bindemn|\binsur|\bpenalt", _I)
+
+
+@dataclass(frozen=True)
+class _Rule:
+    """Pattern for a field; the clause around a match must contain require and must not contain exclude"""
+    field: str
+    pattern: re.Pattern
+    require: Optional[re.Pattern] = None
+    exclude: Optional[re.Pattern] = None
+
+
+# The "value" group is the extracted text; the first rule with an accepted match wins
+_LABELLED_RULES: List[_Rule] = [
+    _Rule("Effective Date", re.compile(
+        rf"effective\s+date[\"”']?\s*(?:shall\s+mean|means|:|is|of)\s*(?:the\s+)?(?P<value>{DATE})", _I)),
+    _Rule("Effective Date", re.compile(
+        rf"{_AGREEMENT_SUBJECT}\s+(?:shall\s+(?:be|become)|is|becomes)\s+effective\s+"
+        rf"(?:as\s+of|from|on|with\s+effect\s+from)\s+(?P<value>{DATE})", _I)),
+    _Rule("Effective Date", re.compile(
+        rf"{_AGREEMENT_SUBJECT}\s+(?:shall\s+)?(?:come[s]?\s+into\s+(?:force|effect)|take[s]?\s+effect)\s+"
+        rf"(?:on|from|as\s+of|with\s+effect\s+from)\s+(?P<value>{DATE})", _I)),
+    _Rule("Contract Start Date", re.compile(
+        rf"(?:start|commencement)\s+date[\"”']?\s*(?:shall\s+mean|means|:|is)\s*(?P<value>{DATE})", _I)),
+    _Rule("Contract Start Date", re.compile(
+        rf"(?:{_AGREEMENT_SUBJECT}|the\s+term)\s+(?:shall\s+|will\s+)?commence[s]?\s+(?:on|from|with\s+effect\s+from)\s+"
+        rf"(?P<value>{DATE})", _I)),
+    _Rule("Contract End Date", re.compile(
+        rf"(?:end|expiry|expiration|termination)\s+date[\"”']?\s*(?:shall\s+mean|means|:|is)\s*(?P<value>{DATE})", _I),
+        require=_AGREEMENT),
+    _Rule("Contract End Date", re.compile(
+        # "This Agreement shall be effective as of ... and shall remain in force until ..."
+        rf"{_AGREEMENT_SUBJECT}(?:\s[^.;\n]{{0,80}}?\s+and)?\s+(?:shall\s+|will\s+)?(?:automatically\s+)?"
+        rf"(?:expire[s]?|end[s]?|remain[s]?\s+in\s+(?:full\s+)?force\s+(?:and\s+effect\s+)?(?:until|till)|"
+        rf"(?:be|is)\s+valid\s+(?:until|till|up\s*to))"
+        rf"\s+(?:on\s+)?(?P<value>{DATE})", _I)),
+    _Rule("Contract Duration", re.compile(
+        rf"(?:term|duration|tenure|validity)\s+of\s+{_THIS_AGREEMENT}\s+(?:shall\s+be\s+|is\s+)?(?:for\s+)?"
+        rf"(?:a\s+(?:period|term)\s+of\s+)?(?P<value>{DURATION})", _I)),
+    _Rule("Contract Duration", re.compile(
+        rf"{_AGREEMENT_SUBJECT}\s+shall\s+(?:be\s+valid|be\s+in\s+force|remain\s+(?:valid|in\s+(?:full\s+)?force(?:\s+and\s+effect)?)|"
+        rf"continue(?:\s+in\s+(?:full\s+)?force)?)\s+for\s+(?:a\s+(?:period|term)\s+of\s+)?(?P<value>{DURATION})", _I)),
+    _Rule("Total Contract Value", re.compile(
+        rf"(?:total|aggregate)\s+(?:contract\s+)?(?:value|consideration|price|fees?|amount)"
+        rf"[^.;\n]{{0,60}}?(?P<value>{AMOUNT})", _I),
+        exclude=_NOT_CONTRACT_VALUE),
+    _Rule("Payment Schedule (in days)", re.compile(
+        rf"(?:within|in)\s+(?P<value>{DURATION})\s+(?:of|from|after)\s+(?:the\s+)?(?:date\s+of\s+)?"
+        rf"(?:receipt\s+of\s+(?:a\s+|the\s+)?(?:valid\s+|correct\s+)?|submission\s+of\s+(?:the\s+)?)?invoices?", _I)),
+]
+
+_ARBITRATORS = [
+    (re.compile(r"\bsole\s+arbitrator\b", _I), "1"),
+    (re.compile(r"\b(?:three|3)\s+(?:\(3\)\s+)?arbitrators\b|\bpanel\s+of\s+(?:three|3)\b|\btribunal\s+of\s+(?:three|3)\b", _I), "3"),
+]
+
+_NOTICE_DAYS = re.compile(
+    rf"(?P<value>{DURATION})(?:'|’)?s?\s*(?:prior\s+|advance\s+|written\s+|prior\s+written\s+)*notice"
+    rf"|notice\s+(?:period\s+)?of\s+(?:at\s+least\s+|not\s+less\s+than\s+)?(?P<value2>{DURATION})",
+    _I,
+)
+_RENEWAL = re.compile(r"\brenew", _I)
+_CONVENIENCE = re.compile(r"\bconvenience\b", _I)
+_EITHER_PARTY = re.compile(r"\b(?:either|each|any)\s+party\b|\bboth\s+parties\b", _I)
+
+
+def to_days(text: str) -> Optional[int]:
+    """Days in a duration such as "thirty (30) days"; None for months, years or no duration"""
+    match = _DURATION_PARTS.search(text)
+    if not match:
+        return None
+    groups = match.groupdict()
+    number = groups.get("paren") or groups.get("digits")
+    if number:
+        count = int(number)
+    else:
+        word = groups.get("word")
+        if not word:
+            return None
+        count = _NUMBER_WORDS[word.lower()]
+    unit = groups["unit"].lower()
+    if "day" in unit:
+        return count
+    if unit.startswith("week"):
+        return count * 7
+    return None
+
+
+def _currency_code(token: str) -> Optional[str]:
+    token = token.strip()
+    for code, pattern in _CURRENCY_CODES:
+        if pattern.match(token):
+            return code
+    return None
+
+
+def _clause(content: str, start: int, end: int) -> str:
+    """Text of the clause holding content[start:end], within _CLAUSE_WINDOW characters either side"""
+    window_start = max(0, start - _CLAUSE_WINDOW)
+    clause_start = window_start
+    for boundary in _CLAUSE_END.finditer(content, window_start, start):
+        clause_start = boundary.end()
+    boundary = _CLAUSE_END.search(content, end, end + _CLAUSE_WINDOW)
+    return content[clause_start:boundary.start() if boundary else end + _CLAUSE_WINDOW]
+
+
+def _sentences(content: str) -> Iterator[Tuple[int, str]]:
+    for match in _SENTENCE.finditer(content):
+        if match.group().strip():
+            yield match.start(), match.group()
+
+
+def extract_fields(content: str) -> Dict[str, RuleMatch]:
+    """
+    Deterministic pass over the full contract for fields with a fixed shape
+
+    Dates, durations, amounts, currency, notice periods and the number of
+    arbitrators are read with compiled patterns anchored on the wording
+    that introduces them. Dates and durations must be tied to the
+    agreement itself, and amounts in liability or penalty clauses are not
+    taken as the contract value. A field is only returned when the wording
+    is unambiguous. Labelled values are final (RuleMatch.resolved); the
+    inferred ones are hints for the LLM, which checks them.
+
+    Returns:
+        Field name (as in ExtractionProcessor.contract_sections) to match
+    """
+    found: Dict[str, RuleMatch] = {}
+
+    for index, rule in enumerate(_LABELLED_RULES):
+        if rule.field in found:
+            continue
+        for match in rule.pattern.finditer(content):
+            if rule.require or rule.exclude:
+                clause = _clause(content, *match.span())
+                if rule.require and not rule.require.search(clause):
+                    continue
+                if rule.exclude and rule.exclude.search(clause):
+                    continue
+            value = match.group("value").strip()
+            if rule.field == "Payment Schedule (in days)":
+                days = to_days(value)
+                if days is None:
+                    continue
+                value = str(days)
+            found[rule.field] = RuleMatch(value, match.span("value"), f"labelled:{index}")
+            break
+
+    for pattern, count in _ARBITRATORS:
+        match = pattern.search(content)
+        if match:
+            found["Number of Arbitrators"] = RuleMatch(count, match.span(), "arbitrators")
+            break
+
+    currencies = Counter()
+    first_seen: Dict[str, Tuple[int, int]] = {}
+    for amount in _AMOUNT_TOKEN.finditer(content):
+        match = _CURRENCY_TOKEN.search(amount.group())
+        code = _currency_code(match.group()) if match else None
+        if code:
+            currencies[code] += 1
+            first_seen.setdefault(code, (amount.start() + match.start(), amount.start() + match.end()))
+    if currencies:
+        (code, count), *rest = currencies.most_common(2)
+        # A clear majority only; mixed-currency contracts need reading
+        if not rest or count >= 2 * rest[0][1]:
+            found["Currency"] = RuleMatch(code, first_seen[code], "currency")
+
+    found.update(_notice_periods(content))
+    return found
+
+
+def _notice_periods(content: str) -> Dict[str, RuleMatch]:
+    found: Dict[str, RuleMatch] = {}
+    for offset, sentence in _sentences(content):
+        renewal = _RENEWAL.search(sentence)
+        convenience = _CONVENIENCE.search(sentence)
+        if not (renewal or convenience):
+            continue
+        match = _NOTICE_DAYS.search(sentence)
+        if not match:
+            continue
+        group = "value" if match.group("value") else "value2"
+        days = to_days(match.group(group))
+        if days is None:
+            continue
+        span = (offset + match.start(group), offset + match.end(group))
+
+        if renewal and "Notice period (in days) to stop auto renewal" not in found:
+            found["Notice period (in days) to stop auto renewal"] = RuleMatch(str(days), span, "renewal notice")
+        # Termination notice is per party; only a clause covering both parties settles both fields
+        elif convenience and _EITHER_PARTY.search(sentence) and "If yes, number of notice days?" not in found:
+            found["If yes, number of notice days?"] = RuleMatch(str(days), span, "convenience notice")
+            found["Counterparty - If yes, number of notice days?"] = RuleMatch(str(days), span, "convenience notice")
+    return found
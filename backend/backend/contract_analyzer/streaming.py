@@ -0,0 +1,100 @@
+# streaming.py
+from typing import Dict, Any, Optional
+from dataclasses import dataclass
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StreamedRunResponse:
+    """Minimal stand-in for phi's RunResponse assembled from a token stream"""
+    content: str
+
+
+class AnalysisEventSink:
+    """
+    Thread-safe bridge from analysis worker threads to an asyncio consumer
+
+    Events are queued on the consumer's event loop in the order they are
+    emitted. A None item marks the end of the stream.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, stream_tokens: bool = False):
+        self._loop = loop
+        self._queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+        self.stream_tokens = stream_tokens
+
+    def emit(self, event: str, **data: Any) -> None:
+        """Queue an event; safe to call from any thread"""
+        self._put({"event": event, "data": data})
+
+    def close(self) -> None:
+        """Signal that no more events will follow"""
+        self._put(None)
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """Wait for the next event, None once the stream is closed"""
+        return await self._queue.get()
+
+    def _put(self, item: Optional[Dict[str, Any]]) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        except RuntimeError:
+            # Consumer loop is gone (client disconnected and server shut down)
+            pass
+
+
+# Set by streaming endpoints; carried into job and LLM worker threads with the context
+_event_sink: ContextVar[Optional[AnalysisEventSink]] = ContextVar(
+    "analysis_event_sink", default=None
+)
+
+
+@contextmanager
+def analysis_events(sink: AnalysisEventSink):
+    """Route analysis events emitted within this context to sink"""
+    token = _event_sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _event_sink.reset(token)
+
+
+def emit_event(event: str, **data: Any) -> None:
+    """Emit an analysis event; a no-op unless a streaming client is listening"""
+    sink = _event_sink.get()
+    if sink is not None:
+        sink.emit(event, **data)
+
+
+def token_streaming_enabled() -> bool:
+    sink = _event_sink.get()
+    return sink is not None and sink.stream_tokens
+
+
+def run_agent(agent: Any, prompt: str, section: str) -> Any:
+    """
+    Run an agent, forwarding model output as token events when requested
+
+    Args:
+        agent: Agent (or cached agent) to run
+        prompt: Prompt text
+        section: Result key the tokens belong to
+
+    Returns:
+        Run response with the full content
+    """
+    if not token_streaming_enabled():
+        return agent.run(prompt)
+
+    parts = []
+    for chunk in agent.run(prompt, stream=True):
+        delta = getattr(chunk, "content", None)
+        if isinstance(delta, str) and delta:
+            parts.append(delta)
+            emit_event("token", section=section, delta=delta)
+    return StreamedRunResponse(content="".join(parts))
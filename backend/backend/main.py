@@ -1,16 +1,89 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Optional, Dict, Any, AsyncIterator
+from pathlib import Path
+import asyncio
+import shutil
 import json
 import os
+import uuid
 from analyze import perform_analysis as analyze_func
-from process_document import process_document as process_func
+from process_document import process_document_with_id as process_func, get_document_handler
 from contract_analyzer.config import Config, ModelType
+from contract_analyzer.database import VectorDBRegistry
+from contract_analyzer.jobs import Job, JobManager, JobStatus
+from contract_analyzer.parallel import ParallelRunner
+from contract_analyzer.response_cache import get_response_cache
+from contract_analyzer.streaming import AnalysisEventSink, analysis_events
+from Doc_Processor.processors.ocr_pool import OCRWorkerPool
+from Doc_Processor.processors.ocr_engine_cache import ocr_engine_cache
+from Doc_Processor.processors.ocr_page_cache import get_ocr_page_cache
+from Doc_Processor.processors.ocr_image_buffers import ocr_image_buffers
+from Doc_Processor.processors.page_checkpoints import get_page_checkpoints
+from contract_analyzer.artifacts import get_artifact_store
+from contract_analyzer.agents.agent_manager import get_agent_manager
 
 app = FastAPI()
 
+job_manager = JobManager()
+
+
+def run_upload_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: extract text from an uploaded file and index it"""
+    file_path = Path(payload["file_path"])
+    try:
+        content, collection_name, document_id = process_func(file_path)
+        if not content or not collection_name:
+            raise ValueError("Failed to process document")
+        return {
+            "content": content,
+            "collection_name": collection_name,
+            # Key of the stored extraction artifacts
+            "document_id": document_id
+        }
+    finally:
+        cleanup_upload(payload)
+
+
+def cleanup_upload(payload: Dict[str, Any]) -> None:
+    """Remove an upload job's staging directory"""
+    shutil.rmtree(Path(payload["file_path"]).parent, ignore_errors=True)
+
+
+def run_analysis_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: run an analysis pipeline"""
+    result = analyze_func(**payload)
+    if not result:
+        raise ValueError("Analysis failed to produce results")
+    return result
+
+
+job_manager.register_handler("upload", run_upload_job, cleanup=cleanup_upload)
+job_manager.register_handler("analyze", run_analysis_job)
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Warm shared resources so the first request does not pay for them"""
+    VectorDBRegistry.warm()
+    get_agent_manager().warm()
+    get_document_handler().warm_ocr_workers()
+    job_manager.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared resources"""
+    job_manager.shutdown()
+    ParallelRunner.shutdown()
+    OCRWorkerPool.shutdown_all()
+    artifacts = get_artifact_store()
+    if artifacts is not None:
+        artifacts.shutdown()
+    VectorDBRegistry.close()
+
 # Configure CORS
 origins = [
     "http://localhost:4200",
@@ -35,6 +108,9 @@ class AnalysisRequest(BaseModel):
     type: str
     collection_name: Optional[str] = None
     custom_query: Optional[str] = None
+    bypass_cache: bool = False
+    # Streaming endpoints only: forward model output token by token
+    stream_tokens: bool = False
 
 class AnalysisResponse(BaseModel):
     content: str
@@ -46,6 +122,9 @@ class ErrorResponse(BaseModel):
 # File size limit (10MB)
 MAX_FILE_SIZE = 10 * 1024 * 1024
 
+# Idle interval after which streaming endpoints send a keep-alive
+STREAM_KEEPALIVE_SECONDS = 15
+
 # Allowed file types
 ALLOWED_FILE_TYPES = {
     '.txt': 'text/plain',
@@ -54,8 +133,18 @@ ALLOWED_FILE_TYPES = {
     '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
 }
 
-async def save_upload_file(file: UploadFile) -> str:
-    """Save uploaded file and return the file path."""
+# Convert frontend analysis type to backend format
+ANALYSIS_TYPE_MAPPING = {
+    'contract_review': 'Contract Review',
+    'information_extraction': 'Information Extraction',
+    'legal_research': 'Legal Research',
+    'risk_assessment': 'Risk Assessment',
+    'contract_summary': 'Contract Summary',
+    'custom_analysis': 'Custom Analysis'
+}
+
+async def save_upload_file(file: UploadFile, dest_dir: Path) -> str:
+    """Save uploaded file into dest_dir and return the file path."""
     # Check file size
     contents = await file.read()
     if len(contents) > MAX_FILE_SIZE:
@@ -72,93 +161,224 @@ async def save_upload_file(file: UploadFile) -> str:
             detail=f"Unsupported file type. Allowed types: {', '.join(ALLOWED_FILE_TYPES.keys())}"
         )
 
-    temp_path = f"temp_{file.filename}"
+    # Keep the original file name for type detection and the fingerprint record
+    temp_path = dest_dir / Path(file.filename).name
     try:
+        dest_dir.mkdir(parents=True, exist_ok=True)
         with open(temp_path, "wb") as buffer:
             buffer.write(contents)
-        return temp_path
+        return str(temp_path)
     except Exception as e:
+        shutil.rmtree(dest_dir, ignore_errors=True)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to save uploaded file: {str(e)}"
         )
 
+async def submit_upload(file: UploadFile) -> Job:
+    """Save the upload next to its job and queue it for processing"""
+    job_id = uuid.uuid4().hex
+    temp_path = await save_upload_file(file, Config.JOB_CONFIG.upload_dir / job_id)
+    return job_manager.submit("upload", {"file_path": temp_path}, job_id=job_id)
+
+def submit_analysis(request: AnalysisRequest) -> Job:
+    """Validate the analysis request and queue it"""
+    analysis_type = ANALYSIS_TYPE_MAPPING.get(request.type)
+    if not analysis_type:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid analysis type: {request.type}"
+        )
+    return job_manager.submit("analyze", {
+        "content": request.content,
+        "analysis_type": analysis_type,
+        "collection_name": request.collection_name,
+        "custom_query": request.custom_query,
+        "bypass_cache": request.bypass_cache
+    })
+
+async def wait_for_job(job: Job) -> Job:
+    """Await a job without blocking the event loop and return its final record"""
+    future = job_manager.get_future(job.job_id)
+    if future is not None:
+        try:
+            await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Cancelling a queued job cancels its future; only this request being cancelled propagates
+            if not future.cancelled():
+                raise
+        except Exception:
+            # Failure details are recorded in the job store
+            pass
+    return job_manager.get(job.job_id)
+
+async def stream_analysis_events(request: AnalysisRequest) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Queue an analysis and yield its events as they happen
+
+    Yields a job event first, then started/progress/section (and optionally
+    token) events, and finally a result or error event. None is yielded
+    whenever the stream has been idle for STREAM_KEEPALIVE_SECONDS.
+    """
+    sink = AnalysisEventSink(asyncio.get_running_loop(), stream_tokens=request.stream_tokens)
+    with analysis_events(sink):
+        job = submit_analysis(request)
+    yield {"event": "job", "data": job.to_dict()}
+
+    future = job_manager.get_future(job.job_id)
+    if future is None:
+        sink.close()
+    else:
+        future.add_done_callback(lambda _: sink.close())
+
+    while True:
+        try:
+            event = await asyncio.wait_for(sink.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            yield None
+            continue
+        if event is None:
+            break
+        yield event
+
+    job = job_manager.get(job.job_id)
+    if job.status == JobStatus.SUCCEEDED:
+        yield {"event": "result", "data": {"job_id": job.job_id, "result": job.result}}
+    else:
+        yield {"event": "error", "data": {
+            "job_id": job.job_id,
+            "status": job.status.value,
+            "detail": job.error or f"Analysis {job.status.value}"
+        }}
+
+def format_sse(event: Optional[Dict[str, Any]]) -> str:
+    """Encode an analysis event as a Server-Sent Events message"""
+    if event is None:
+        return ": keep-alive\n\n"
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+def get_job_or_404(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job not found: {job_id}"
+        )
+    return job
+
 @app.post("/api/upload")
 async def upload_file(file: UploadFile = File(...)):
-    # UploadFile = File(...)
-    temp_path = None
-    try:
-        # Save and validate file
-        temp_path = await save_upload_file(file)
-        
-        # Process document
-        content, collection_name = process_func(temp_path)
-        
-        if not content or not collection_name:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to process document"
-            )
-        
-        
-       
-        return {
-            "content": content,
-            "collection_name": collection_name
-        }
-        
-    except HTTPException as he:
-        raise he
-    except Exception as e:
+    job = await submit_upload(file)
+    job = await wait_for_job(job)
+
+    if job.status != JobStatus.SUCCEEDED:
         raise HTTPException(
             status_code=500,
-            detail=f"Document processing failed: {str(e)}"
+            detail=f"Document processing failed: {job.error or job.status.value}"
         )
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
+    return job.result
 
 @app.post("/api/analyze")
 async def analyze_document(request: AnalysisRequest) -> Dict[str, Any]:
-    try:
-        # Convert frontend analysis type to backend format
-        analysis_type_mapping = {
-            'contract_review': 'Contract Review',
-            'information_extraction': 'Information Extraction',
-            'legal_research': 'Legal Research',
-            'risk_assessment': 'Risk Assessment',
-            'contract_summary': 'Contract Summary',
-            'custom_analysis': 'Custom Analysis'
-        }
-        
-        analysis_type = analysis_type_mapping.get(request.type)
-        if not analysis_type:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid analysis type: {request.type}"
-            )
-        
-        # Perform analysis
-        result = analyze_func(
-            content=request.content,
-            analysis_type=analysis_type,
-            collection_name=request.collection_name,
-            custom_query=request.custom_query
-        )
-        
-        if not result:
-            raise HTTPException(
-                status_code=500,
-                detail="Analysis failed to produce results"
-            )
-            
-        return result
-        
-    except Exception as e:
+    job = submit_analysis(request)
+    job = await wait_for_job(job)
+
+    if job.status != JobStatus.SUCCEEDED:
         raise HTTPException(
             status_code=500,
-            detail=f"Analysis failed: {str(e)}"
+            detail=f"Analysis failed: {job.error or job.status.value}"
         )
+    return job.result
+
+@app.post("/api/analyze/stream")
+async def analyze_document_stream(request: AnalysisRequest):
+    """Run an analysis and stream section results as Server-Sent Events"""
+    # Validate before the stream starts so bad requests still get a 400
+    if request.type not in ANALYSIS_TYPE_MAPPING:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid analysis type: {request.type}"
+        )
+
+    async def body():
+        async for event in stream_analysis_events(request):
+            yield format_sse(event)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/api/ws/analyze")
+async def analyze_document_ws(websocket: WebSocket):
+    """Run the analysis sent as the first message and push its events as JSON"""
+    await websocket.accept()
+    try:
+        request = AnalysisRequest(**await websocket.receive_json())
+        async for event in stream_analysis_events(request):
+            await websocket.send_json(event or {"event": "keep-alive", "data": {}})
+        await websocket.close()
+    except WebSocketDisconnect:
+        # The job keeps running; its result stays available under /api/jobs
+        pass
+    except (ValidationError, HTTPException, ValueError) as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        await websocket.send_json({"event": "error", "data": {"detail": detail}})
+        await websocket.close(code=1003)
+
+@app.post("/api/jobs/upload", status_code=202)
+async def submit_upload_job(file: UploadFile = File(...)):
+    job = await submit_upload(file)
+    return job.to_dict()
+
+@app.post("/api/jobs/analyze", status_code=202)
+async def submit_analysis_job(request: AnalysisRequest):
+    job = submit_analysis(request)
+    return job.to_dict()
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    return get_job_or_404(job_id).to_dict()
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = get_job_or_404(job_id)
+    if job.status == JobStatus.SUCCEEDED:
+        return job.result
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status == JobStatus.CANCELLED:
+        raise HTTPException(status_code=410, detail="Job was cancelled")
+    raise HTTPException(
+        status_code=409,
+        detail=f"Job is still {job.status.value}"
+    )
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    get_job_or_404(job_id)
+    return job_manager.cancel(job_id).to_dict()
+
+# Stored extraction output, read back instead of re-extracting (sync: disk reads run in the threadpool)
+@app.get("/api/documents/{document_id}/text")
+def get_document_text(document_id: str):
+    artifacts = get_artifact_store()
+    text = artifacts.get_text(document_id) if artifacts is not None else None
+    if text is None:
+        raise HTTPException(status_code=404, detail=f"No stored text for document: {document_id}")
+    return {"document_id": document_id, "content": text}
+
+@app.get("/api/documents/{document_id}/pages")
+def get_document_pages(document_id: str):
+    artifacts = get_artifact_store()
+    try:
+        if artifacts is None:
+            raise KeyError(document_id)
+        pages = list(artifacts.iter_pages(document_id))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No stored pages for document: {document_id}")
+    return {"document_id": document_id, "pages": pages}
 
 @app.post("/api/set_model_type")
 async def set_model_type(request: SetModelTypeRequest):
@@ -166,6 +386,9 @@ async def set_model_type(request: SetModelTypeRequest):
         model_type = ModelType[request.model_type.upper().replace(" ", "_")]
         print(f"Setting model type to: {model_type}")
         Config.set_model_type(model_type)
+        # Pooled agents hold the previous model
+        get_agent_manager().cleanup()
+        get_agent_manager().warm()
         return {"detail": f"Model type set to {request.model_type}"}
     except KeyError:
         raise HTTPException(
@@ -191,6 +414,22 @@ async def generic_exception_handler(request, exc):
 async def health_check():
     return {"status": "healthy"}
 
+# Cache and resource metrics
+@app.get("/api/metrics")
+async def metrics():
+    return {
+        "ocr_engines": ocr_engine_cache.stats(),
+        "ocr_images": ocr_image_buffers.stats(),
+        "ocr_pages": get_ocr_page_cache(
+            Config.PROCESSOR_CONFIG.ocr_cache_path,
+            Config.PROCESSOR_CONFIG.ocr_cache_max_bytes
+        ).stats(),
+        "page_checkpoints": get_page_checkpoints(Config.PROCESSOR_CONFIG.page_checkpoints_path).stats(),
+        "artifacts": get_artifact_store().stats() if Config.ARTIFACT_CONFIG.enabled else None,
+        "llm_responses": get_response_cache().stats(),
+        "agents": get_agent_manager().stats()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -4,7 +4,16 @@ import json
 from pathlib import Path
 from typing import Optional, Dict, Any
 import logging
+import threading
 from contract_analyzer.database import VectorDB
+from contract_analyzer.ingestion import IngestionPipeline
+from contract_analyzer.artifacts import get_artifact_store
+from contract_analyzer.fingerprints import (
+    get_fingerprint_store,
+    hash_file,
+    hash_text,
+    collection_name_for,
+)
 from Doc_Processor.document_handler import DocumentHandler
 from Doc_Processor.config_validator import validate_config
 from contract_analyzer.config import Config
@@ -13,82 +22,123 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def create_collection_name(file_path: Path) -> str:
-    # Create a collection name based on the file name and size
-    collection_name = file_path.stem
-    collection_name = collection_name.replace("-", "_").lower().replace(" ", "_")
-    collection_name = f"{collection_name}_{file_path.stat().st_size}"
-    
-    return collection_name
+_doc_handler: Optional[DocumentHandler] = None
+_doc_handler_lock = threading.Lock()
+
+
+def get_document_handler() -> DocumentHandler:
+    """Process-wide document handler so processors and OCR engines are reused"""
+    global _doc_handler
+    with _doc_handler_lock:
+        if _doc_handler is None:
+            _doc_handler = DocumentHandler(Config.PROCESSOR_CONFIG.handler_config())
+        return _doc_handler
+
 
 def process_document(file_path: Path) -> tuple[Optional[str], Optional[str]]:
+    return process_document_with_id(file_path)[:2]
+
+def process_document_with_id(file_path: Path) -> tuple[Optional[str], Optional[str], Optional[str]]:
+    """Ingest a document and also return its document id (file hash), the key of its stored artifacts"""
     try:
         
         if isinstance(file_path, str):
             file_path = Path(file_path)
         # Add debug logs
         logger.info(f"Processing document: {file_path}")
-        
-        processor_config = {
-            "pdf": {
-                "ocr_enabled": Config.PROCESSOR_CONFIG.ocr_enabled,
-                "language": Config.PROCESSOR_CONFIG.language,
-                "dpi": Config.PROCESSOR_CONFIG.dpi,
-            },
-            "image": {
-                "ocr_language": Config.PROCESSOR_CONFIG.language,
-                "preprocessing_steps": ["denoise", "deskew", "contrast"],
-            },
-            "structured": {"schema_validation": True},
-        }
-
-        doc_handler = DocumentHandler(processor_config)
-        result = doc_handler.process_document(file_path)
-        
-        logger.info(f"Document processing result: {result}")
 
-        if not result or result.get("status") != "success":
-            logger.error(f"Processing failed: {result.get('error', 'Unknown error')}")
-            return None, None
+        fingerprints = get_fingerprint_store()
+        vector_client = VectorDB()
+        file_hash = hash_file(file_path)
 
-        content = result.get("result", {}).get("content", [])
-        text_content = process_content(content)  # Extract this to a function
-        
-        if not text_content:
-            logger.error("Failed to extract text content")
-            return None, None
+        with fingerprints.locked(file_hash):
+            # Identical bytes were ingested before: skip extraction and embedding
+            fingerprint = fingerprints.get_by_file(file_hash)
+            if fingerprint and vector_client.collection_exists(fingerprint.collection_name):
+                logger.info(f"Duplicate upload, reusing collection: {fingerprint.collection_name}")
+                return fingerprint.content, fingerprint.collection_name, file_hash
+
+            # Pages are embedded while later ones are still being extracted, so the
+            # collection is keyed on the file; the text hash is only known at the end
+            collection_name = collection_name_for(file_hash)
+            if vector_client.collection_exists(collection_name):
+                # Left behind by an interrupted ingestion: chunks it committed are not re-embedded
+                logger.info(f"Resuming interrupted ingestion into: {collection_name}")
 
-        vector_client = VectorDB()
-        collection_name = create_collection_name(file_path)
-        
-        if collection_name not in vector_client.client.list_collections():
             print(f"Creating collection: {collection_name}")
-            vector_client.create_collection(collection_name)
-        
-            logger.info(f"Adding to collection: {collection_name}")
-            
-            added_docs = vector_client.add_documents(text_content)
-            if not added_docs:
-                logger.error("Failed to add documents to vector DB")
-                return None, None
+            if not vector_client.create_collection(collection_name):
+                return None, None, None
+
+            logger.info(f"Streaming pages into collection: {collection_name}")
+            artifacts = get_artifact_store()
+            if artifacts is not None and artifacts.has_pages(file_hash):
+                # Extracted before, but its index is gone: re-embed the stored pages
+                logger.info(f"Rebuilding {collection_name} from stored pages")
+                pages = artifacts.iter_pages(file_hash)
+            else:
+                pages = get_document_handler().iter_pages(file_path, file_hash=file_hash)
+                if artifacts is not None:
+                    pages = artifacts.record_pages(file_hash, pages)
+
+            try:
+                pipeline = IngestionPipeline(vector_client)
+                text_content, _, chunk_count = pipeline.run(pages)
+            except Exception:
+                # Keep committed chunks and extracted pages so a retry resumes
+                logger.error(f"Ingestion interrupted, {collection_name} kept for resume")
+                raise
+
+            if not text_content:
+                logger.error("Failed to extract text content")
+                vector_client.delete_collection(collection_name)
+                return None, None, None
+            vector_client.trim_chunks(chunk_count)
+            logger.info(f"Indexed {chunk_count} chunks into {collection_name}")
+            if artifacts is not None:
+                artifacts.put_text_async(file_hash, text_content)
+
+            text_hash = hash_text(text_content)
+            with fingerprints.locked(text_hash):
+                # Same text from different bytes (re-saved or renamed copy): keep the existing index
+                fingerprint = fingerprints.get_by_text(text_hash)
+                if fingerprint and vector_client.collection_exists(fingerprint.collection_name):
+                    logger.info(f"Known document text, reusing collection: {fingerprint.collection_name}")
+                    vector_client.delete_collection(collection_name)
+                    fingerprints.put(file_hash, text_hash, fingerprint.collection_name, fingerprint.content, file_path.name)
+                    return fingerprint.content, fingerprint.collection_name, file_hash
+                if fingerprint:
+                    fingerprints.forget(text_hash)
+
+                fingerprints.put(file_hash, text_hash, collection_name, text_content, file_path.name)
 
         logger.info("Successfully processed document")
-        return text_content.strip(), collection_name
+        return text_content, collection_name, file_hash
 
     except Exception as e:
         logger.error(f"Document processing failed with exception: {str(e)}")
-        return None, None
+        return None, None, None
 
 def process_content(content) -> Optional[str]:
+    return process_content_with_pages(content)[0]
+
+def process_content_with_pages(content) -> tuple[Optional[str], list[tuple[int, int]]]:
+    """Join extracted content into text and record where each page starts"""
     try:
         if isinstance(content, list):
             if content and isinstance(content[0], dict) and "text" in content[0]:
-                return "\n".join(page["text"] for page in content if page.get("text"))
-            return "\n".join(str(item) for item in content if item)
-        return str(content)
+                parts, page_starts, offset = [], [], 0
+                for page in content:
+                    if not page.get("text"):
+                        continue
+                    page_starts.append((offset, page.get("page", len(page_starts))))
+                    parts.append(page["text"])
+                    offset += len(page["text"]) + 1
+                return "\n".join(parts), page_starts
+            return "\n".join(str(item) for item in content if item), []
+        return str(content), []
     except Exception as e:
         logger.error(f"Content processing failed: {str(e)}")
-        return None
+        return None, []
     
 # Python
 if __name__ == "__main__":
@@ -0,0 +1,63 @@
+import pytest
+
+from contract_analyzer.artifacts import ArtifactStore
+from contract_analyzer.config import ArtifactConfig
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArtifactStore(ArtifactConfig(path=tmp_path / "artifacts"))
+    yield store
+    store.shutdown()
+
+
+def _pages(count, failed=()):
+    for page in range(1, count + 1):
+        if page in failed:
+            yield {"page": page, "text": "", "error": "OCR failed"}
+        else:
+            yield {"page": page, "text": f"page {page}", "cached": True}
+
+
+def test_complete_extraction_is_replayed(store):
+    assert list(store.record_pages("doc", _pages(3))) == list(_pages(3))
+    store.flush()
+
+    assert store.has_pages("doc")
+    # Run flags are not part of the stored page
+    assert list(store.iter_pages("doc")) == [{"page": p, "text": f"page {p}"} for p in (1, 2, 3)]
+
+
+def test_failed_page_leaves_nothing_to_rebuild_from(store):
+    assert len(list(store.record_pages("doc", _pages(3, failed={2})))) == 3
+    store.flush()
+
+    assert not store.has_pages("doc")
+    with pytest.raises(KeyError):
+        list(store.iter_pages("doc"))
+
+
+def test_interrupted_extraction_is_not_recorded(store):
+    pages = store.record_pages("doc", _pages(3))
+    next(pages)
+    pages.close()
+    store.flush()
+
+    assert not store.has_pages("doc")
+
+
+def test_identical_pages_are_stored_once(store):
+    list(store.record_pages("a", _pages(2)))
+    list(store.record_pages("b", _pages(2)))
+    store.flush()
+
+    # Both page lists are identical, so only the first document writes blobs
+    assert store.stats()["blobs_written"] == 3
+    assert list(store.iter_pages("a")) == list(store.iter_pages("b"))
+
+
+def test_text_round_trip(store):
+    store.put_text_async("doc", "Whole contract text")
+    store.flush()
+    assert store.get_text("doc") == "Whole contract text"
+    assert store.get_text("missing") is None
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from Doc_Processor.processors import text_pre_processor
+from Doc_Processor.processors.text_pre_processor import TokenChunkStream, split_text_into_token_chunks
+
+_real_get_encoding = text_pre_processor._get_encoding
+
+
+def _byte_encoding():
+    import tiktoken
+
+    # One token per byte; needs no download
+    return tiktoken.Encoding(
+        name="test-bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+
+
+@pytest.fixture(params=["test-bytes", "cl100k_base"])
+def encoding_name(request, monkeypatch):
+    pytest.importorskip("tiktoken")
+    if request.param == "test-bytes":
+        encoding = _byte_encoding()
+        monkeypatch.setattr(
+            text_pre_processor,
+            "_get_encoding",
+            lambda name: encoding if name == "test-bytes" else _real_get_encoding(name),
+        )
+    else:
+        try:
+            _real_get_encoding(request.param)
+        except Exception:
+            pytest.skip(f"{request.param} encoding not available offline")
+    return request.param
+
+
+def _contract_text(seed: int, paragraphs: int = 40) -> str:
+    rng = random.Random(seed)
+    words = ["party", "agreement", "shall", "term", "notice", "payment", "invoice",
+             "confidential", "liability", "the", "of", "and", "within", "days"]
+    out = []
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(rng.randint(1, 6)):
+            sentence = " ".join(rng.choice(words) for _ in range(rng.randint(3, 30)))
+            sentences.append(sentence.capitalize() + rng.choice([".", "!", "?", ";"]))
+        out.append(" ".join(sentences))
+    return "\n\n".join(out)
+
+
+def _stream(text: str, pieces, **kwargs):
+    stream = TokenChunkStream(**kwargs)
+    chunks = []
+    position = 0
+    for size in pieces:
+        chunks.extend(stream.feed(text[position:position + size]))
+        position += size
+    chunks.extend(stream.feed(text[position:]))
+    chunks.extend(stream.finish())
+    return chunks
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(64, 0), (128, 32), (256, 64)])
+def test_stream_matches_batch_chunking(encoding_name, seed, chunk_size, chunk_overlap):
+    text = _contract_text(seed)
+    rng = random.Random(seed)
+    pieces = [rng.randint(1, 2000) for _ in range(len(text) // 500)]
+    kwargs = dict(chunk_size=chunk_size, chunk_overlap=chunk_overlap, encoding_name=encoding_name)
+
+    expected = split_text_into_token_chunks(text, **kwargs)
+    assert _stream(text, pieces, **kwargs) == expected
+
+
+def test_chunks_point_into_the_source_text(encoding_name):
+    text = _contract_text(7)
+    for chunk in split_text_into_token_chunks(text, 128, 16, encoding_name):
+        assert text[chunk["char_start"]:chunk["char_end"]] == chunk["text"]
+        assert chunk["token_count"] <= 128
+
+
+def test_whole_text_in_one_feed(encoding_name):
+    text = _contract_text(3, paragraphs=5)
+    kwargs = dict(chunk_size=64, chunk_overlap=0, encoding_name=encoding_name)
+    assert _stream(text, [], **kwargs) == split_text_into_token_chunks(text, **kwargs)
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(0, 0), (64, 64), (64, -1)])
+def test_invalid_settings_are_rejected(chunk_size, chunk_overlap):
+    with pytest.raises(ValueError):
+        TokenChunkStream(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    with pytest.raises(ValueError):
+        split_text_into_token_chunks("text", chunk_size, chunk_overlap)
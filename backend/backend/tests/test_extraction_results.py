@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+
+import pytest
+
+from contract_analyzer.agents.template.extract_information import ExtractionProcessor, ExtractionResults
+
+
+@pytest.fixture
+def results():
+    results = ExtractionResults()
+    results.upsert("Effective Date", "1 January 2024", section="Key Dates", span=(10, 24),
+                   timestamp="2024-01-01T00:00:00", source="rules")
+    results.upsert("Parties", ["Acme Ltd", "Beta LLC"], section="Metadata", timestamp="2024-01-01T00:00:01")
+    results.upsert("Currency", "Not Found", timestamp="2024-01-01T00:00:02")
+    return results
+
+
+def test_upsert_replaces_in_place(results):
+    results.upsert("Effective Date", "2 January 2024", section="Key Dates")
+
+    assert len(results) == 3
+    assert [record.term for record in results] == ["Effective Date", "Parties", "Currency"]
+    assert results.get("Effective Date").extracted_value == "2 January 2024"
+    assert results.get("Effective Date").source == "llm"
+    assert "Parties" in results and "Missing" not in results
+    assert results.get("Missing") is None
+
+
+def test_json_round_trip(results):
+    records = json.loads("".join(results.iter_json()))
+
+    assert records == results.to_list()
+    assert records[0] == {
+        "term": "Effective Date",
+        "extracted_value": "1 January 2024",
+        "timestamp": "2024-01-01T00:00:00",
+        "section": "Key Dates",
+        "span": [10, 24],
+        "source": "rules",
+    }
+    assert records[1]["extracted_value"] == ["Acme Ltd", "Beta LLC"]
+    assert records[1]["span"] is None
+
+
+def test_csv_round_trip(results):
+    rows = list(csv.reader(io.StringIO("".join(results.iter_csv()))))
+
+    assert rows[0] == list(ExtractionResults.FIELDS)
+    assert rows[1] == ["Effective Date", "1 January 2024", "2024-01-01T00:00:00", "Key Dates", "10-24", "rules"]
+    # Structured values are JSON-encoded
+    assert json.loads(rows[2][1]) == ["Acme Ltd", "Beta LLC"]
+    assert rows[3][3:] == ["", "", "llm"]
+    assert len(rows) == 4
+
+
+def test_empty_results_export():
+    results = ExtractionResults()
+    assert json.loads("".join(results.iter_json())) == []
+    assert list(csv.reader(io.StringIO("".join(results.iter_csv())))) == [list(ExtractionResults.FIELDS)]
+
+
+@pytest.mark.parametrize("format", ["json", "csv"])
+def test_write_to_path_matches_streamed_text(results, tmp_path, format):
+    path = tmp_path / f"results.{format}"
+    results.write(path, format)
+
+    expected = "".join(results.iter_json() if format == "json" else results.iter_csv())
+    assert path.read_bytes().decode("utf-8") == expected
+
+
+def test_write_rejects_unknown_format(results, tmp_path):
+    with pytest.raises(ValueError):
+        results.write(tmp_path / "results.xml", "xml")
+
+
+def test_parquet_round_trip(results, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "results.parquet"
+    results.write(path, "parquet", row_group_size=2)
+
+    table = pq.read_table(path)
+    assert table.column_names == list(ExtractionResults.FIELDS)
+    assert table.column("term").to_pylist() == ["Effective Date", "Parties", "Currency"]
+    assert table.column("span").to_pylist() == [[10, 24], None, None]
+
+
+def test_export_results(results, tmp_path):
+    processor = ExtractionProcessor()
+    processor.results = results
+
+    assert json.loads(processor.export_results("json")) == results.to_list()
+    assert processor.export_results("csv") == "".join(results.iter_csv())
+
+    destination = io.StringIO()
+    assert processor.export_results("csv", destination) is None
+    assert destination.getvalue() == "".join(results.iter_csv())
+
+    with pytest.raises(ValueError):
+        processor.export_results("xml")
@@ -0,0 +1,29 @@
+import threading
+import time
+
+from contract_analyzer.fingerprints import FingerprintStore
+
+
+def test_key_locks_serialise_and_are_released(tmp_path):
+    store = FingerprintStore(tmp_path / "fingerprints.sqlite3")
+    inside = []
+    overlaps = []
+
+    def ingest(key):
+        with store.locked(key):
+            overlaps.append(key in inside)
+            inside.append(key)
+            time.sleep(0.01)
+            inside.remove(key)
+
+    threads = [threading.Thread(target=ingest, args=(key,)) for key in ["a", "a", "a", "b"]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert overlaps == [False] * 4
+    # Nested keys, as for a file and then its text
+    with store.locked("a"), store.locked("b"):
+        assert set(store._key_locks) == {"a", "b"}
+    assert store._key_locks == {}
@@ -0,0 +1,86 @@
+"""
+Cold-start checks: importing the API or the ingestion entry point, and
+extracting a plain-text upload, must not load the OCR, torch or Chroma stacks.
+
+Each check runs in a fresh interpreter so modules imported by other tests
+do not leak in. A check is skipped when a light dependency of the module
+under test (fastapi, python-magic, pydantic, ...) is not installed; a
+missing heavy module still fails, since it means it was imported eagerly.
+"""
+import json
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ("torch", "paddleocr", "chromadb")
+OCR_MODULES = ("paddle", "cv2", "fitz", "sentence_transformers")
+
+# Wall-clock budgets, including interpreter start-up
+IMPORT_BUDGET_SECONDS = 5.0
+TEXT_INGESTION_BUDGET_SECONDS = 5.0
+
+_PRELUDE = """
+import json, sys, time
+HEAVY = {heavy!r}
+start = time.perf_counter()
+try:
+{body}
+except ModuleNotFoundError as e:
+    print(json.dumps({{"missing": e.name}}))
+    sys.exit(0)
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "loaded": sorted(m for m in HEAVY if m in sys.modules),
+}}))
+"""
+
+
+def _run(body: str, heavy, tmp_path: Path) -> dict:
+    script = _PRELUDE.format(heavy=tuple(heavy), body=textwrap.indent(textwrap.dedent(body), "    "))
+    completed = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=tmp_path,
+        env={"PYTHONPATH": str(BACKEND_DIR), "PATH": "/usr/bin:/bin"},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    missing = result.get("missing")
+    if missing:
+        root = missing.split(".")[0]
+        assert root not in heavy, f"{root} is imported eagerly"
+        pytest.skip(f"{missing} is not installed")
+    return result
+
+
+@pytest.mark.parametrize("module", ["main", "process_document"])
+def test_import_does_not_load_heavy_stacks(module, tmp_path):
+    result = _run(f"import {module}", HEAVY_MODULES, tmp_path)
+    assert result["loaded"] == []
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+def test_text_upload_extraction_never_loads_ocr_or_torch(tmp_path):
+    (tmp_path / "contract.txt").write_text(
+        "MASTER SERVICES AGREEMENT\n\nThis Agreement is made between A and B.\n\n" * 50
+    )
+    result = _run(
+        """
+        from process_document import get_document_handler
+        import Doc_Processor.processors.text_pre_processor
+
+        pages = list(get_document_handler().iter_pages("contract.txt"))
+        assert pages and pages[0]["text"].startswith("MASTER")
+        """,
+        HEAVY_MODULES + OCR_MODULES,
+        tmp_path,
+    )
+    assert result["loaded"] == []
+    assert result["seconds"] < TEXT_INGESTION_BUDGET_SECONDS
@@ -0,0 +1,178 @@
+import threading
+
+import pytest
+
+from contract_analyzer.config import JobConfig
+from contract_analyzer.jobs import JobManager, JobStatus, JobStore
+
+
+@pytest.fixture
+def config(tmp_path):
+    return JobConfig(max_workers=1, store_path=tmp_path / "jobs.sqlite3", upload_dir=tmp_path / "uploads")
+
+
+def wait_for(manager, job_id):
+    # The future is forgotten once done, so it may already be gone
+    future = manager.get_future(job_id)
+    if future is not None and not future.cancelled():
+        try:
+            future.result(timeout=5)
+        except Exception:
+            pass
+
+
+def test_job_runs_and_stores_result(config):
+    manager = JobManager(config)
+    manager.register_handler("echo", lambda payload: {"echo": payload["value"]})
+    manager.start()
+    try:
+        job = manager.submit("echo", {"value": 3})
+        wait_for(manager, job.job_id)
+        stored = manager.get(job.job_id)
+        assert stored.status == JobStatus.SUCCEEDED
+        assert stored.result == {"echo": 3}
+    finally:
+        manager.shutdown(wait=True)
+
+
+def test_failed_job_records_error(config):
+    def fail(payload):
+        raise ValueError("boom")
+
+    manager = JobManager(config)
+    manager.register_handler("fail", fail)
+    manager.start()
+    try:
+        job = manager.submit("fail", {})
+        wait_for(manager, job.job_id)
+        stored = manager.get(job.job_id)
+        assert stored.status == JobStatus.FAILED
+        assert stored.error == "boom"
+    finally:
+        manager.shutdown(wait=True)
+
+
+def test_cancelled_queued_job_never_runs(config):
+    release = threading.Event()
+    started = []
+
+    def handler(payload):
+        started.append(payload["name"])
+        release.wait(timeout=5)
+        return payload["name"]
+
+    manager = JobManager(config)
+    manager.register_handler("work", handler)
+    manager.start()
+    try:
+        first = manager.submit("work", {"name": "first"})
+        second = manager.submit("work", {"name": "second"})
+        second_future = manager.get_future(second.job_id)
+
+        cancelled = manager.cancel(second.job_id)
+        assert cancelled.status == JobStatus.CANCELLED
+        assert second_future is None or second_future.cancelled()
+
+        release.set()
+        wait_for(manager, first.job_id)
+        assert manager.get(first.job_id).status == JobStatus.SUCCEEDED
+        assert manager.get(second.job_id).status == JobStatus.CANCELLED
+        assert started == ["first"]
+    finally:
+        release.set()
+        manager.shutdown(wait=True)
+
+
+def test_cancelled_queued_job_is_cleaned_up_once(config):
+    release = threading.Event()
+    cleaned = []
+
+    def handler(payload):
+        release.wait(timeout=5)
+        return payload["name"]
+
+    manager = JobManager(config)
+    manager.register_handler("work", handler, cleanup=lambda payload: cleaned.append(payload["name"]))
+    manager.start()
+    try:
+        first = manager.submit("work", {"name": "first"})
+        second = manager.submit("work", {"name": "second"})
+        manager.cancel(second.job_id)
+
+        release.set()
+        wait_for(manager, first.job_id)
+        wait_for(manager, second.job_id)
+    finally:
+        release.set()
+        manager.shutdown(wait=True)
+
+    # Finished jobs clean up in their handler; only the skipped one is cleaned here
+    assert cleaned == ["second"]
+
+
+def test_cancel_while_running_discards_result(config):
+    running = threading.Event()
+    release = threading.Event()
+
+    def handler(payload):
+        running.set()
+        release.wait(timeout=5)
+        return "done"
+
+    manager = JobManager(config)
+    manager.register_handler("work", handler)
+    manager.start()
+    try:
+        job = manager.submit("work", {})
+        assert running.wait(timeout=5)
+        assert manager.cancel(job.job_id).status == JobStatus.CANCELLED
+        release.set()
+        wait_for(manager, job.job_id)
+        stored = manager.get(job.job_id)
+        assert stored.status == JobStatus.CANCELLED
+        assert stored.result is None
+    finally:
+        release.set()
+        manager.shutdown(wait=True)
+
+
+def test_unfinished_jobs_resume_on_start(config):
+    # Jobs left queued or running by a previous process
+    store = JobStore(config.store_path)
+    queued = store.create("echo", {"value": 1})
+    interrupted = store.create("echo", {"value": 2})
+    store.update(interrupted.job_id, JobStatus.RUNNING)
+    finished = store.create("echo", {"value": 3})
+    store.update(finished.job_id, JobStatus.SUCCEEDED, result={"echo": 3})
+
+    calls = []
+    manager = JobManager(config)
+
+    def echo(payload):
+        calls.append(payload["value"])
+        return {"echo": payload["value"]}
+
+    manager.register_handler("echo", echo)
+    manager.start()
+    try:
+        for job in (queued, interrupted):
+            wait_for(manager, job.job_id)
+    finally:
+        manager.shutdown(wait=True)
+
+    assert sorted(calls) == [1, 2]
+    for job in (queued, interrupted):
+        stored = manager.get(job.job_id)
+        assert stored.status == JobStatus.SUCCEEDED
+        assert stored.result == {"echo": stored.payload["value"]}
+    assert manager.get(finished.job_id).result == {"echo": 3}
+
+
+def test_unknown_kind_is_rejected(config):
+    manager = JobManager(config)
+    manager.start()
+    try:
+        with pytest.raises(ValueError):
+            manager.submit("missing", {})
+    finally:
+        manager.shutdown(wait=True)
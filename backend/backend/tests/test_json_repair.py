@@ -0,0 +1,41 @@
+import pytest
+
+from contract_analyzer.json_repair import repair_json
+
+
+@pytest.mark.parametrize("text,expected", [
+    ('{"a": "b"}', {"a": "b"}),
+    ('```json\n{"a": "b"}\n```', {"a": "b"}),
+    ('Here is the answer:\n{"a": "b"}\nLet me know if you need more.', {"a": "b"}),
+    ("{“a”: “b”}", {"a": "b"}),
+    ("{'a': 'b'}", {"a": "b"}),
+    ('{"a": None, "b": True, "c": False}', {"a": None, "b": True, "c": False}),
+    ('{"a": "line one\nline two"}', {"a": "line one\nline two"}),
+    ('{\n  "a": "b"\n  "c": "d"\n}', {"a": "b", "c": "d"}),
+    ('{"a": "b", "c": [1, 2,],}', {"a": "b", "c": [1, 2]}),
+    ('[{"a": "b"}, {"c": "d"}]', {"a": "b", "c": "d"}),
+])
+def test_common_defects_are_repaired(text, expected):
+    assert repair_json(text) == expected
+
+
+@pytest.mark.parametrize("text,expected", [
+    ('{"a": "b", "c":', {"a": "b"}),
+    ('{"a": "b", "c": "cut off', {"a": "b", "c": "cut off"}),
+    ('{"a": {"x": [1, 2', {"a": {"x": [1, 2]}}),
+])
+def test_truncated_output_is_closed(text, expected):
+    assert repair_json(text) == expected
+
+
+def test_key_lines_fallback_only_for_known_keys():
+    text = 'Effective Date: 1 January 2024\n- "Currency": INR,\nNote: not a field'
+    keys = ["Effective Date", "Currency"]
+
+    assert repair_json(text, keys) == {"Effective Date": "1 January 2024", "Currency": "INR"}
+    assert repair_json(text) is None
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "“a”: no", "[1, 2, 3]"])
+def test_unrecoverable_text(text):
+    assert repair_json(text) is None
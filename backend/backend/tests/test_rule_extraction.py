@@ -0,0 +1,169 @@
+import json
+import re
+from contextlib import contextmanager
+
+import pytest
+
+from contract_analyzer.agents.template import extract_information
+from contract_analyzer.agents.template.extract_information import ExtractionProcessor
+from contract_analyzer.rule_extraction import extract_fields, to_days
+
+CONTRACT = (
+    "MASTER SERVICES AGREEMENT\n"
+    "This Agreement shall be effective as of 1st January, 2024 and shall remain in force until 31 December 2026. "
+    "The term of this Agreement shall be three (3) years. "
+    "The total contract value is INR 50,00,000 exclusive of taxes. "
+    "Invoices shall be paid within 30 days of receipt of a valid invoice. "
+    "Disputes shall be referred to a sole arbitrator. "
+    "Either party may terminate this Agreement for convenience by giving sixty (60) days prior written notice. "
+    "This Agreement shall automatically renew for one year unless either party gives 90 days' notice of non-renewal.\n"
+)
+
+
+def values(content):
+    return {field: match.value for field, match in extract_fields(content).items()}
+
+
+def test_fields_read_from_agreement_wording():
+    assert values(CONTRACT) == {
+        "Effective Date": "1st January, 2024",
+        "Contract End Date": "31 December 2026",
+        "Contract Duration": "three (3) years",
+        "Total Contract Value": "INR 50,00,000",
+        "Currency": "INR",
+        "Payment Schedule (in days)": "30",
+        "Number of Arbitrators": "1",
+        "Notice period (in days) to stop auto renewal": "90",
+        "If yes, number of notice days?": "60",
+        "Counterparty - If yes, number of notice days?": "60",
+    }
+
+
+def test_spans_point_at_the_values():
+    for field, match in extract_fields(CONTRACT).items():
+        if field not in ("Payment Schedule (in days)", "Number of Arbitrators") and "notice" not in field.lower():
+            assert CONTRACT[match.span[0]:match.span[1]] == match.value
+
+
+@pytest.mark.parametrize("content,field", [
+    ("The Supplier shall cure any breach within a period of 15 days.", "Contract Duration"),
+    ("The Supplier shall cure any breach of this Agreement within a period of 15 days.", "Contract Duration"),
+    ("The total aggregate liability shall not exceed the total amount of USD 10,000.", "Total Contract Value"),
+    ("Liquidated damages are capped at a total amount of INR 5,00,000.", "Total Contract Value"),
+    ("The warranty expires on 31 December 2025.", "Contract End Date"),
+    ("The warranty under this Agreement expires on 31 December 2025.", "Contract End Date"),
+    ("With effect from 1 April 2025 the rates shall increase.", "Effective Date"),
+    ("The revised rates shall be effective from 1 April 2025.", "Effective Date"),
+    ("The works shall commence on 1 May 2025.", "Contract Start Date"),
+])
+def test_clauses_about_something_else_are_ignored(content, field):
+    assert field not in extract_fields(content)
+
+
+@pytest.mark.parametrize("content,field,value", [
+    ("The Master Services Agreement shall commence on 2024-02-01.", "Contract Start Date", "2024-02-01"),
+    ("This Agreement shall come into force with effect from 1 April 2025.", "Effective Date", "1 April 2025"),
+    ("This Agreement shall remain valid for a period of 24 months.", "Contract Duration", "24 months"),
+    ("This Agreement shall expire on March 31, 2027.", "Contract End Date", "March 31, 2027"),
+    ("Liability is capped at USD 1,000. The total contract price is USD 250,000.", "Total Contract Value", "USD 250,000"),
+])
+def test_agreement_wording(content, field, value):
+    assert values(content)[field] == value
+
+
+def test_currency_words_in_prose_do_not_count():
+    content = (
+        "The courier may carry parcels of up to 20 pounds. Spare dollars, euros or rupees may not be "
+        "used as tokens. The fee is USD 5,000."
+    )
+    assert values(content)["Currency"] == "USD"
+    assert "Currency" not in extract_fields("Payments in dollars or euros are accepted.")
+
+
+def test_currency_needs_a_clear_majority():
+    assert "Currency" not in extract_fields("Fees of USD 5,000 and EUR 4,000 apply.")
+    assert values("Fees of USD 5,000, USD 2,000 and EUR 4,000 apply.")["Currency"] == "USD"
+
+
+@pytest.mark.parametrize("text,days", [
+    ("thirty (30) days", 30),
+    ("45 business days", 45),
+    ("two weeks", 14),
+    ("six months", None),
+    ("no duration", None),
+])
+def test_to_days(text, days):
+    assert to_days(text) == days
+
+
+class FakeAgent:
+    """Answers a fixed value for some fields and Not Found for the rest"""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.prompts = []
+
+    def run(self, prompt, *args, **kwargs):
+        self.prompts.append(prompt)
+        fields = re.findall(r"^\s*(.+?): <extracted_value>$", prompt, re.M)
+        content = json.dumps({field: self.answers.get(field, "Not Found") for field in fields})
+        return type("Response", (), {"content": content})()
+
+
+def test_labelled_values_skip_the_model_and_inferred_ones_are_hints(monkeypatch):
+    # Token counts are only reported; skip loading the encoding
+    monkeypatch.setattr(extract_information, "_token_count", lambda text: len(text) // 4)
+    agent = FakeAgent({"Notice period (in days) to stop auto renewal": "60", "Auto Renewal": "Yes"})
+    processor = ExtractionProcessor()
+    processor.contract_sections = {
+        "Key Dates and Duration": ["Effective Date", "Contract End Date", "Contract Duration"],
+        "Contract Renewal and Lock-in": ["Auto Renewal", "Notice period (in days) to stop auto renewal"],
+        "Financial Terms": ["Total Contract Value", "Currency"],
+    }
+    processor.process_extractions(CONTRACT, None, agent=agent)
+
+    # Every date was read next to its label: no call for the section
+    assert processor.section_stats["Key Dates and Duration"]["llm_calls"] == 0
+    assert processor.section_stats["Key Dates and Duration"]["context_source"] == "rules"
+    assert len(agent.prompts) == 2
+    assert not any("Effective Date" in prompt for prompt in agent.prompts)
+
+    # Resolved fields are neither asked for nor suggested; inferred ones are suggested
+    prompt = next(p for p in agent.prompts if "Currency: <extracted_value>" in p)
+    assert "Total Contract Value" not in prompt
+    assert "Currency: INR" in prompt
+
+    results = processor.results
+    assert results.get("Effective Date").extracted_value == "1st January, 2024"
+    assert results.get("Effective Date").source == "rules"
+    assert results.get("Total Contract Value").source == "rules"
+    # Not found by the model: the hint stands
+    assert results.get("Currency").extracted_value == "INR"
+    assert results.get("Currency").source == "rules"
+    # Corrected by the model
+    assert results.get("Notice period (in days) to stop auto renewal").extracted_value == "60"
+    assert results.get("Notice period (in days) to stop auto renewal").source == "llm"
+    assert processor.section_stats["Financial Terms"]["rule_kept"] == 1
+    assert processor.section_stats["Contract Renewal and Lock-in"]["rule_kept"] == 0
+
+
+def test_resolved_fields_are_left_out_of_the_response_schema(monkeypatch):
+    monkeypatch.setattr(extract_information, "_token_count", lambda text: len(text) // 4)
+    formats = []
+
+    @contextmanager
+    def acquire_agent(output_format):
+        formats.append(output_format)
+        yield FakeAgent({})
+
+    processor = ExtractionProcessor()
+    processor.contract_sections = {
+        "Key Dates and Duration": ["Effective Date", "Contract End Date"],
+        "Financial Terms": ["Total Contract Value", "Currency"],
+    }
+    processor.process_extractions(CONTRACT, None, acquire_agent=acquire_agent)
+
+    assert [f["required"] for f in formats] == [["Currency"]]
+    assert [record.term for record in processor.results] == [
+        "Effective Date", "Contract End Date", "Total Contract Value", "Currency",
+    ]